@@ -3,17 +3,15 @@
 import asyncio
 import logging
 import sys
-import aiohttp
 
 import pyfronius
 
 
 async def main(loop, host):
-    timeout = aiohttp.ClientTimeout(total=10)
-    async with aiohttp.ClientSession(loop=loop, timeout=timeout) as session:
+    async with pyfronius.create_session(timeout=10) as session:
         fronius = pyfronius.Fronius(session, host)
 
-        res = await fronius.fetch(loop=loop)
+        res = await fronius.fetch()
         for r in res:
             print(r)
 
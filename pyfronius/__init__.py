@@ -5,12 +5,18 @@ Created on 27.09.2017
 @author: Gerrit Beine
 """
 
-import asyncio
-
-import aiohttp
-import json
+# The converters, field tables and urls are usable without the HTTP stack,
+# aiohttp, asyncio and json are imported on first network use only.
+import codecs
 import logging
 import enum
+import functools
+import time
+
+from .budget import Priority, RequestBudget  # noqa: F401
+from .latency import LatencyTracker, LoopLagMonitor  # noqa: F401
+from .session import create_session  # noqa: F401
+from .tracing import PayloadTracer  # noqa: F401
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -66,35 +72,267 @@ URL_DEVICE_INVERTER_COMMON = {
 }
 
 
+# Field tables of the converters: (source key, output field, unit)
+# A unit of None means the value is reported without unit
+POWER_FLOW_SITE_FIELDS = (
+    ("BatteryStandby", "battery_standby", None),
+    ("E_Day", "energy_day", "Wh"),
+    ("E_Total", "energy_total", "Wh"),
+    ("E_Year", "energy_year", "Wh"),
+    ("Meter_Location", "meter_location", None),
+    ("Mode", "meter_mode", None),
+    ("P_Akku", "power_battery", "W"),
+    ("P_Grid", "power_grid", "W"),
+    ("P_Load", "power_load", "W"),
+    ("P_PV", "power_photovoltaics", "W"),
+    ("rel_Autonomy", "relative_autonomy", "%"),
+    ("rel_SelfConsumption", "relative_self_consumption", "%"),
+)
+POWER_FLOW_INVERTER_FIELDS = (
+    ("Battery_Mode", "battery_mode", None),
+    ("SOC", "state_of_charge", "%"),
+)
+METER_FIELDS = (
+    ("Current_AC_Phase_1", "current_ac_phase_1", "A"),
+    ("Current_AC_Phase_2", "current_ac_phase_2", "A"),
+    ("Current_AC_Phase_3", "current_ac_phase_3", "A"),
+    ("EnergyReactive_VArAC_Sum_Consumed", "energy_reactive_ac_consumed", "Wh"),
+    ("EnergyReactive_VArAC_Sum_Produced", "energy_reactive_ac_produced", "Wh"),
+    ("EnergyReal_WAC_Minus_Absolute", "energy_real_ac_minus", "Wh"),
+    ("EnergyReal_WAC_Plus_Absolute", "energy_real_ac_plus", "Wh"),
+    ("EnergyReal_WAC_Sum_Consumed", "energy_real_consumed", "Wh"),
+    ("EnergyReal_WAC_Sum_Produced", "energy_real_produced", "Wh"),
+    ("Frequency_Phase_Average", "frequency_phase_average", "Hz"),
+    ("PowerApparent_S_Phase_1", "power_apparent_phase_1", "W"),
+    ("PowerApparent_S_Phase_2", "power_apparent_phase_2", "W"),
+    ("PowerApparent_S_Phase_3", "power_apparent_phase_3", "W"),
+    ("PowerApparent_S_Sum", "power_apparent", "W"),
+    ("PowerFactor_Phase_1", "power_factor_phase_1", "W"),
+    ("PowerFactor_Phase_2", "power_factor_phase_2", "W"),
+    ("PowerFactor_Phase_3", "power_factor_phase_3", "W"),
+    ("PowerFactor_Sum", "power_factor", "W"),
+    ("PowerReactive_Q_Phase_1", "power_reactive_phase_1", "W"),
+    ("PowerReactive_Q_Phase_2", "power_reactive_phase_2", "W"),
+    ("PowerReactive_Q_Phase_3", "power_reactive_phase_3", "W"),
+    ("PowerReactive_Q_Sum", "power_reactive", "W"),
+    ("PowerReal_P_Phase_1", "power_real_phase_1", "W"),
+    ("PowerReal_P_Phase_2", "power_real_phase_2", "W"),
+    ("PowerReal_P_Phase_3", "power_real_phase_3", "W"),
+    ("PowerReal_P_Sum", "power_real", "W"),
+    ("Voltage_AC_Phase_1", "voltage_ac_phase_1", "V"),
+    ("Voltage_AC_Phase_2", "voltage_ac_phase_2", "V"),
+    ("Voltage_AC_Phase_3", "voltage_ac_phase_3", "V"),
+    ("Voltage_AC_PhaseToPhase_12", "voltage_ac_phase_to_phase_12", "V"),
+    ("Voltage_AC_PhaseToPhase_23", "voltage_ac_phase_to_phase_23", "V"),
+    ("Voltage_AC_PhaseToPhase_31", "voltage_ac_phase_to_phase_31", "V"),
+    ("Meter_Location_Current", "meter_location", None),
+    ("Enable", "enable", None),
+    ("Visible", "visible", None),
+)
+CONTROLLER_FIELDS = (
+    ("Capacity_Maximum", "capacity_maximum", "Ah"),
+    ("DesignedCapacity", "capacity_designed", "Ah"),
+    ("Current_DC", "current_dc", "A"),
+    ("Voltage_DC", "voltage_dc", "V"),
+    ("Voltage_DC_Maximum_Cell", "voltage_dc_maximum_cell", "V"),
+    ("Voltage_DC_Minimum_Cell", "voltage_dc_minimum_cell", "V"),
+    ("StateOfCharge_Relative", "state_of_charge", "%"),
+    ("Temperature_Cell", "temperature_cell", "C"),
+    ("Enable", "enable", None),
+)
+MODULE_FIELDS = (
+    ("Capacity_Maximum", "capacity_maximum", "Ah"),
+    ("DesignedCapacity", "capacity_designed", "Ah"),
+    ("Current_DC", "current_dc", "A"),
+    ("Voltage_DC", "voltage_dc", "V"),
+    ("Voltage_DC_Maximum_Cell", "voltage_dc_maximum_cell", "V"),
+    ("Voltage_DC_Minimum_Cell", "voltage_dc_minimum_cell", "V"),
+    ("StateOfCharge_Relative", "state_of_charge", "%"),
+    ("Temperature_Cell", "temperature_cell", "C"),
+    ("Temperature_Cell_Maximum", "temperature_cell_maximum", "C"),
+    ("Temperature_Cell_Minimum", "temperature_cell_minimum", "C"),
+    ("CycleCount_BatteryCell", "cycle_count_cell", None),
+    ("Status_BatteryCell", "status_cell", None),
+    ("Enable", "enable", None),
+)
+DETAILS_FIELDS = (
+    ("Manufacturer", "manufacturer", None),
+    ("Model", "model", None),
+    ("Serial", "serial", None),
+)
+# Inverter data reports units along with the values: (source key, output field)
+INVERTER_FIELDS = (
+    ("DAY_ENERGY", "energy_day"),
+    ("TOTAL_ENERGY", "energy_total"),
+    ("YEAR_ENERGY", "energy_year"),
+    ("FAC", "frequency_ac"),
+    ("IAC", "current_ac"),
+    ("IDC", "current_dc"),
+    ("PAC", "power_ac"),
+    ("UAC", "voltage_ac"),
+    ("UDC", "voltage_dc"),
+)
+# Inverter data summed up over all inverters: (source key, output field, unit)
+SYSTEM_INVERTER_FIELDS = (
+    ("DAY_ENERGY", "energy_day", "Wh"),
+    ("TOTAL_ENERGY", "energy_total", "Wh"),
+    ("YEAR_ENERGY", "energy_year", "Wh"),
+    ("PAC", "power_ac", "W"),
+)
+LED_FIELDS = (
+    ("PowerLED", "power_led"),
+    ("SolarNetLED", "solar_net_led"),
+    ("SolarWebLED", "solar_web_led"),
+    ("WLANLED", "wlan_led"),
+)
+
+
+def _field_names(*tables):
+    return frozenset(row[1] for table in tables for row in table)
+
+
+# Output fields provided by each endpoint of Fronius.fetch
+ENDPOINT_FIELDS = {
+    "power_flow": _field_names(POWER_FLOW_SITE_FIELDS, POWER_FLOW_INVERTER_FIELDS),
+    "system_meter": _field_names(METER_FIELDS, DETAILS_FIELDS),
+    "system_inverter": _field_names(SYSTEM_INVERTER_FIELDS),
+    "device_meter": _field_names(METER_FIELDS, DETAILS_FIELDS),
+    "device_storage": _field_names(CONTROLLER_FIELDS, MODULE_FIELDS, DETAILS_FIELDS),
+    "device_inverter": _field_names(INVERTER_FIELDS),
+    "led": _field_names(LED_FIELDS),
+}
+
+
+def _decode_reply(text, convert=None):
+    """
+    Decode a JSON reply and optionally convert it.
+    Module level, so that it can be run in a process pool.
+    """
+    import json
+
+    res = json.loads(text)
+    if convert is not None:
+        res = convert(res)
+    return res
+
+
 class Fronius:
     """
     Interface to communicate with the Fronius Symo over http / JSON
-    Timeouts are to be set in the given AIO session
+    Timeouts are to be set in the given AIO session, unless a latency tracker
+    is given. In that case each request gets a deadline derived from the
+    latencies observed for its endpoint.
     Attributes:
         session     The AIO session
         url         The url for reaching of the Fronius device
                     (i.e. http://192.168.0.10:80)
         api_version  Version of Fronius API to use
+        latency_tracker  LatencyTracker deriving per-request deadlines
+                    (optional, may be shared among devices)
+        persistent  Keep one reading per endpoint and device and update its
+                    values in place instead of returning new readings.
+                    Persistent readings carry a "sequence" number that is
+                    incremented with every update. Entries missing from a
+                    reply are removed. A failed update returns an empty
+                    reading and replaces the persistent one, which may be
+                    partly updated.
+        offload_threshold  Size of a reply (in characters) from which on it
+                    is decoded and converted in the executor instead of on
+                    the event loop, None to always decode inline
+        executor    concurrent.futures executor for large replies, None
+                    for the default executor of the event loop. Process
+                    pools cannot update persistent readings in place.
+        tracer      PayloadTracer keeping and logging the raw replies
+                    (optional, may be shared among devices)
+        budget      RequestBudget limiting the request rate per device
+                    (optional, may be shared among devices and instances)
+        priority    Priority class of the requests within the budget
+                    (i.e. Priority.CONTROL), Priority.INTERACTIVE if omitted
+    The current_* and fetch methods accept a set of output fields
+    (i.e. {"power_grid", "state_of_charge"}) to restrict conversion to.
     """
 
-    def __init__(self, session, url, api_version=API_VERSION.AUTO):
+    def __init__(
+        self,
+        session,
+        url,
+        api_version=API_VERSION.AUTO,
+        latency_tracker=None,
+        persistent=False,
+        offload_threshold=None,
+        executor=None,
+        tracer=None,
+        budget=None,
+        priority=None,
+    ):
         """
         Constructor
         """
+        if persistent and executor is not None:
+            import concurrent.futures
+
+            if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+                raise ValueError("Persistent readings require a thread executor")
         self._aio_session = session
         self.url = url
         self.api_version = api_version
         self.base_url = API_BASEPATHS.get(API_VERSION)
+        self.latency_tracker = latency_tracker
+        self.persistent = persistent
+        self._readings = {}
+        self.offload_threshold = offload_threshold
+        self.executor = executor
+        self.tracer = tracer
+        self.budget = budget
+        self.priority = priority
+
+    async def _decode(self, text, convert=None):
+        """
+        Decode (and convert) a reply inline if small, in the executor if large
+        """
+        if self.offload_threshold is None or len(text) < self.offload_threshold:
+            return _decode_reply(text, convert)
+        import asyncio
+
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, _decode_reply, text, convert)
 
-    async def _fetch_json(self, url):
+    def _request_kwargs(self, url):
+        kwargs = {}
+        if self.latency_tracker is not None:
+            import aiohttp
+
+            kwargs["timeout"] = aiohttp.ClientTimeout(
+                total=self.latency_tracker.timeout(url)
+            )
+        return kwargs
+
+    async def _fetch_json(self, url, convert=None, endpoint=None):
         """
         Fetch json value from fixed url
+        :param convert: Function applied to the decoded value, run along with
+            the decoding
+        :param endpoint: Name of the endpoint for tracing, the url if omitted
         """
+        import asyncio
+        import json
+
+        import aiohttp
+
+        if self.budget is not None:
+            await self.budget.acquire(self.url, self.priority)
+        kwargs = self._request_kwargs(url)
+        start = time.monotonic()
         try:
-            async with self._aio_session.get(url) as res:
+            async with self._aio_session.get(url, **kwargs) as res:
                 text = await res.text()
-                text = json.loads(text)
-        except aiohttp.ServerTimeoutError:
+            if self.tracer is not None:
+                self.tracer.record(self.url, endpoint or url, text)
+            text = await self._decode(text, convert)
+        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError):
+            if self.latency_tracker is not None:
+                # a timed out request took at least as long as its deadline
+                self.latency_tracker.record(url, time.monotonic() - start)
             raise ConnectionError(
                 "Connection to Fronius device timed out at {}.".format(url)
             )
@@ -104,15 +342,62 @@ class Fronius:
             )
         except json.JSONDecodeError:
             raise ValueError("Host returned a non-JSON reply at {}.".format(url))
+        if self.latency_tracker is not None:
+            self.latency_tracker.record(url, time.monotonic() - start)
         return text
 
+    async def _stream_json(self, url, path, chunk_size=16384):
+        """
+        Fetch json value from fixed url, parsing it chunk by chunk
+        :param path: Path of the records to emit, see RecordParser
+        :return: Async iterator of the events (path, value) of the parser
+        """
+        import asyncio
+
+        import aiohttp
+
+        from .stream import RecordParser
+
+        if self.budget is not None:
+            await self.budget.acquire(self.url, self.priority)
+        kwargs = self._request_kwargs(url)
+        parser = RecordParser(path)
+        start = time.monotonic()
+        try:
+            async with self._aio_session.get(url, **kwargs) as res:
+                decoder = codecs.getincrementaldecoder(res.charset or "utf-8")(
+                    "replace"
+                )
+                async for chunk in res.content.iter_chunked(chunk_size):
+                    for event in parser.feed(decoder.decode(chunk)):
+                        yield event
+                events = parser.feed(decoder.decode(b"", final=True))
+                for event in events + parser.close():
+                    yield event
+        except (aiohttp.ServerTimeoutError, asyncio.TimeoutError):
+            if self.latency_tracker is not None:
+                self.latency_tracker.record(url, time.monotonic() - start)
+            raise ConnectionError(
+                "Connection to Fronius device timed out at {}.".format(url)
+            )
+        except aiohttp.ClientError:
+            raise ConnectionError(
+                "Connection to Fronius device failed at {}.".format(url)
+            )
+        except ValueError:
+            raise ValueError("Host returned a non-JSON reply at {}.".format(url))
+        if self.latency_tracker is not None:
+            self.latency_tracker.record(url, time.monotonic() - start)
+
     async def fetch_api_version(self):
         """
         Fetches the highest supported API version of the initiated fronius device
         :return:
         """
         try:
-            res = await self._fetch_json("{}/{}".format(self.url, URL_API_VERSION))
+            res = await self._fetch_json(
+                "{}/{}".format(self.url, URL_API_VERSION), endpoint="api version"
+            )
             api_version, base_url = API_VERSION(res["APIVersion"]), res["BaseURL"]
         except ValueError:
             # Host returns 404 response if API version is 0
@@ -120,9 +405,9 @@ class Fronius:
 
         return api_version, base_url
 
-    async def _fetch_solar_api(self, spec, spec_name, *spec_formattings):
+    async def _solar_api_url(self, spec, spec_name, *spec_formattings):
         """
-        Fetch page of solar_api
+        Url of a page of solar_api, None if not supported by the API version
         """
         # either unknown api version given or automatic
         if self.base_url is None:
@@ -130,9 +415,7 @@ class Fronius:
             self.api_version, self.base_url = await self.fetch_api_version()
             if prev_api_version == API_VERSION.AUTO:
                 _LOGGER.debug(
-                    """using highest supported API version {}""".format(
-                        self.api_version
-                    )
+                    "using highest supported API version %s", self.api_version
                 )
             if (
                 prev_api_version != self.api_version
@@ -140,25 +423,116 @@ class Fronius:
             ):
                 _LOGGER.warning(
                     (
-                        """Unknown API version {} is not supported by host {},"""
-                        """using highest supported API version {} instead"""
-                    ).format(prev_api_version, self.url, self.api_version)
+                        """Unknown API version %s is not supported by host %s,"""
+                        """using highest supported API version %s instead"""
+                    ),
+                    prev_api_version,
+                    self.url,
+                    self.api_version,
                 )
         spec_url = spec.get(self.api_version)
         if spec_url is None:
             _LOGGER.warning(
-                "API version {} does not support request of {} data".format(
-                    self.api_version, spec_name
-                )
+                "API version %s does not support request of %s data",
+                self.api_version,
+                spec_name,
             )
             return None
         if spec_formattings:
             spec_url = spec_url.format(*spec_formattings)
 
-        _LOGGER.debug("Get {} data for {}".format(spec_name, spec_url))
-        res = await self._fetch_json("{}{}{}".format(self.url, self.base_url, spec_url))
+        _LOGGER.debug("Get %s data for %s", spec_name, spec_url)
+        return "{}{}{}".format(self.url, self.base_url, spec_url)
+
+    async def _fetch_solar_api(self, spec, spec_name, *spec_formattings, convert=None):
+        """
+        Fetch page of solar_api
+        :param convert: Function applied to the decoded page
+        """
+        url = await self._solar_api_url(spec, spec_name, *spec_formattings)
+        if url is None:
+            return None
+        res = await self._fetch_json(url, convert, spec_name)
         return res
 
+    async def _stream_solar_api(self, spec, spec_name, *spec_formattings, path=None):
+        """
+        Fetch page of solar_api, parsing it chunk by chunk
+        :param path: Path of the records to emit, Body.Data if omitted
+        :return: Async iterator of the records below path as tuples
+            (path, value), and of the values not on path (i.e. the head)
+        """
+        from .stream import RECORD_PATH
+
+        url = await self._solar_api_url(spec, spec_name, *spec_formattings)
+        if url is None:
+            return
+        if path is None:
+            path = RECORD_PATH
+        async for event in self._stream_json(url, path):
+            yield event
+
+    def _fetch_requests(
+        self,
+        power_flow,
+        system_meter,
+        system_inverter,
+        device_meter,
+        device_storage,
+        device_inverter,
+        fields=None,
+    ):
+        """
+        Build the requests of a fetch cycle.
+        Endpoints providing none of the requested fields are left out.
+        :return: List of tuples (key, coroutine), the key being a tuple of
+            endpoint name and device id (None for system scope endpoints)
+        """
+        if fields is not None:
+            fields = frozenset(fields)
+
+        def wanted(endpoint):
+            return fields is None or not fields.isdisjoint(ENDPOINT_FIELDS[endpoint])
+
+        requests = []
+        if power_flow and wanted("power_flow"):
+            requests.append(
+                (("power_flow", None), self.current_power_flow(fields=fields))
+            )
+        if system_meter and wanted("system_meter"):
+            requests.append(
+                (("system_meter", None), self.current_system_meter_data(fields=fields))
+            )
+        if system_inverter and wanted("system_inverter"):
+            requests.append(
+                (
+                    ("system_inverter", None),
+                    self.current_system_inverter_data(fields=fields),
+                )
+            )
+        if wanted("device_meter"):
+            for i in device_meter:
+                requests.append(
+                    (("device_meter", i), self.current_meter_data(i, fields=fields))
+                )
+        if wanted("device_storage"):
+            for i in device_storage:
+                requests.append(
+                    (
+                        ("device_storage", i),
+                        self.current_storage_data(i, fields=fields),
+                    )
+                )
+        if wanted("device_inverter"):
+            for i in device_inverter:
+                requests.append(
+                    (
+                        ("device_inverter", i),
+                        self.current_inverter_data(i, fields=fields),
+                    )
+                )
+        return requests
+
     async def fetch(
         self,
         power_flow=True,
@@ -168,30 +542,163 @@ class Fronius:
         device_storage=frozenset([0]),
         device_inverter=frozenset([1]),
         loop=None,
+        deadline=None,
+        fields=None,
     ):
-        requests = []
-        if power_flow:
-            requests.append(self.current_power_flow())
-        if system_meter:
-            requests.append(self.current_system_meter_data())
-        if system_inverter:
-            requests.append(self.current_system_inverter_data())
-        for i in device_meter:
-            requests.append(self.current_meter_data(i))
-        for i in device_storage:
-            requests.append(self.current_storage_data(i))
-        for i in device_inverter:
-            requests.append(self.current_inverter_data(i))
-
-        responses = await asyncio.gather(*requests, loop=loop)
-        return responses
+        """
+        Fetch the requested data concurrently.
+        :param loop: Deprecated, ignored
+        :param deadline: Hard deadline in seconds for the whole fetch cycle.
+            Requests not finished by then are cancelled and yield an empty
+            result, so partial results are returned instead of blocking on
+            the slowest endpoint.
+        :param fields: Output fields to produce, None for all. Endpoints
+            providing none of them are not requested.
+        :return: List of results in the order of the requests
+        """
+        import asyncio
+
+        requests = [
+            request
+            for _, request in self._fetch_requests(
+                power_flow,
+                system_meter,
+                system_inverter,
+                device_meter,
+                device_storage,
+                device_inverter,
+                fields,
+            )
+        ]
+
+        if deadline is None:
+            responses = await asyncio.gather(*requests)
+            return responses
+
+        tasks = [asyncio.ensure_future(request) for request in requests]
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            _LOGGER.info(
+                "%d requests to %s missed the deadline of %ss",
+                len(pending),
+                self.url,
+                deadline,
+            )
+            await asyncio.wait(pending)
+        return [{} if task in pending else task.result() for task in tasks]
+
+    async def fetch_as_completed(
+        self,
+        power_flow=True,
+        system_meter=True,
+        system_inverter=True,
+        device_meter=frozenset([0]),
+        device_storage=frozenset([0]),
+        device_inverter=frozenset([1]),
+        deadline=None,
+        fields=None,
+    ):
+        """
+        Fetch the requested data concurrently, yielding each result as soon
+        as its request finished.
+        A failing request does not affect the others, its exception is
+        yielded as result instead. Requests that did not finish within the
+        deadline are cancelled and yield an asyncio.TimeoutError.
+        :param deadline: Hard deadline in seconds for the whole fetch cycle
+        :param fields: Output fields to produce, None for all
+        :return: Async iterator of tuples (key, result), the key being a tuple
+            of endpoint name and device id (i.e. ("device_meter", 0))
+        """
+        import asyncio
+
+        requests = self._fetch_requests(
+            power_flow,
+            system_meter,
+            system_inverter,
+            device_meter,
+            device_storage,
+            device_inverter,
+            fields,
+        )
+        loop = asyncio.get_event_loop()
+        keys = {}
+        order = {}
+        for index, (key, request) in enumerate(requests):
+            task = asyncio.ensure_future(request)
+            keys[task] = key
+            order[task] = index
+        end = None if deadline is None else loop.time() + deadline
+        pending = set(keys)
+        try:
+            while pending:
+                timeout = None if end is None else max(end - loop.time(), 0)
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in sorted(done, key=order.get):
+                    try:
+                        result = task.result()
+                    except Exception as e:
+                        result = e
+                    yield keys[task], result
+            for task in sorted(pending, key=order.get):
+                task.cancel()
+            for task in sorted(pending, key=order.get):
+                yield keys[task], asyncio.TimeoutError(
+                    "Request to {} missed the deadline of {}s".format(
+                        self.url, deadline
+                    )
+                )
+            pending = set()
+        finally:
+            # consumer stopped early, do not leave requests behind
+            for task in pending:
+                task.cancel()
+
+    async def fetch_named(
+        self,
+        power_flow=True,
+        system_meter=True,
+        system_inverter=True,
+        device_meter=frozenset([0]),
+        device_storage=frozenset([0]),
+        device_inverter=frozenset([1]),
+        deadline=None,
+        fields=None,
+    ):
+        """
+        Fetch the requested data concurrently, tolerating partial failures.
+        :param deadline: Hard deadline in seconds for the whole fetch cycle
+        :param fields: Output fields to produce, None for all
+        :return: Dictionary of results keyed by tuples of endpoint name and
+            device id. Failed requests hold the raised exception, requests
+            missing the deadline an asyncio.TimeoutError.
+        """
+        results = {}
+        async for key, result in self.fetch_as_completed(
+            power_flow,
+            system_meter,
+            system_inverter,
+            device_meter,
+            device_storage,
+            device_inverter,
+            deadline=deadline,
+            fields=fields,
+        ):
+            results[key] = result
+        return results
 
     @staticmethod
-    def _status_data(res):
+    def _status_data(res, sensor=None):
 
-        sensor = {}
+        if sensor is None:
+            sensor = {}
 
-        sensor["timestamp"] = {"value": res["Head"]["Timestamp"]}
+        Fronius._update_entry(sensor, "timestamp", res["Head"]["Timestamp"])
         sensor["status"] = res["Head"]["Status"]
 
         return sensor
@@ -212,36 +719,82 @@ class Fronius:
         """
         return sensor_data["status"]["Reason"]
 
-    async def _current_data(self, fun, spec, spec_name, *spec_formattings):
-        
-        sensor = {}
+    @staticmethod
+    def _convert_reply(fun, sensor, fields, res):
+        Fronius._status_data(res, sensor)
+        return fun(sensor, res["Body"]["Data"], fields)
+
+    @staticmethod
+    def _conversion_failed(sensor, error):
+        """
+        Whether a reply failed to convert, as opposed to endpoints that are
+        not supported or replies of devices reporting an error (i.e. a
+        storage endpoint of a device without storage)
+        """
+        if not isinstance(error, (TypeError, KeyError)):
+            return False
+        status = sensor.get("status")
+        return not isinstance(status, dict) or not status.get("Code")
+
+    async def _current_data(self, fun, spec, spec_name, *spec_formattings, fields=None):
+
+        if fields is not None:
+            fields = frozenset(fields)
+        if self.persistent:
+            sensor = self._readings.setdefault(
+                (spec_name, spec_formattings, fields), {"sequence": {"value": 0}}
+            )
+        else:
+            sensor = {}
         try:
-            res = await self._fetch_solar_api(spec, spec_name, *spec_formattings)
-            sensor.update(Fronius._status_data(res))
-            # TODO use update here as well
-            sensor = fun(sensor, res["Body"]["Data"])
-        except (TypeError, KeyError, ValueError):
+            res = await self._fetch_solar_api(
+                spec,
+                spec_name,
+                *spec_formattings,
+                convert=functools.partial(Fronius._convert_reply, fun, sensor, fields)
+            )
+            if res is None:
+                raise ValueError("{} data not supported".format(spec_name))
+            sensor = res
+            if self.persistent:
+                sensor["sequence"]["value"] += 1
+        except (TypeError, KeyError, ValueError) as e:
             # break if Data is empty
-            _LOGGER.info("No data returned from {}".format(spec))
+            _LOGGER.info("No data returned from %s", spec)
+            if self.tracer is not None and Fronius._conversion_failed(sensor, e):
+                self.tracer.log_dump(self.url, repr(e))
+            if self.persistent:
+                # the reading may be partly updated, start over with a new one
+                self._readings[(spec_name, spec_formattings, fields)] = {
+                    "sequence": {"value": sensor["sequence"]["value"]}
+                }
+                sensor = {}
         return sensor
 
-    async def current_power_flow(self):
+    async def current_power_flow(self, fields=None):
         """
         Get the current power flow of a smart meter system.
+        :param fields: Output fields to produce, None for all
         """
         return await self._current_data(
-            Fronius._system_power_flow, URL_POWER_FLOW, "current power flow"
+            Fronius._system_power_flow,
+            URL_POWER_FLOW,
+            "current power flow",
+            fields=fields,
         )
 
-    async def current_system_meter_data(self):
+    async def current_system_meter_data(self, fields=None):
         """
         Get the current meter data.
         """
         return await self._current_data(
-            Fronius._system_meter_data, URL_SYSTEM_METER, "current system meter"
+            Fronius._system_meter_data,
+            URL_SYSTEM_METER,
+            "current system meter",
+            fields=fields,
         )
 
-    async def current_system_inverter_data(self):
+    async def current_system_inverter_data(self, fields=None):
         """
         Get the current inverter data.
         The values are provided as cumulated values and for each inverter
@@ -250,26 +803,35 @@ class Fronius:
             Fronius._system_inverter_data,
             URL_SYSTEM_INVERTER,
             "current system inverter",
+            fields=fields,
         )
 
-    async def current_meter_data(self, device=0):
+    async def current_meter_data(self, device=0, fields=None):
         """
         Get the current meter data for a device.
         """
         return await self._current_data(
-            Fronius._device_meter_data, URL_DEVICE_METER, "current meter", device
+            Fronius._device_meter_data,
+            URL_DEVICE_METER,
+            "current meter",
+            device,
+            fields=fields,
         )
 
-    async def current_storage_data(self, device=0):
+    async def current_storage_data(self, device=0, fields=None):
         """
         Get the current storage data for a device.
         Provides data about batteries.
         """
         return await self._current_data(
-            Fronius._device_storage_data, URL_DEVICE_STORAGE, "current storage", device
+            Fronius._device_storage_data,
+            URL_DEVICE_STORAGE,
+            "current storage",
+            device,
+            fields=fields,
         )
 
-    async def current_inverter_data(self, device=1):
+    async def current_inverter_data(self, device=1, fields=None):
         """
         Get the current inverter data of one device.
         """
@@ -278,500 +840,275 @@ class Fronius:
             URL_DEVICE_INVERTER_COMMON,
             "current inverter",
             device,
+            fields=fields,
         )
 
-    async def current_led_data(self):
+    async def current_led_data(self, fields=None):
         """
         Get the current info led data for all LEDs
         """
         return await self._current_data(
-            Fronius._system_led_data, URL_SYSTEM_LED, "current led"
+            Fronius._system_led_data, URL_SYSTEM_LED, "current led", fields=fields
         )
 
+    async def stream_system_meter_data(self, fields=None):
+        """
+        Get the current meter data meter by meter, parsing the reply
+        incrementally. Memory use is bounded by the largest meter instead of
+        the whole reply.
+        :param fields: Output fields to produce, None for all
+        :return: Async iterator of tuples (meter id, meter reading)
+        """
+        from .stream import RECORD_PATH
+
+        if fields is not None:
+            fields = frozenset(fields)
+        async for path, data in self._stream_solar_api(
+            URL_SYSTEM_METER, "current system meter"
+        ):
+            if len(path) == 3 and path[:2] == RECORD_PATH:
+                yield path[2], Fronius._meter_data(data, fields)
+
+    async def stream_system_inverter_data(self, fields=None):
+        """
+        Get the current inverter data channel by channel, parsing the reply
+        incrementally. Memory use is bounded by the largest channel instead
+        of the whole reply.
+        :param fields: Output fields to produce, None for all
+        :return: Async iterator of tuples (field name, dictionary of inverter
+            id to entry)
+        """
+        from .stream import RECORD_PATH
+
+        names = {key: name for key, name, _ in SYSTEM_INVERTER_FIELDS}
+        async for path, data in self._stream_solar_api(
+            URL_SYSTEM_INVERTER, "current system inverter"
+        ):
+            if len(path) != 3 or path[:2] != RECORD_PATH:
+                continue
+            name = names.get(path[2])
+            if name is None or (fields is not None and name not in fields):
+                continue
+            yield name, {
+                i: {"value": value, "unit": data["Unit"]}
+                for i, value in data["Values"].items()
+            }
+
+    async def stream_storage_modules(self, device=0, fields=None):
+        """
+        Get the current data of the battery modules of a storage device
+        module by module, parsing the reply incrementally.
+        :param fields: Output fields to produce, None for all
+        :return: Async iterator of tuples (module index, module reading)
+        """
+        from .stream import RECORD_PATH
+
+        if fields is not None:
+            fields = frozenset(fields)
+        modules = RECORD_PATH + ("Modules",)
+        async for path, data in self._stream_solar_api(
+            URL_DEVICE_STORAGE, "current storage", device, path=modules
+        ):
+            if len(path) == 4 and path[:3] == modules:
+                yield path[3], Fronius._module_data(data, fields)
+
     @staticmethod
-    def _system_led_data(sensor, data):
-        _LOGGER.debug("Converting system led data: '{}'".format(data))
+    def _update_entry(out, name, value, unit=None):
+        """
+        Set the value of an entry, creating the entry only if it is missing
+        """
+        entry = out.get(name)
+        if entry is None:
+            if unit is None:
+                out[name] = {"value": value}
+            else:
+                out[name] = {"value": value, "unit": unit}
+        else:
+            entry["value"] = value
 
-        _map = {
-            "PowerLED": "power_led",
-            "SolarNetLED": "solar_net_led",
-            "SolarWebLED": "solar_web_led",
-            "WLANLED": "wlan_led",
-        }
+    @staticmethod
+    def _convert_fields(table, data, fields, out):
+        """
+        Convert the fields of a field table present in data into out
+        :param fields: Set of output fields to convert, None for all
+        """
+        for key, name, unit in table:
+            if fields is not None and name not in fields:
+                continue
+            if key in data:
+                Fronius._update_entry(out, name, data[key], unit)
+            else:
+                # persistent readings may hold it from an earlier reply
+                out.pop(name, None)
+        return out
 
-        for led in _map:
+    @staticmethod
+    def _drop_fields(table, out):
+        """
+        Remove the fields of a field table from out
+        """
+        for field in table:
+            out.pop(field[1], None)
+        return out
+
+    @staticmethod
+    def _system_led_data(sensor, data, fields=None):
+        _LOGGER.debug("Converting system led data: '%s'", data)
+
+        for led, name in LED_FIELDS:
+            if fields is not None and name not in fields:
+                continue
             if led in data:
-                sensor[_map[led]] = {
-                    "color": data[led]["Color"],
-                    "state": data[led]["State"],
-                }
+                entry = sensor.setdefault(name, {})
+                entry["color"] = data[led]["Color"]
+                entry["state"] = data[led]["State"]
+            else:
+                sensor.pop(name, None)
 
         return sensor
 
     @staticmethod
-    def _system_power_flow(sensor, data):
-        _LOGGER.debug("Converting system power flow data: '{}'".format(data))
+    def _system_power_flow(sensor, data, fields=None):
+        _LOGGER.debug("Converting system power flow data: '%s'", data)
 
         site = data["Site"]
         # Backwards compatability
         if data["Inverters"].get("1"):
-            inverter = data["Inverters"]["1"]
-            if "Battery_Mode" in inverter:
-                sensor["battery_mode"] = {"value": inverter["Battery_Mode"]}
-            if "SOC" in inverter:
-                sensor["state_of_charge"] = {"value": inverter["SOC"], "unit": "%"}
+            Fronius._convert_fields(
+                POWER_FLOW_INVERTER_FIELDS, data["Inverters"]["1"], fields, sensor
+            )
+        else:
+            Fronius._drop_fields(POWER_FLOW_INVERTER_FIELDS, sensor)
 
         for index, inverter in enumerate(data["Inverters"]):
-            if "Battery_Mode" in inverter:
-                sensor["battery_mode_{}".format(index)] = {
-                    "value": inverter["Battery_Mode"]
-                }
-            if "SOC" in inverter:
-                sensor["state_of_charge_{}".format(index)] = {
-                    "value": inverter["SOC"],
-                    "unit": "%",
-                }
+            for key, name, unit in POWER_FLOW_INVERTER_FIELDS:
+                if key in inverter and (fields is None or name in fields):
+                    Fronius._update_entry(
+                        sensor, "{}_{}".format(name, index), inverter[key], unit
+                    )
 
-        if "BatteryStandby" in site:
-            sensor["battery_standby"] = {"value": site["BatteryStandby"]}
-        if "E_Day" in site:
-            sensor["energy_day"] = {"value": site["E_Day"], "unit": "Wh"}
-        if "E_Total" in site:
-            sensor["energy_total"] = {"value": site["E_Total"], "unit": "Wh"}
-        if "E_Year" in site:
-            sensor["energy_year"] = {"value": site["E_Year"], "unit": "Wh"}
-        if "Meter_Location" in site:
-            sensor["meter_location"] = {"value": site["Meter_Location"]}
-        if "Mode" in site:
-            sensor["meter_mode"] = {"value": site["Mode"]}
-        if "P_Akku" in site:
-            sensor["power_battery"] = {"value": site["P_Akku"], "unit": "W"}
-        if "P_Grid" in site:
-            sensor["power_grid"] = {"value": site["P_Grid"], "unit": "W"}
-        if "P_Load" in site:
-            sensor["power_load"] = {"value": site["P_Load"], "unit": "W"}
-        if "P_PV" in site:
-            sensor["power_photovoltaics"] = {"value": site["P_PV"], "unit": "W"}
-        if "rel_Autonomy" in site:
-            sensor["relative_autonomy"] = {"value": site["rel_Autonomy"], "unit": "%"}
-        if "rel_SelfConsumption" in site:
-            sensor["relative_self_consumption"] = {
-                "value": site["rel_SelfConsumption"],
-                "unit": "%",
-            }
+        Fronius._convert_fields(POWER_FLOW_SITE_FIELDS, site, fields, sensor)
 
         return sensor
 
     @staticmethod
-    def _system_meter_data(sensor, data):
-        _LOGGER.debug("Converting system meter data: '{}'".format(data))
+    def _system_meter_data(sensor, data, fields=None):
+        _LOGGER.debug("Converting system meter data: '%s'", data)
 
-        sensor["meters"] = {}
+        meters = sensor.setdefault("meters", {})
 
         for i in data:
-            sensor["meters"][i] = Fronius._meter_data(data[i])
+            meters[i] = Fronius._meter_data(data[i], fields, meters.get(i))
+        if len(meters) != len(data):
+            for i in [i for i in meters if i not in data]:
+                del meters[i]
 
         return sensor
 
     @staticmethod
-    def _system_inverter_data(sensor, data):
-        _LOGGER.debug("Converting system inverter data: '{}'".format(data))
-
-        sensor["energy_day"] = {"value": 0, "unit": "Wh"}
-        sensor["energy_total"] = {"value": 0, "unit": "Wh"}
-        sensor["energy_year"] = {"value": 0, "unit": "Wh"}
-        sensor["power_ac"] = {"value": 0, "unit": "W"}
-
-        sensor["inverters"] = {}
-
-        if "DAY_ENERGY" in data:
-            for i in data["DAY_ENERGY"]["Values"]:
-                sensor["inverters"][i] = {}
-                sensor["inverters"][i]["energy_day"] = {
-                    "value": data["DAY_ENERGY"]["Values"][i],
-                    "unit": data["DAY_ENERGY"]["Unit"],
-                }
-                sensor["energy_day"]["value"] += data["DAY_ENERGY"]["Values"][i]
-        if "TOTAL_ENERGY" in data:
-            for i in data["TOTAL_ENERGY"]["Values"]:
-                sensor["inverters"][i]["energy_total"] = {
-                    "value": data["TOTAL_ENERGY"]["Values"][i],
-                    "unit": data["TOTAL_ENERGY"]["Unit"],
-                }
-                sensor["energy_total"]["value"] += data["TOTAL_ENERGY"]["Values"][i]
-        if "YEAR_ENERGY" in data:
-            for i in data["YEAR_ENERGY"]["Values"]:
-                sensor["inverters"][i]["energy_year"] = {
-                    "value": data["YEAR_ENERGY"]["Values"][i],
-                    "unit": data["YEAR_ENERGY"]["Unit"],
-                }
-                sensor["energy_year"]["value"] += data["YEAR_ENERGY"]["Values"][i]
-        if "PAC" in data:
-            for i in data["PAC"]["Values"]:
-                sensor["inverters"][i]["power_ac"] = {
-                    "value": data["PAC"]["Values"][i],
-                    "unit": data["PAC"]["Unit"],
-                }
-                sensor["power_ac"]["value"] += data["PAC"]["Values"][i]
+    def _system_inverter_data(sensor, data, fields=None):
+        _LOGGER.debug("Converting system inverter data: '%s'", data)
+
+        inverters = sensor.setdefault("inverters", {})
+
+        for key, name, unit in SYSTEM_INVERTER_FIELDS:
+            if fields is not None and name not in fields:
+                continue
+            total = 0
+            values = data[key]["Values"] if key in data else {}
+            for i in values:
+                Fronius._update_entry(
+                    inverters.setdefault(i, {}),
+                    name,
+                    values[i],
+                    data[key]["Unit"],
+                )
+                total += values[i]
+            if len(inverters) != len(values):
+                for i in inverters:
+                    if i not in values:
+                        inverters[i].pop(name, None)
+            Fronius._update_entry(sensor, name, total, unit)
+        for i in [i for i in inverters if not inverters[i]]:
+            del inverters[i]
 
         return sensor
 
     @staticmethod
-    def _device_meter_data(sensor, data):
-        _LOGGER.debug("Converting meter data: '{}'".format(data))
+    def _device_meter_data(sensor, data, fields=None):
+        _LOGGER.debug("Converting meter data: '%s'", data)
 
-        sensor.update(Fronius._meter_data(data))
+        Fronius._meter_data(data, fields, sensor)
 
         return sensor
 
     @staticmethod
-    def _device_storage_data(sensor, data):
-        _LOGGER.debug("Converting storage data from '{}'".format(data))
+    def _device_storage_data(sensor, data, fields=None):
+        _LOGGER.debug("Converting storage data from '%s'", data)
 
         if "Controller" in data:
-            controller = Fronius._controller_data(data["Controller"])
-            sensor.update(controller)
+            Fronius._controller_data(data["Controller"], fields, sensor)
+        else:
+            Fronius._drop_fields(CONTROLLER_FIELDS + DETAILS_FIELDS, sensor)
 
         if "Modules" in data:
-            sensor["modules"] = {}
-            module_count = 0
+            modules = sensor.setdefault("modules", {})
 
-            for module in data["Modules"]:
-                sensor["modules"][module_count] = Fronius._module_data(module)
-                module_count += 1
+            for module_count, module in enumerate(data["Modules"]):
+                modules[module_count] = Fronius._module_data(
+                    module, fields, modules.get(module_count)
+                )
+            for module_count in range(len(data["Modules"]), len(modules)):
+                del modules[module_count]
+        else:
+            sensor.pop("modules", None)
 
         return sensor
 
     @staticmethod
-    def _device_inverter_data(sensor, data):
-        _LOGGER.debug("Converting inverter data from '{}'".format(data))
-
-        if "DAY_ENERGY" in data:
-            sensor["energy_day"] = {
-                "value": data["DAY_ENERGY"]["Value"],
-                "unit": data["DAY_ENERGY"]["Unit"],
-            }
-        if "TOTAL_ENERGY" in data:
-            sensor["energy_total"] = {
-                "value": data["TOTAL_ENERGY"]["Value"],
-                "unit": data["TOTAL_ENERGY"]["Unit"],
-            }
-        if "YEAR_ENERGY" in data:
-            sensor["energy_year"] = {
-                "value": data["YEAR_ENERGY"]["Value"],
-                "unit": data["YEAR_ENERGY"]["Unit"],
-            }
-        if "FAC" in data:
-            sensor["frequency_ac"] = {
-                "value": data["FAC"]["Value"],
-                "unit": data["FAC"]["Unit"],
-            }
-        if "IAC" in data:
-            sensor["current_ac"] = {
-                "value": data["IAC"]["Value"],
-                "unit": data["IAC"]["Unit"],
-            }
-        if "IDC" in data:
-            sensor["current_dc"] = {
-                "value": data["IDC"]["Value"],
-                "unit": data["IDC"]["Unit"],
-            }
-        if "PAC" in data:
-            sensor["power_ac"] = {
-                "value": data["PAC"]["Value"],
-                "unit": data["PAC"]["Unit"],
-            }
-        if "UAC" in data:
-            sensor["voltage_ac"] = {
-                "value": data["UAC"]["Value"],
-                "unit": data["UAC"]["Unit"],
-            }
-        if "UDC" in data:
-            sensor["voltage_dc"] = {
-                "value": data["UDC"]["Value"],
-                "unit": data["UDC"]["Unit"],
-            }
+    def _device_inverter_data(sensor, data, fields=None):
+        _LOGGER.debug("Converting inverter data from '%s'", data)
+
+        for key, name in INVERTER_FIELDS:
+            if fields is not None and name not in fields:
+                continue
+            if key in data:
+                Fronius._update_entry(
+                    sensor, name, data[key]["Value"], data[key]["Unit"]
+                )
+            else:
+                sensor.pop(name, None)
 
         return sensor
 
     @staticmethod
-    def _meter_data(data):
-
-        meter = {}
-
-        if "Current_AC_Phase_1" in data:
-            meter["current_ac_phase_1"] = {
-                "value": data["Current_AC_Phase_1"],
-                "unit": "A",
-            }
-        if "Current_AC_Phase_2" in data:
-            meter["current_ac_phase_2"] = {
-                "value": data["Current_AC_Phase_2"],
-                "unit": "A",
-            }
-        if "Current_AC_Phase_3" in data:
-            meter["current_ac_phase_3"] = {
-                "value": data["Current_AC_Phase_3"],
-                "unit": "A",
-            }
-        if "EnergyReactive_VArAC_Sum_Consumed" in data:
-            meter["energy_reactive_ac_consumed"] = {
-                "value": data["EnergyReactive_VArAC_Sum_Consumed"],
-                "unit": "Wh",
-            }
-        if "EnergyReactive_VArAC_Sum_Produced" in data:
-            meter["energy_reactive_ac_produced"] = {
-                "value": data["EnergyReactive_VArAC_Sum_Produced"],
-                "unit": "Wh",
-            }
-        if "EnergyReal_WAC_Minus_Absolute" in data:
-            meter["energy_real_ac_minus"] = {
-                "value": data["EnergyReal_WAC_Minus_Absolute"],
-                "unit": "Wh",
-            }
-        if "EnergyReal_WAC_Plus_Absolute" in data:
-            meter["energy_real_ac_plus"] = {
-                "value": data["EnergyReal_WAC_Plus_Absolute"],
-                "unit": "Wh",
-            }
-        if "EnergyReal_WAC_Sum_Consumed" in data:
-            meter["energy_real_consumed"] = {
-                "value": data["EnergyReal_WAC_Sum_Consumed"],
-                "unit": "Wh",
-            }
-        if "EnergyReal_WAC_Sum_Produced" in data:
-            meter["energy_real_produced"] = {
-                "value": data["EnergyReal_WAC_Sum_Produced"],
-                "unit": "Wh",
-            }
-        if "Frequency_Phase_Average" in data:
-            meter["frequency_phase_average"] = {
-                "value": data["Frequency_Phase_Average"],
-                "unit": "Hz",
-            }
-        if "PowerApparent_S_Phase_1" in data:
-            meter["power_apparent_phase_1"] = {
-                "value": data["PowerApparent_S_Phase_1"],
-                "unit": "W",
-            }
-        if "PowerApparent_S_Phase_2" in data:
-            meter["power_apparent_phase_2"] = {
-                "value": data["PowerApparent_S_Phase_2"],
-                "unit": "W",
-            }
-        if "PowerApparent_S_Phase_3" in data:
-            meter["power_apparent_phase_3"] = {
-                "value": data["PowerApparent_S_Phase_3"],
-                "unit": "W",
-            }
-        if "PowerApparent_S_Sum" in data:
-            meter["power_apparent"] = {
-                "value": data["PowerApparent_S_Sum"],
-                "unit": "W",
-            }
-        if "PowerFactor_Phase_1" in data:
-            meter["power_factor_phase_1"] = {
-                "value": data["PowerFactor_Phase_1"],
-                "unit": "W",
-            }
-        if "PowerFactor_Phase_2" in data:
-            meter["power_factor_phase_2"] = {
-                "value": data["PowerFactor_Phase_2"],
-                "unit": "W",
-            }
-        if "PowerFactor_Phase_3" in data:
-            meter["power_factor_phase_3"] = {
-                "value": data["PowerFactor_Phase_3"],
-                "unit": "W",
-            }
-        if "PowerFactor_Sum" in data:
-            meter["power_factor"] = {"value": data["PowerFactor_Sum"], "unit": "W"}
-        if "PowerReactive_Q_Phase_1" in data:
-            meter["power_reactive_phase_1"] = {
-                "value": data["PowerReactive_Q_Phase_1"],
-                "unit": "W",
-            }
-        if "PowerReactive_Q_Phase_2" in data:
-            meter["power_reactive_phase_2"] = {
-                "value": data["PowerReactive_Q_Phase_2"],
-                "unit": "W",
-            }
-        if "PowerReactive_Q_Phase_3" in data:
-            meter["power_reactive_phase_3"] = {
-                "value": data["PowerReactive_Q_Phase_3"],
-                "unit": "W",
-            }
-        if "PowerReactive_Q_Sum" in data:
-            meter["power_reactive"] = {
-                "value": data["PowerReactive_Q_Sum"],
-                "unit": "W",
-            }
-        if "PowerReal_P_Phase_1" in data:
-            meter["power_real_phase_1"] = {
-                "value": data["PowerReal_P_Phase_1"],
-                "unit": "W",
-            }
-        if "PowerReal_P_Phase_2" in data:
-            meter["power_real_phase_2"] = {
-                "value": data["PowerReal_P_Phase_2"],
-                "unit": "W",
-            }
-        if "PowerReal_P_Phase_3" in data:
-            meter["power_real_phase_3"] = {
-                "value": data["PowerReal_P_Phase_3"],
-                "unit": "W",
-            }
-        if "PowerReal_P_Sum" in data:
-            meter["power_real"] = {"value": data["PowerReal_P_Sum"], "unit": "W"}
-        if "Voltage_AC_Phase_1" in data:
-            meter["voltage_ac_phase_1"] = {
-                "value": data["Voltage_AC_Phase_1"],
-                "unit": "V",
-            }
-        if "Voltage_AC_Phase_2" in data:
-            meter["voltage_ac_phase_2"] = {
-                "value": data["Voltage_AC_Phase_2"],
-                "unit": "V",
-            }
-        if "Voltage_AC_Phase_3" in data:
-            meter["voltage_ac_phase_3"] = {
-                "value": data["Voltage_AC_Phase_3"],
-                "unit": "V",
-            }
-        if "Voltage_AC_PhaseToPhase_12" in data:
-            meter["voltage_ac_phase_to_phase_12"] = {
-                "value": data["Voltage_AC_PhaseToPhase_12"],
-                "unit": "V",
-            }
-        if "Voltage_AC_PhaseToPhase_23" in data:
-            meter["voltage_ac_phase_to_phase_23"] = {
-                "value": data["Voltage_AC_PhaseToPhase_23"],
-                "unit": "V",
-            }
-        if "Voltage_AC_PhaseToPhase_31" in data:
-            meter["voltage_ac_phase_to_phase_31"] = {
-                "value": data["Voltage_AC_PhaseToPhase_31"],
-                "unit": "V",
-            }
-        if "Meter_Location_Current" in data:
-            meter["meter_location"] = {"value": data["Meter_Location_Current"]}
-        if "Enable" in data:
-            meter["enable"] = {"value": data["Enable"]}
-        if "Visible" in data:
-            meter["visible"] = {"value": data["Visible"]}
+    def _details_data(data, fields, out):
         if "Details" in data:
-            meter["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            meter["model"] = {"value": data["Details"]["Model"]}
-            meter["serial"] = {"value": data["Details"]["Serial"]}
-
-        return meter
+            Fronius._convert_fields(DETAILS_FIELDS, data["Details"], fields, out)
+        else:
+            Fronius._drop_fields(DETAILS_FIELDS, out)
+        return out
 
     @staticmethod
-    def _controller_data(data):
-
-        controller = {}
-
-        if "Capacity_Maximum" in data:
-            controller["capacity_maximum"] = {
-                "value": data["Capacity_Maximum"],
-                "unit": "Ah",
-            }
-        if "DesignedCapacity" in data:
-            controller["capacity_designed"] = {
-                "value": data["DesignedCapacity"],
-                "unit": "Ah",
-            }
-        if "Current_DC" in data:
-            controller["current_dc"] = {"value": data["Current_DC"], "unit": "A"}
-        if "Voltage_DC" in data:
-            controller["voltage_dc"] = {"value": data["Voltage_DC"], "unit": "V"}
-        if "Voltage_DC_Maximum_Cell" in data:
-            controller["voltage_dc_maximum_cell"] = {
-                "value": data["Voltage_DC_Maximum_Cell"],
-                "unit": "V",
-            }
-        if "Voltage_DC_Minimum_Cell" in data:
-            controller["voltage_dc_minimum_cell"] = {
-                "value": data["Voltage_DC_Minimum_Cell"],
-                "unit": "V",
-            }
-        if "StateOfCharge_Relative" in data:
-            controller["state_of_charge"] = {
-                "value": data["StateOfCharge_Relative"],
-                "unit": "%",
-            }
-        if "Temperature_Cell" in data:
-            controller["temperature_cell"] = {
-                "value": data["Temperature_Cell"],
-                "unit": "C",
-            }
-        if "Enable" in data:
-            controller["enable"] = {"value": data["Enable"]}
-        if "Details" in data:
-            controller["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            controller["model"] = {"value": data["Details"]["Model"]}
-            controller["serial"] = {"value": data["Details"]["Serial"]}
+    def _meter_data(data, fields=None, meter=None):
 
-        return controller
+        if meter is None:
+            meter = {}
+        Fronius._convert_fields(METER_FIELDS, data, fields, meter)
+        return Fronius._details_data(data, fields, meter)
 
     @staticmethod
-    def _module_data(data):
+    def _controller_data(data, fields=None, controller=None):
 
-        module = {}
+        if controller is None:
+            controller = {}
+        Fronius._convert_fields(CONTROLLER_FIELDS, data, fields, controller)
+        return Fronius._details_data(data, fields, controller)
 
-        if "Capacity_Maximum" in data:
-            module["capacity_maximum"] = {
-                "value": data["Capacity_Maximum"],
-                "unit": "Ah",
-            }
-        if "DesignedCapacity" in data:
-            module["capacity_designed"] = {
-                "value": data["DesignedCapacity"],
-                "unit": "Ah",
-            }
-        if "Current_DC" in data:
-            module["current_dc"] = {"value": data["Current_DC"], "unit": "A"}
-        if "Voltage_DC" in data:
-            module["voltage_dc"] = {"value": data["Voltage_DC"], "unit": "V"}
-        if "Voltage_DC_Maximum_Cell" in data:
-            module["voltage_dc_maximum_cell"] = {
-                "value": data["Voltage_DC_Maximum_Cell"],
-                "unit": "V",
-            }
-        if "Voltage_DC_Minimum_Cell" in data:
-            module["voltage_dc_minimum_cell"] = {
-                "value": data["Voltage_DC_Minimum_Cell"],
-                "unit": "V",
-            }
-        if "StateOfCharge_Relative" in data:
-            module["state_of_charge"] = {
-                "value": data["StateOfCharge_Relative"],
-                "unit": "%",
-            }
-        if "Temperature_Cell" in data:
-            module["temperature_cell"] = {
-                "value": data["Temperature_Cell"],
-                "unit": "C",
-            }
-        if "Temperature_Cell_Maximum" in data:
-            module["temperature_cell_maximum"] = {
-                "value": data["Temperature_Cell_Maximum"],
-                "unit": "C",
-            }
-        if "Temperature_Cell_Minimum" in data:
-            module["temperature_cell_minimum"] = {
-                "value": data["Temperature_Cell_Minimum"],
-                "unit": "C",
-            }
-        if "CycleCount_BatteryCell" in data:
-            module["cycle_count_cell"] = {"value": data["CycleCount_BatteryCell"]}
-        if "Status_BatteryCell" in data:
-            module["status_cell"] = {"value": data["Status_BatteryCell"]}
-        if "Enable" in data:
-            module["enable"] = {"value": data["Enable"]}
-        if "Details" in data:
-            module["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            module["model"] = {"value": data["Details"]["Model"]}
-            module["serial"] = {"value": data["Details"]["Serial"]}
+    @staticmethod
+    def _module_data(data, fields=None, module=None):
 
-        return module
+        if module is None:
+            module = {}
+        Fronius._convert_fields(MODULE_FIELDS, data, fields, module)
+        return Fronius._details_data(data, fields, module)
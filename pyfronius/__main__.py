@@ -0,0 +1,46 @@
+"""
+Command line interface of pyfronius
+
+Usage: python -m pyfronius <command> [arguments]
+
+Only the module of the command given is imported, so that i.e. --help or
+poll do not load the aiohttp server of gateway and live.
+"""
+
+import argparse
+import importlib
+import logging
+import sys
+
+# command (and module) name, help
+COMMANDS = (
+    ("gateway", "caching reverse-proxy for one datalogger"),
+    ("poll", "poll devices and stream readings as NDJSON or line protocol"),
+    ("live", "stream readings to WebSocket and Server-Sent-Events clients"),
+)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = argparse.ArgumentParser(prog="python -m pyfronius")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug output")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    # the global options take no values, the first other argument is the command
+    command = next((arg for arg in argv if not arg.startswith("-")), None)
+    for name, help in COMMANDS:
+        command_parser = subparsers.add_parser(name, help=help)
+        if name == command:
+            module = importlib.import_module("." + name, __package__)
+            module.add_arguments(command_parser)
+            command_parser.set_defaults(func=module.run)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
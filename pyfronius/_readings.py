@@ -0,0 +1,47 @@
+"""
+Flattening of the nested readings of the current_* methods
+"""
+
+import numbers
+
+
+def flatten(reading, prefix="", out=None, sep="."):
+    """
+    Flatten a reading into a dictionary of column to value, i.e.
+    {"meters": {"0": {"power_real": {"value": 1}}}} to {"meters.0.power_real": 1}.
+    Units are dropped.
+    """
+    if out is None:
+        out = {}
+    for name, entry in reading.items():
+        column = prefix + str(name)
+        if isinstance(entry, dict):
+            if "value" in entry:
+                out[column] = entry["value"]
+            else:
+                flatten(entry, column + sep, out, sep)
+        else:
+            out[column] = entry
+    return out
+
+
+def numeric_values(reading, prefix="", out=None):
+    """
+    The numeric values of a reading as (column, value) pairs, i.e.
+    {"meters": {"0": {"power_real": {"value": 1}}}} to
+    [("meters.0.power_real", 1.0)]. Other values and entries without a
+    value (i.e. "status") are dropped.
+    """
+    if out is None:
+        out = []
+    for name, entry in reading.items():
+        if not isinstance(entry, dict):
+            continue
+        column = prefix + str(name)
+        if "value" in entry:
+            value = entry["value"]
+            if isinstance(value, numbers.Real):
+                out.append((column, float(value)))
+        else:
+            numeric_values(entry, column + ".", out)
+    return out
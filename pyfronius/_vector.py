@@ -0,0 +1,159 @@
+"""
+Column operations using NumPy if available, plain Python otherwise
+
+Columns are lists of floats with NaN marking missing values. All functions
+ignore missing values and return NaN if no value is present.
+"""
+
+import heapq
+import math
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+NAN = float("nan")
+
+
+def available(use_numpy=None):
+    """
+    Whether to use NumPy, given the preference of the caller (None for auto)
+    """
+    if use_numpy is None:
+        return np is not None
+    if use_numpy and np is None:
+        raise ImportError("NumPy is required for use_numpy=True")
+    return use_numpy
+
+
+def to_float(value):
+    """
+    Convert a reading value to float, NaN for missing or invalid values
+    """
+    try:
+        return NAN if value is None else float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def column(values, use_numpy):
+    if use_numpy:
+        return np.asarray(values, dtype=float)
+    return list(values)
+
+
+def _present(values):
+    return [v for v in values if not math.isnan(v)]
+
+
+def count(values, use_numpy):
+    if use_numpy:
+        return int(np.count_nonzero(~np.isnan(values)))
+    return len(_present(values))
+
+
+def total(values, use_numpy):
+    if count(values, use_numpy) == 0:
+        return NAN
+    if use_numpy:
+        return float(np.nansum(values))
+    return math.fsum(_present(values))
+
+
+def mean(values, use_numpy):
+    n = count(values, use_numpy)
+    if n == 0:
+        return NAN
+    return total(values, use_numpy) / n
+
+
+def minimum(values, use_numpy):
+    if count(values, use_numpy) == 0:
+        return NAN
+    if use_numpy:
+        return float(np.nanmin(values))
+    return min(_present(values))
+
+
+def maximum(values, use_numpy):
+    if count(values, use_numpy) == 0:
+        return NAN
+    if use_numpy:
+        return float(np.nanmax(values))
+    return max(_present(values))
+
+
+def std(values, use_numpy):
+    n = count(values, use_numpy)
+    if n == 0:
+        return NAN
+    if use_numpy:
+        return float(np.nanstd(values))
+    avg = mean(values, use_numpy)
+    return math.sqrt(math.fsum((v - avg) ** 2 for v in _present(values)) / n)
+
+
+def quantiles(values, qs, use_numpy):
+    """
+    Quantiles (0-1) with linear interpolation between the closest ranks
+    """
+    if count(values, use_numpy) == 0:
+        return [NAN for _ in qs]
+    if use_numpy:
+        return [float(q) for q in np.nanquantile(values, list(qs))]
+    ordered = sorted(_present(values))
+    res = []
+    for q in qs:
+        pos = q * (len(ordered) - 1)
+        lower = int(math.floor(pos))
+        upper = min(lower + 1, len(ordered) - 1)
+        res.append(ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower))
+    return res
+
+
+def median(values, use_numpy):
+    return quantiles(values, (0.5,), use_numpy)[0]
+
+
+def top(values, n, use_numpy, largest=True):
+    """
+    Indices of the n largest (or smallest) present values, best first
+    """
+    if use_numpy:
+        idx = np.flatnonzero(~np.isnan(values))
+        key = -values[idx] if largest else values[idx]
+        if n < len(idx):
+            order = np.argpartition(key, n)[:n]
+            order = order[np.argsort(key[order], kind="stable")]
+        else:
+            order = np.argsort(key, kind="stable")
+        return [int(i) for i in idx[order]]
+    present = [i for i, v in enumerate(values) if not math.isnan(v)]
+    select = heapq.nlargest if largest else heapq.nsmallest
+    return select(n, present, key=lambda i: values[i])
+
+
+def outliers(values, threshold, use_numpy):
+    """
+    Indices of values whose robust z-score (deviation from the median in
+    units of the scaled median absolute deviation) exceeds the threshold.
+    If more than half of the values are equal, every other value deviates.
+    """
+    if count(values, use_numpy) < 3:
+        return []
+    med = median(values, use_numpy)
+    if use_numpy:
+        deviation = np.abs(values - med)
+    else:
+        deviation = [abs(v - med) for v in values]
+    # scale the MAD to the standard deviation of normally distributed values
+    mad = median(deviation, use_numpy) * 1.4826
+    if use_numpy:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return [int(i) for i in np.flatnonzero(deviation / mad > threshold)]
+    return [
+        i
+        for i, d in enumerate(deviation)
+        if not math.isnan(d) and (d > 0 if mad == 0 else d / mad > threshold)
+    ]
@@ -0,0 +1,128 @@
+"""
+Fleet-wide aggregation of readings
+
+Collects the readings of many sites during a polling cycle into one column
+per field and computes fleet totals, averages, quantiles and rankings on
+whole columns. Uses NumPy if installed and falls back to plain Python.
+"""
+
+from . import _vector
+
+# Fields summed up by Fronius.current_system_inverter_data
+SYSTEM_INVERTER_TOTALS = ("energy_day", "energy_total", "energy_year", "power_ac")
+
+
+class FleetAggregator:
+    """
+    Aggregates readings of many sites, one row per site and one column per
+    field. Readings are dictionaries as returned by the current_* methods
+    of Fronius, missing fields and values of None count as missing.
+    Attributes:
+        fields      Output fields to collect (i.e. "power_ac")
+        use_numpy   Whether NumPy is used for computations
+    """
+
+    def __init__(self, fields=SYSTEM_INVERTER_TOTALS, use_numpy=None):
+        self.fields = tuple(fields)
+        self.use_numpy = _vector.available(use_numpy)
+        self.sites = []
+        self._values = {field: [] for field in self.fields}
+        self._columns = None
+
+    def __len__(self):
+        return len(self.sites)
+
+    def add(self, site, reading):
+        """
+        Add the reading of a site to the current cycle
+        """
+        self.sites.append(site)
+        for field in self.fields:
+            entry = reading.get(field)
+            value = entry.get("value") if isinstance(entry, dict) else None
+            self._values[field].append(_vector.to_float(value))
+        self._columns = None
+
+    def add_inverters(self, site, reading):
+        """
+        Add every inverter of a system inverter reading as own row,
+        identified by (site, inverter id)
+        """
+        for inverter, data in reading.get("inverters", {}).items():
+            self.add((site, inverter), data)
+
+    def clear(self):
+        """
+        Start a new cycle
+        """
+        self.sites = []
+        self._values = {field: [] for field in self.fields}
+        self._columns = None
+
+    def column(self, field):
+        """
+        Values of a field over all sites, NaN for missing values
+        """
+        if self._columns is None:
+            self._columns = {
+                f: _vector.column(values, self.use_numpy)
+                for f, values in self._values.items()
+            }
+        return self._columns[field]
+
+    def count(self, field):
+        return _vector.count(self.column(field), self.use_numpy)
+
+    def sum(self, field):
+        return _vector.total(self.column(field), self.use_numpy)
+
+    def mean(self, field):
+        return _vector.mean(self.column(field), self.use_numpy)
+
+    def min(self, field):
+        return _vector.minimum(self.column(field), self.use_numpy)
+
+    def max(self, field):
+        return _vector.maximum(self.column(field), self.use_numpy)
+
+    def quantiles(self, field, qs=(0.5,)):
+        """
+        Quantiles (0-1) of a field, linearly interpolated
+        """
+        return _vector.quantiles(self.column(field), qs, self.use_numpy)
+
+    def top(self, field, n=10, largest=True):
+        """
+        The n sites with the largest (or smallest) values of a field
+        :return: List of tuples (site, value), best first
+        """
+        values = self.column(field)
+        return [
+            (self.sites[i], float(values[i]))
+            for i in _vector.top(values, n, self.use_numpy, largest)
+        ]
+
+    def ranks(self, field, largest=True):
+        """
+        Rank of each site for a field, starting at 1 for the best site.
+        Sites without value are not ranked.
+        """
+        ranked = self.top(field, len(self.sites), largest)
+        return {site: rank for rank, (site, _) in enumerate(ranked, 1)}
+
+    def summary(self, qs=(0.05, 0.5, 0.95)):
+        """
+        Fleet statistics of all fields
+        :return: Dictionary of field to dictionary of statistics
+        """
+        res = {}
+        for field in self.fields:
+            res[field] = {
+                "count": self.count(field),
+                "sum": self.sum(field),
+                "mean": self.mean(field),
+                "min": self.min(field),
+                "max": self.max(field),
+                "quantiles": dict(zip(qs, self.quantiles(field, qs))),
+            }
+        return res
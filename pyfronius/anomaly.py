@@ -0,0 +1,241 @@
+"""
+Streaming anomaly detection across inverters
+
+Compares every inverter with its peers (the other inverters of its site or
+of the whole fleet) each polling cycle and keeps an exponentially weighted
+baseline per inverter. Inverters persistently producing well below the
+median of their peers and inverters suddenly dropping while their peers
+do not are reported. The state is constant per inverter and each cycle is
+scored on whole columns, using NumPy if installed.
+"""
+
+import collections
+import enum
+import math
+
+from . import _vector
+
+
+class ANOMALY(enum.Enum):
+    # smoothed power relative to the peers is below the threshold
+    UNDERPERFORMANCE = "underperformance"
+    # power dropped below its baseline while the peers did not
+    SUDDEN_DROP = "sudden_drop"
+
+
+Anomaly = collections.namedtuple(
+    "Anomaly", ["site", "inverter", "kind", "power", "reference", "ratio"]
+)
+
+
+def samples_from_system(site, reading):
+    """
+    Samples (site, inverter, power) of a reading of
+    Fronius.current_system_inverter_data
+    """
+    return [
+        (site, inverter, data.get("power_ac", {}).get("value"))
+        for inverter, data in reading.get("inverters", {}).items()
+    ]
+
+
+def samples_from_devices(site, readings, dc=False):
+    """
+    Samples (site, inverter, power) of readings of
+    Fronius.current_inverter_data
+    :param readings: Dictionary of inverter id to reading
+    :param dc: Use the DC power (voltage_dc * current_dc) if available,
+        which reflects string failures before the AC side does
+    """
+    samples = []
+    for inverter, reading in readings.items():
+        power = reading.get("power_ac", {}).get("value")
+        if dc:
+            voltage = reading.get("voltage_dc", {}).get("value")
+            current = reading.get("current_dc", {}).get("value")
+            if voltage is not None and current is not None:
+                power = voltage * current
+        samples.append((site, inverter, power))
+    return samples
+
+
+class InverterAnomalyDetector:
+    """
+    Detects underperforming inverters by comparison with their peers
+    Attributes:
+        scope       "site" to compare with the inverters of the same site,
+                    "fleet" to compare with all inverters of a cycle
+        alpha       Smoothing factor of the per inverter baselines
+        underperformance    Smoothed ratio to the peer median below which
+                    an inverter is reported
+        drop        Ratio to its baseline power below which a drop is
+                    reported, if its peers did not drop as well
+        min_power   Peer median (W) below which a cycle is not scored,
+                    i.e. at night
+        warmup      Scored cycles before an inverter is reported
+        use_numpy   Whether NumPy is used for computations
+    """
+
+    def __init__(
+        self,
+        scope="site",
+        alpha=0.1,
+        underperformance=0.8,
+        drop=0.5,
+        min_power=100,
+        warmup=5,
+        use_numpy=None,
+    ):
+        if scope not in ("site", "fleet"):
+            raise ValueError("scope must be 'site' or 'fleet'")
+        self.scope = scope
+        self.alpha = alpha
+        self.underperformance = underperformance
+        self.drop = drop
+        self.min_power = min_power
+        self.warmup = warmup
+        self.use_numpy = _vector.available(use_numpy)
+        self._slots = {}
+        self._ratio = []
+        self._power = []
+        self._count = []
+
+    def baseline(self, site, inverter):
+        """
+        Smoothed (ratio to peers, power) of an inverter, None if unknown
+        """
+        slot = self._slots.get((site, inverter))
+        if slot is None:
+            return None
+        return float(self._ratio[slot]), float(self._power[slot])
+
+    def _slot(self, key):
+        slot = self._slots.get(key)
+        if slot is None:
+            slot = self._slots[key] = len(self._slots)
+            if self.use_numpy:
+                if slot >= len(self._ratio):
+                    # grow the state columns geometrically
+                    size = max(2 * len(self._ratio), 16)
+                    self._ratio = _grow(self._ratio, size, _vector.NAN)
+                    self._power = _grow(self._power, size, _vector.NAN)
+                    self._count = _grow(self._count, size, 0)
+            else:
+                self._ratio.append(_vector.NAN)
+                self._power.append(_vector.NAN)
+                self._count.append(0)
+        return slot
+
+    def _references(self, sites, powers):
+        """
+        Median power of the peers of each sample
+        """
+        if self.scope == "fleet":
+            med = _vector.median(_vector.column(powers, self.use_numpy), self.use_numpy)
+            return [med] * len(powers)
+        groups = {}
+        for index, site in enumerate(sites):
+            groups.setdefault(site, []).append(index)
+        references = [_vector.NAN] * len(powers)
+        for indices in groups.values():
+            med = _vector.median(
+                _vector.column([powers[i] for i in indices], self.use_numpy),
+                self.use_numpy,
+            )
+            for i in indices:
+                references[i] = med
+        return references
+
+    def update(self, samples):
+        """
+        Score one cycle and update the baselines
+        :param samples: Iterable of tuples (site, inverter, power in W)
+        :return: List of Anomaly found in this cycle
+        """
+        samples = list(samples)
+        if not samples:
+            return []
+        sites = [s[0] for s in samples]
+        powers = [_vector.to_float(s[2]) for s in samples]
+        slots = [self._slot((s[0], s[1])) for s in samples]
+        references = self._references(sites, powers)
+        if self.use_numpy:
+            flags = self._score_numpy(slots, powers, references)
+        else:
+            flags = self._score_python(slots, powers, references)
+        return [
+            Anomaly(
+                samples[i][0],
+                samples[i][1],
+                kind,
+                powers[i],
+                references[i],
+                powers[i] / references[i],
+            )
+            for i, kind in flags
+        ]
+
+    def _score_numpy(self, slots, powers, references):
+        np = _vector.np
+        slots = np.asarray(slots)
+        power = np.asarray(powers, dtype=float)
+        reference = np.asarray(references, dtype=float)
+        valid = ~np.isnan(power) & (reference >= self.min_power)
+        ratio = np.where(valid, power / np.where(valid, reference, 1), np.nan)
+
+        prev_ratio = self._ratio[slots]
+        prev_power = self._power[slots]
+        count = self._count[slots] + valid
+        new_ratio = np.where(
+            np.isnan(prev_ratio), ratio, prev_ratio + self.alpha * (ratio - prev_ratio)
+        )
+        new_power = np.where(
+            np.isnan(prev_power), power, prev_power + self.alpha * (power - prev_power)
+        )
+        self._ratio[slots] = np.where(valid, new_ratio, prev_ratio)
+        self._power[slots] = np.where(valid, new_power, prev_power)
+        self._count[slots] = count
+
+        ready = valid & (count > self.warmup)
+        with np.errstate(invalid="ignore"):
+            under = ready & (new_ratio < self.underperformance)
+            drop = (
+                ready
+                & (power < prev_power * self.drop)
+                & (ratio < self.underperformance)
+            )
+        flags = [(int(i), ANOMALY.SUDDEN_DROP) for i in np.flatnonzero(drop)]
+        flags += [
+            (int(i), ANOMALY.UNDERPERFORMANCE) for i in np.flatnonzero(under & ~drop)
+        ]
+        return sorted(flags, key=lambda flag: flag[0])
+
+    def _score_python(self, slots, powers, references):
+        flags = []
+        for i, slot in enumerate(slots):
+            power, reference = powers[i], references[i]
+            if math.isnan(power) or not reference >= self.min_power:
+                continue
+            ratio = power / reference
+            prev_ratio, prev_power = self._ratio[slot], self._power[slot]
+            if math.isnan(prev_ratio):
+                new_ratio, new_power = ratio, power
+            else:
+                new_ratio = prev_ratio + self.alpha * (ratio - prev_ratio)
+                new_power = prev_power + self.alpha * (power - prev_power)
+            self._ratio[slot], self._power[slot] = new_ratio, new_power
+            self._count[slot] += 1
+            if self._count[slot] <= self.warmup:
+                continue
+            if power < prev_power * self.drop and ratio < self.underperformance:
+                flags.append((i, ANOMALY.SUDDEN_DROP))
+            elif new_ratio < self.underperformance:
+                flags.append((i, ANOMALY.UNDERPERFORMANCE))
+        return flags
+
+
+def _grow(column, size, fill):
+    np = _vector.np
+    grown = np.full(size, fill, dtype=float if isinstance(fill, float) else int)
+    grown[: len(column)] = column
+    return grown
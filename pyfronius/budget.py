@@ -0,0 +1,189 @@
+"""
+Request budget for Fronius dataloggers
+
+Dataloggers tolerate only a small request rate. RequestBudget grants
+requests per host from a token bucket, so that the control loop,
+dashboards and backfill jobs sharing a datalogger together stay within its
+rate. Waiting requests are granted by priority class, so that control
+requests overtake queued bulk requests.
+
+    budget = RequestBudget(rate=2, burst=4)
+    control = Fronius(session, url, budget=budget, priority=Priority.CONTROL)
+    backfill = Fronius(session, url, budget=budget, priority=Priority.BULK)
+"""
+
+import collections
+import enum
+import math
+import time
+
+
+class Priority(enum.IntEnum):
+    """
+    Priority classes of requests, lower values are granted first
+    """
+
+    CONTROL = 0
+    INTERACTIVE = 1
+    BULK = 2
+
+
+class _Host:
+    def __init__(self, burst, window):
+        self.tokens = burst
+        self.stamp = time.monotonic()
+        self.queues = {priority: collections.deque() for priority in Priority}
+        self.waits = {
+            priority: collections.deque(maxlen=window) for priority in Priority
+        }
+        self.granted = dict.fromkeys(Priority, 0)
+        self.timer = None
+
+
+class RequestBudget:
+    """
+    Token bucket per host with prioritized waiting requests.
+    A single budget may be shared among several Fronius instances, hosts are
+    identified by the url of the device.
+    Attributes:
+        rate    Requests per second granted per host in the long run
+        burst   Number of requests granted at once after a quiet period
+        window  Number of latest wait times kept per host and priority
+    """
+
+    def __init__(self, rate=1.0, burst=1, window=100):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self.window = window
+        self._hosts = {}
+
+    def _host(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _Host(self.burst, self.window)
+        return state
+
+    def _refill(self, state):
+        now = time.monotonic()
+        state.tokens = min(state.tokens + (now - state.stamp) * self.rate, self.burst)
+        state.stamp = now
+
+    async def acquire(self, host, priority=None):
+        """
+        Wait until a request to a host is granted
+        :param priority: Priority class of the request, INTERACTIVE if None
+        """
+        import asyncio
+
+        priority = Priority.INTERACTIVE if priority is None else Priority(priority)
+        state = self._host(host)
+        self._refill(state)
+        if state.tokens >= 1 and not any(state.queues.values()):
+            state.tokens -= 1
+            self._granted(state, priority, 0.0)
+            return
+        future = asyncio.get_event_loop().create_future()
+        entry = (future, time.monotonic())
+        state.queues[priority].append(entry)
+        self._dispatch(state)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                # not granted yet, leave the queue
+                try:
+                    state.queues[priority].remove(entry)
+                except ValueError:
+                    pass
+            else:
+                # granted but abandoned, hand the token back
+                state.tokens += 1
+                self._dispatch(state)
+            raise
+
+    def _granted(self, state, priority, wait):
+        state.granted[priority] += 1
+        state.waits[priority].append(wait)
+
+    def _dispatch(self, state):
+        """
+        Grant the waiting requests the tokens allow, highest priority first,
+        and schedule the next dispatch if requests remain
+        """
+        import asyncio
+
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        self._refill(state)
+        now = time.monotonic()
+        for priority in Priority:
+            queue = state.queues[priority]
+            while queue and state.tokens >= 1:
+                future, start = queue.popleft()
+                if future.done():
+                    continue
+                future.set_result(None)
+                state.tokens -= 1
+                self._granted(state, priority, now - start)
+        if any(state.queues.values()):
+            delay = (1 - state.tokens) / self.rate
+            state.timer = asyncio.get_event_loop().call_later(
+                delay, self._dispatch, state
+            )
+
+    def queue_depth(self, host=None, priority=None):
+        """
+        Number of requests waiting, for one or all hosts and priorities
+        """
+        hosts = self._hosts.values() if host is None else [self._host(host)]
+        priorities = Priority if priority is None else [Priority(priority)]
+        return sum(len(state.queues[p]) for state in hosts for p in priorities)
+
+    def granted(self, host, priority=None):
+        """
+        Number of requests to a host granted so far
+        """
+        state = self._host(host)
+        if priority is None:
+            return sum(state.granted.values())
+        return state.granted[Priority(priority)]
+
+    def mean_wait(self, host, priority):
+        """
+        Mean of the latest wait times in seconds, None if unknown
+        """
+        waits = self._host(host).waits[Priority(priority)]
+        if not waits:
+            return None
+        return sum(waits) / len(waits)
+
+    def wait_percentile(self, host, priority, percentile=95):
+        """
+        Percentile of the latest wait times in seconds, None if unknown
+        """
+        waits = self._host(host).waits[Priority(priority)]
+        if not waits:
+            return None
+        ordered = sorted(waits)
+        rank = max(int(math.ceil(percentile / 100 * len(ordered))), 1)
+        return ordered[rank - 1]
+
+    def stats(self, host):
+        """
+        Queue depth, granted requests and wait times of a host per priority
+        :return: Dictionary of priority name to dictionary of the values
+        """
+        return {
+            priority.name.lower(): {
+                "queued": self.queue_depth(host, priority),
+                "granted": self.granted(host, priority),
+                "mean_wait": self.mean_wait(host, priority),
+                "max_wait": self.wait_percentile(host, priority, 100),
+            }
+            for priority in Priority
+        }
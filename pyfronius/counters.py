@@ -0,0 +1,210 @@
+"""
+Delta tracking of monotonic energy counters
+
+Turns counter readings (i.e. energy_real_consumed of a meter) into clean
+deltas. Counter resets from device replacements or restarts and implausible
+jumps are detected instead of showing up as spikes. The last known counter
+values are kept in a small SQLite file, so a restarted process resumes
+without recomputing anything.
+"""
+
+import collections
+import enum
+import logging
+import sqlite3
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Monotonic counters of meter, inverter and power flow readings.
+# energy_day and energy_year restart at every day and year by design and
+# would show up as RESET, they are left out.
+COUNTER_FIELDS = (
+    "energy_real_consumed",
+    "energy_real_produced",
+    "energy_real_ac_plus",
+    "energy_real_ac_minus",
+    "energy_reactive_ac_consumed",
+    "energy_reactive_ac_produced",
+    "energy_total",
+)
+
+
+class DELTA_KIND(enum.Enum):
+    # first value of a counter, no delta available
+    INITIAL = "initial"
+    # regular increase (or no change)
+    NORMAL = "normal"
+    # counter decreased, i.e. device replaced or reset
+    RESET = "reset"
+    # counter increased implausibly fast
+    JUMP = "jump"
+
+
+Delta = collections.namedtuple("Delta", ["value", "kind"])
+
+
+def device_key(reading, default=None):
+    """
+    Identify the device of a reading by manufacturer, model and serial
+    :param default: Key to use if the reading carries no serial
+    """
+    serial = reading.get("serial", {}).get("value")
+    if not serial:
+        if default is None:
+            raise ValueError("Reading without serial, a default key is required")
+        return str(default)
+    return "/".join(
+        str(reading.get(field, {}).get("value", ""))
+        for field in ("manufacturer", "model", "serial")
+    )
+
+
+class CounterTracker:
+    """
+    Tracks monotonic counters per device and emits deltas
+    Attributes:
+        path        SQLite file for the last known values, None to keep
+                    them in memory only
+        max_rate    Highest plausible increase per second, faster increases
+                    are reported as JUMP without delta (None to disable)
+        max_jump    Highest plausible increase between two readings,
+                    larger ones are reported as JUMP without delta. After a
+                    reset, a new value up to max_jump counts as delta.
+        commit_every    Number of changed counters after which the state is
+                    written
+        commit_interval Seconds after which changed counters are written,
+                    None to write by count only. A crash loses at most the
+                    updates of this interval or commit_every counters.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        max_rate=None,
+        max_jump=None,
+        commit_every=100,
+        commit_interval=60.0,
+    ):
+        self.path = path
+        self.max_rate = max_rate
+        self.max_jump = max_jump
+        self.commit_every = commit_every
+        self.commit_interval = commit_interval
+        self._committed = time.monotonic()
+        self._state = {}
+        self._dirty = set()
+        self._db = None
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS counters ("
+                "device TEXT, counter TEXT, value REAL, timestamp REAL, "
+                "PRIMARY KEY (device, counter))"
+            )
+            for device, counter, value, timestamp in self._db.execute(
+                "SELECT device, counter, value, timestamp FROM counters"
+            ):
+                self._state[(device, counter)] = (value, timestamp)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def last(self, device, counter):
+        """
+        Last known (value, timestamp) of a counter, None if unknown
+        """
+        return self._state.get((device, counter))
+
+    def update(self, device, counter, value, timestamp=None):
+        """
+        Feed the next value of a counter
+        :param timestamp: Time of the value in seconds since the epoch,
+            now if omitted
+        :return: Delta with the increase since the last value (None if not
+            available) and its kind
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        key = (device, counter)
+        last = self._state.get(key)
+        self._state[key] = (value, timestamp)
+        self._dirty.add(key)
+        if len(self._dirty) >= self.commit_every or (
+            self.commit_interval is not None
+            and time.monotonic() - self._committed >= self.commit_interval
+        ):
+            self.flush()
+
+        if last is None:
+            return Delta(None, DELTA_KIND.INITIAL)
+        diff = value - last[0]
+        if diff < 0:
+            _LOGGER.info(
+                "Counter %s of %s reset from %s to %s", counter, device, last[0], value
+            )
+            if self.max_jump is not None and value <= self.max_jump:
+                return Delta(value, DELTA_KIND.RESET)
+            return Delta(0, DELTA_KIND.RESET)
+        dt = timestamp - last[1]
+        if (self.max_jump is not None and diff > self.max_jump) or (
+            self.max_rate is not None and diff > self.max_rate * max(dt, 0)
+        ):
+            _LOGGER.info(
+                "Counter %s of %s jumped from %s to %s", counter, device, last[0], value
+            )
+            return Delta(None, DELTA_KIND.JUMP)
+        return Delta(diff, DELTA_KIND.NORMAL)
+
+    def track(self, reading, device=None, counters=COUNTER_FIELDS, timestamp=None):
+        """
+        Feed all counters present in a device reading (i.e. from
+        Fronius.current_meter_data or a meter of current_system_meter_data)
+        :param device: Key of the device if the reading carries no serial
+        :return: Dictionary of counter to Delta
+        """
+        key = device_key(reading, device)
+        res = {}
+        for counter in counters:
+            entry = reading.get(counter)
+            if entry is None or entry.get("value") is None:
+                continue
+            res[counter] = self.update(key, counter, entry["value"], timestamp)
+        return res
+
+    def track_system_meters(self, reading, prefix="meter", timestamp=None):
+        """
+        Feed the counters of all meters of a system meter reading. Meters
+        without serial are identified by prefix and meter id.
+        :return: Dictionary of meter id to dictionary of counter to Delta
+        """
+        return {
+            meter: self.track(data, "{}/{}".format(prefix, meter), timestamp=timestamp)
+            for meter, data in reading.get("meters", {}).items()
+        }
+
+    def flush(self):
+        """
+        Write the changed counter values to the SQLite file
+        """
+        self._committed = time.monotonic()
+        if self._db is None or not self._dirty:
+            self._dirty.clear()
+            return
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO counters VALUES (?, ?, ?, ?)",
+                [key + self._state[key] for key in self._dirty],
+            )
+        self._dirty.clear()
+
+    def close(self):
+        self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
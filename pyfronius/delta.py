@@ -0,0 +1,132 @@
+"""
+Change-only output of successive readings
+
+Most fields of a reading (i.e. meter_location, model, serial) never change.
+DeltaFilter passes on only the fields that changed by more than a per-field
+deadband since they were last emitted, plus a full keyframe now and then so
+that consumers can recover from lost messages. Fields that are no longer
+in a reading are emitted as None. The changes are copies, they do not
+change along with readings updated in place.
+
+    delta = DeltaFilter({"power_grid": 5})
+    async for key, reading in fronius.fetch_as_completed():
+        changes, keyframe = delta.filter(key, reading)
+"""
+
+import numbers
+import time
+
+# Entries emitted along with any change, not checked for changes themselves
+CONTEXT_FIELDS = frozenset(["timestamp", "sequence"])
+
+
+def _is_leaf(entry):
+    return not any(isinstance(v, dict) for v in entry.values())
+
+
+class DeltaFilter:
+    """
+    Filters successive readings of several streams down to their changes
+    Attributes:
+        deadbands   Dictionary of field name to the absolute change of its
+                    value that is suppressed
+        default_deadband    Deadband of fields not in deadbands
+        keyframe_interval   Seconds after which a full reading is emitted,
+                    None to emit a full reading only for the first one
+    """
+
+    def __init__(self, deadbands=None, default_deadband=0, keyframe_interval=300):
+        self.deadbands = dict(deadbands or {})
+        self.default_deadband = default_deadband
+        self.keyframe_interval = keyframe_interval
+        self._emitted = {}
+        self._keyframes = {}
+
+    def reset(self, key=None):
+        """
+        Forget the emitted state of one or all streams, so the next reading
+        is emitted in full
+        """
+        if key is None:
+            self._emitted.clear()
+            self._keyframes.clear()
+        else:
+            self._emitted.pop(key, None)
+            self._keyframes.pop(key, None)
+
+    def _changed(self, name, entry, last):
+        if last is None:
+            return True
+        value, last_value = entry.get("value"), last.get("value")
+        if (
+            isinstance(value, numbers.Real)
+            and isinstance(last_value, numbers.Real)
+            and entry.keys() == last.keys()
+        ):
+            deadband = self.deadbands.get(name, self.default_deadband)
+            return abs(value - last_value) > deadband
+        return entry != last
+
+    def _diff(self, reading, emitted, path, keyframe, seen):
+        res = {}
+        for name, entry in reading.items():
+            if not isinstance(entry, dict):
+                continue
+            entry_path = path + (name,)
+            if not _is_leaf(entry):
+                changes = self._diff(entry, emitted, entry_path, keyframe, seen)
+                if changes:
+                    res[name] = changes
+            elif name in CONTEXT_FIELDS and not path:
+                continue
+            else:
+                seen.add(entry_path)
+                if keyframe or self._changed(name, entry, emitted.get(entry_path)):
+                    # copy, readings may be updated in place
+                    res[name] = emitted[entry_path] = dict(entry)
+        return res
+
+    @staticmethod
+    def _removed(changes, emitted, seen):
+        """
+        Mark the emitted fields missing from the reading as None
+        """
+        for entry_path in [p for p in emitted if p not in seen]:
+            del emitted[entry_path]
+            res = changes
+            for name in entry_path[:-1]:
+                res = res.setdefault(name, {})
+            res[entry_path[-1]] = None
+
+    def filter(self, key, reading, now=None):
+        """
+        Reduce a reading to the fields that changed since last emitted
+        :param key: Identifies the stream of readings, i.e. the key yielded
+            by Fronius.fetch_as_completed
+        :param now: Current time in seconds, time.monotonic() if omitted
+        :return: Tuple of the changes in the nested structure of the
+            reading (empty if nothing changed, None for removed fields) and
+            whether the changes are a full keyframe
+        """
+        if now is None:
+            now = time.monotonic()
+        last_keyframe = self._keyframes.get(key)
+        keyframe = last_keyframe is None or (
+            self.keyframe_interval is not None
+            and now - last_keyframe >= self.keyframe_interval
+        )
+        if keyframe:
+            self._keyframes[key] = now
+            emitted = self._emitted[key] = {}
+        else:
+            emitted = self._emitted[key]
+        seen = set()
+        changes = self._diff(reading, emitted, (), keyframe, seen)
+        if len(seen) != len(emitted):
+            self._removed(changes, emitted, seen)
+        if changes:
+            for name in CONTEXT_FIELDS:
+                if name in reading:
+                    entry = reading[name]
+                    changes[name] = dict(entry) if isinstance(entry, dict) else entry
+        return changes, keyframe
@@ -0,0 +1,109 @@
+"""
+Discovery of Fronius dataloggers in the local network
+
+Probes a range of hosts concurrently for the Fronius solar_api and reports
+the hosts that answered together with their API version.
+"""
+
+import asyncio
+import ipaddress
+import logging
+
+from . import API_VERSION, URL_SYSTEM_INVERTER, Fronius
+from .session import create_session
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 256
+DEFAULT_PROBE_TIMEOUT = 2.0
+
+
+def _expand_hosts(targets):
+    """
+    Expand a CIDR range, a single host or an iterable of both into hosts
+    """
+    if isinstance(targets, str):
+        targets = [targets]
+    for target in targets:
+        try:
+            network = ipaddress.ip_network(target, strict=False)
+        except ValueError:
+            # host name, possibly with port
+            yield target
+            continue
+        if network.num_addresses == 1:
+            addresses = [network.network_address]
+        else:
+            addresses = network.hosts()
+        for address in addresses:
+            if address.version == 6:
+                yield "[{}]".format(address)
+            else:
+                yield str(address)
+
+
+async def probe(session, url, timeout=DEFAULT_PROBE_TIMEOUT):
+    """
+    Probe a single url for a Fronius device
+    :return: Dictionary with host url, API version and base url of the
+        device, None if no Fronius device answered
+    """
+    fronius = Fronius(session, url)
+    try:
+        api_version, base_url = await asyncio.wait_for(
+            fronius.fetch_api_version(), timeout
+        )
+        if api_version == API_VERSION.V0:
+            # Any web server replying 404 looks like API version 0,
+            # so make sure the host actually speaks the solar_api
+            fronius.api_version, fronius.base_url = api_version, base_url
+            res = await asyncio.wait_for(
+                fronius._fetch_solar_api(URL_SYSTEM_INVERTER, "system inverter"),
+                timeout,
+            )
+            if not isinstance(res, dict) or "Head" not in res:
+                return None
+    except (ConnectionError, ValueError, KeyError, TypeError, asyncio.TimeoutError):
+        return None
+    _LOGGER.debug("Found Fronius device at %s", url)
+    return {"url": url, "api_version": api_version, "base_url": base_url}
+
+
+async def discover(
+    targets,
+    session=None,
+    scheme="http",
+    concurrency=DEFAULT_CONCURRENCY,
+    timeout=DEFAULT_PROBE_TIMEOUT,
+):
+    """
+    Discover Fronius devices among the given hosts
+    :param targets: CIDR range (i.e. "192.168.0.0/22"), host name or an
+        iterable of those. Host names may include a port.
+    :param session: AIO session to use, a tuned one is created if omitted
+    :param scheme: Scheme of the probed urls
+    :param concurrency: Maximum number of hosts probed at the same time
+    :param timeout: Seconds to wait for a single host to answer
+    :return: List of dictionaries with "host", "url", "api_version" and
+        "base_url" of the found devices, in the order of the targets
+    """
+    if session is None:
+        async with create_session(
+            limit=concurrency, limit_per_host=1, timeout=None
+        ) as session:
+            return await discover(targets, session, scheme, concurrency, timeout)
+
+    hosts = enumerate(_expand_hosts(targets))
+    found = []
+
+    async def worker():
+        # workers share one iterator, so only `concurrency` probes are pending
+        for index, host in hosts:
+            url = "{}://{}".format(scheme, host)
+            res = await probe(session, url, timeout)
+            if res is not None:
+                res["host"] = host
+                found.append((index, res))
+
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return [res for _, res in sorted(found, key=lambda item: item[0])]
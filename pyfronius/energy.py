@@ -0,0 +1,207 @@
+"""
+Energy flow derived from successive power flow readings
+
+The datalogger reports instantaneous power and instantaneous relative
+autonomy and self consumption only. PowerFlowIntegrator integrates the
+power of successive readings to energy and derives autonomy and self
+consumption over days and months, in constant time per reading and
+without keeping the readings.
+"""
+
+import collections
+import datetime
+
+# Energy counters, all in Wh and non-negative
+ENERGY_FIELDS = (
+    "grid_import",
+    "grid_export",
+    "battery_discharge",
+    "battery_charge",
+    "pv_production",
+    "load_consumption",
+)
+
+
+def _split_trapezoid(p0, p1, dt):
+    """
+    Integrate power changing linearly from p0 to p1 over dt seconds
+    :return: Tuple of positive and negative part (both non-negative) in Ws
+    """
+    if p0 >= 0 and p1 >= 0:
+        return (p0 + p1) / 2 * dt, 0.0
+    if p0 <= 0 and p1 <= 0:
+        return 0.0, -(p0 + p1) / 2 * dt
+    # the power crosses zero after t0 seconds
+    t0 = dt * p0 / (p0 - p1)
+    if p0 > 0:
+        return p0 * t0 / 2, -p1 * (dt - t0) / 2
+    return p1 * (dt - t0) / 2, -p0 * t0 / 2
+
+
+_TIMESTAMP_FORMATS = (
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S.%f%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+)
+
+
+def _power(reading, field):
+    entry = reading.get(field)
+    if entry is None or entry.get("value") is None:
+        return 0.0
+    return float(entry["value"])
+
+
+def _parse_timestamp(reading):
+    try:
+        value = reading["timestamp"]["value"]
+    except (KeyError, TypeError):
+        raise ValueError("Reading without timestamp")
+    if isinstance(value, datetime.datetime):
+        return value
+    # strptime before Python 3.7 does not accept "+hh:mm" or "Z" for %z
+    if value.endswith("Z"):
+        value = value[:-1] + "+0000"
+    elif len(value) > 6 and value[-6] in "+-" and value[-3] == ":":
+        value = value[:-3] + value[-2:]
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise ValueError("Invalid timestamp {}".format(value))
+
+
+def _derived(totals):
+    """
+    Add relative autonomy and self consumption (in %) to energy totals
+    """
+    res = dict(totals)
+    load, pv = totals["load_consumption"], totals["pv_production"]
+    res["relative_autonomy"] = (
+        min(max((load - totals["grid_import"]) / load * 100, 0.0), 100.0)
+        if load > 0
+        else None
+    )
+    res["relative_self_consumption"] = (
+        min(max((pv - totals["grid_export"]) / pv * 100, 0.0), 100.0)
+        if pv > 0
+        else None
+    )
+    return res
+
+
+class PowerFlowIntegrator:
+    """
+    Integrates power flow readings (as returned by
+    Fronius.current_power_flow) to energy per day and month.
+    Power is integrated with the trapezoidal rule, splitting intervals in
+    which the grid or battery power changes sign. Intervals longer than
+    max_gap seconds are not integrated, the integration resumes with the
+    next reading. Each interval is accounted to the day and month of its
+    closing reading, in the time zone of the datalogger timestamps.
+    Attributes:
+        max_gap         Longest interval in seconds to integrate
+        retain_days     Number of days whose totals are kept
+        retain_months   Number of months whose totals are kept
+        gaps            Number of intervals skipped for exceeding max_gap
+    """
+
+    def __init__(self, max_gap=300, retain_days=31, retain_months=24):
+        self.max_gap = max_gap
+        self.retain_days = retain_days
+        self.retain_months = retain_months
+        self.gaps = 0
+        self._last = None
+        self._days = collections.OrderedDict()
+        self._months = collections.OrderedDict()
+
+    @staticmethod
+    def _period(periods, key, retain):
+        totals = periods.get(key)
+        if totals is None:
+            totals = periods[key] = dict.fromkeys(ENERGY_FIELDS, 0.0)
+            while len(periods) > retain:
+                periods.popitem(last=False)
+        return totals
+
+    def update(self, reading):
+        """
+        Integrate the next power flow reading
+        :return: Dictionary of the energy (Wh) of the interval since the
+            previous reading, None if nothing was integrated
+        """
+        timestamp = _parse_timestamp(reading)
+        sample = (
+            timestamp,
+            _power(reading, "power_grid"),
+            _power(reading, "power_battery"),
+            _power(reading, "power_photovoltaics"),
+            # the datalogger reports consumption as negative load
+            -_power(reading, "power_load"),
+        )
+        last, self._last = self._last, sample
+        if last is None:
+            return None
+        dt = (timestamp - last[0]).total_seconds()
+        if dt <= 0:
+            # repeated or out-of-order reading
+            self._last = last
+            return None
+        if dt > self.max_gap:
+            self.gaps += 1
+            return None
+
+        grid_import, grid_export = _split_trapezoid(last[1], sample[1], dt)
+        discharge, charge = _split_trapezoid(last[2], sample[2], dt)
+        pv, _ = _split_trapezoid(last[3], sample[3], dt)
+        load, _ = _split_trapezoid(last[4], sample[4], dt)
+        interval = {
+            "grid_import": grid_import / 3600,
+            "grid_export": grid_export / 3600,
+            "battery_discharge": discharge / 3600,
+            "battery_charge": charge / 3600,
+            "pv_production": pv / 3600,
+            "load_consumption": load / 3600,
+        }
+
+        day = self._period(self._days, timestamp.date().isoformat(), self.retain_days)
+        month = self._period(
+            self._months, timestamp.strftime("%Y-%m"), self.retain_months
+        )
+        for field, energy in interval.items():
+            day[field] += energy
+            month[field] += energy
+        return interval
+
+    def day(self, key=None):
+        """
+        Energy totals (Wh) and relative autonomy and self consumption (%)
+        of a day ("YYYY-MM-DD"), the current day if omitted
+        """
+        return self._totals(self._days, key)
+
+    def month(self, key=None):
+        """
+        Energy totals (Wh) and relative autonomy and self consumption (%)
+        of a month ("YYYY-MM"), the current month if omitted
+        """
+        return self._totals(self._months, key)
+
+    @staticmethod
+    def _totals(periods, key):
+        if key is None:
+            if not periods:
+                return None
+            key = next(reversed(periods))
+        totals = periods.get(key)
+        return None if totals is None else _derived(totals)
+
+    @property
+    def days(self):
+        return list(self._days)
+
+    @property
+    def months(self):
+        return list(self._months)
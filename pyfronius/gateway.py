@@ -0,0 +1,169 @@
+"""
+Caching reverse-proxy gateway for Fronius dataloggers
+
+Exposes the solar_api paths of one datalogger to many consumers. Every
+endpoint is served from a short-lived cache and concurrent cache misses are
+coalesced into a single upstream request, so the load on the datalogger
+does not grow with the number of consumers.
+"""
+
+import asyncio
+import json
+import logging
+import urllib.parse
+
+from aiohttp import web
+
+from . import Fronius
+from .session import create_session
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL = 1.0
+DEFAULT_MAX_ENTRIES = 256
+# Query parameters of the solar_api, others (i.e. cache busters) are dropped
+SOLAR_API_PARAMETERS = frozenset(
+    [
+        "Scope",
+        "DeviceId",
+        "DeviceIndex",
+        "DeviceClass",
+        "DataCollection",
+        "SeriesType",
+        "HumanReadable",
+        "StartDate",
+        "EndDate",
+        "Channel",
+    ]
+)
+
+
+def upstream_path(path, query):
+    """
+    Normalised upstream request of a client request, the cache key.
+    Only the solar_api query parameters are kept, in their given order.
+    :param query: Iterable of (name, value) pairs of the client request
+    """
+    params = {}
+    for name, value in query:
+        if name in SOLAR_API_PARAMETERS:
+            params.setdefault(name, value)
+    if not params:
+        return path
+    return "{}?{}".format(path, urllib.parse.urlencode(list(params.items())))
+
+
+class FroniusGateway:
+    """
+    Serves the solar_api of one Fronius device from a short-lived cache
+    Attributes:
+        fronius     Fronius instance of the upstream device
+        cache_ttl   Seconds a fetched reply is served from the cache
+        max_entries Number of cached paths, the oldest are evicted beyond
+        upstream_requests   Number of requests sent to the upstream device
+        cache_hits  Number of requests answered from the cache
+    """
+
+    def __init__(
+        self, fronius, cache_ttl=DEFAULT_CACHE_TTL, max_entries=DEFAULT_MAX_ENTRIES
+    ):
+        self.fronius = fronius
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.upstream_requests = 0
+        self.cache_hits = 0
+        self._cache = {}
+        self._inflight = {}
+
+    async def get(self, path):
+        """
+        Get the JSON encoded reply of the upstream device for a path
+        (including the query string), served from the cache if possible.
+        Raises ConnectionError or ValueError like Fronius._fetch_json.
+        """
+        loop = asyncio.get_event_loop()
+        entry = self._cache.get(path)
+        if entry is not None and entry[0] > loop.time():
+            self.cache_hits += 1
+            return entry[1]
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_upstream(path))
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        # a client disconnecting must not cancel the request of the others
+        return await asyncio.shield(future)
+
+    async def _fetch_upstream(self, path):
+        self.upstream_requests += 1
+        res = await self.fronius._fetch_json("{}{}".format(self.fronius.url, path))
+        body = json.dumps(res).encode("utf-8")
+        now = asyncio.get_event_loop().time()
+        for key in [k for k, v in self._cache.items() if v[0] <= now]:
+            del self._cache[key]
+        self._cache.pop(path, None)
+        while len(self._cache) >= self.max_entries:
+            # the oldest entry expires first
+            del self._cache[next(iter(self._cache))]
+        self._cache[path] = (now + self.cache_ttl, body)
+        return body
+
+    async def handle(self, request):
+        try:
+            body = await self.get(
+                upstream_path(request.rel_url.raw_path, request.rel_url.query.items())
+            )
+        except ValueError:
+            # Hosts with API version 0 reply 404 with non-JSON content,
+            # clients rely on that for version detection
+            raise web.HTTPNotFound()
+        except ConnectionError as e:
+            _LOGGER.warning("Upstream request failed: %r", e)
+            raise web.HTTPBadGateway()
+        return web.Response(body=body, content_type="application/json")
+
+    def make_app(self):
+        """
+        Create the aiohttp web application serving the solar_api paths
+        """
+        app = web.Application()
+        app.router.add_get("/solar_api/{tail:.*}", self.handle)
+        return app
+
+
+async def serve(url, host="0.0.0.0", port=8080, cache_ttl=DEFAULT_CACHE_TTL):
+    """
+    Serve the solar_api of the device at url until cancelled
+    """
+    async with create_session() as session:
+        gateway = FroniusGateway(Fronius(session, url), cache_ttl=cache_ttl)
+        runner = web.AppRunner(gateway.make_app())
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+            _LOGGER.info("Serving %s on %s:%s", url, host, port)
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            await runner.cleanup()
+
+
+def add_arguments(parser):
+    parser.add_argument("url", help="url of the Fronius device, i.e. http://10.0.0.5")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_CACHE_TTL,
+        help="seconds to serve a reply from the cache",
+    )
+
+
+def run(args):
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(serve(args.url, args.host, args.port, args.cache_ttl))
+    except KeyboardInterrupt:
+        pass
+    return 0
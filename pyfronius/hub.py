@@ -0,0 +1,241 @@
+"""
+In-process fan-out of readings to several consumers
+
+ReadingHub passes each published reading to its subscribers by reference,
+so a reading is published once however many consumers there are. Slow
+consumers neither block the publisher nor grow unbounded queues, each
+subscriber picks a policy:
+
+    "all"       every reading, buffering at most maxsize readings and
+                dropping the oldest when full
+    "latest"    only the latest reading (conflated)
+    "sample"    at most one reading per interval seconds
+
+    hub = ReadingHub()
+    dashboard = hub.subscribe("latest")
+    asyncio.ensure_future(hub.poll(Fronius(session, url), rate=2))
+    async for item in dashboard:
+        print(item.url, item.endpoint, item.reading)
+
+Readings are shared among the subscribers and must not be modified. The
+readings of Fronius(..., persistent=True) are modified by the next update,
+so buffered items would all show the latest values; poll rejects such
+clients.
+"""
+
+import collections
+import time
+
+POLICIES = ("all", "latest", "sample")
+
+Item = collections.namedtuple(
+    "Item", ["url", "endpoint", "device", "timestamp", "reading"]
+)
+
+
+class Subscription:
+    """
+    Readings of a hub for one consumer, an async iterator of Item
+    Attributes:
+        policy      "all", "latest" or "sample"
+        maxsize     Readings buffered by the "all" policy
+        interval    Seconds between readings of the "sample" policy
+        endpoints   Endpoint names to receive (i.e. {"power_flow"}), None for
+                    all
+        offered     Number of readings published to the subscriber
+        delivered   Number of readings taken by the consumer
+        dropped     Number of readings dropped or conflated before the
+                    consumer took them
+    """
+
+    def __init__(self, hub, policy, maxsize, interval, endpoints):
+        if policy not in POLICIES:
+            raise ValueError("policy must be one of {}".format(", ".join(POLICIES)))
+        if policy == "all" and maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        if policy == "sample" and not interval:
+            raise ValueError("sample policy requires an interval")
+        self._hub = hub
+        self.policy = policy
+        self.maxsize = maxsize if policy == "all" else 1
+        self.interval = interval
+        self.endpoints = None if endpoints is None else frozenset(endpoints)
+        self.offered = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.closed = False
+        self._buffer = collections.deque()
+        self._last_sample = None
+        self._waiter = None
+
+    @property
+    def pending(self):
+        """
+        Number of readings waiting for the consumer
+        """
+        return len(self._buffer)
+
+    @property
+    def lag(self):
+        """
+        Number of readings the consumer is behind, pending or dropped
+        """
+        return self.offered - self.delivered
+
+    def _offer(self, item):
+        if self.endpoints is not None and item.endpoint not in self.endpoints:
+            return
+        if self.policy == "sample":
+            if (
+                self._last_sample is not None
+                and item.timestamp - self._last_sample < self.interval
+            ):
+                self.offered += 1
+                self.dropped += 1
+                return
+            self._last_sample = item.timestamp
+        self.offered += 1
+        if len(self._buffer) >= self.maxsize:
+            self._buffer.popleft()
+            self.dropped += 1
+        self._buffer.append(item)
+        self._wake()
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def get_nowait(self):
+        """
+        The next reading, None if there is none
+        """
+        if not self._buffer:
+            return None
+        self.delivered += 1
+        return self._buffer.popleft()
+
+    async def get(self):
+        """
+        Wait for the next reading
+        :raise StopAsyncIteration: The subscription is closed
+        """
+        import asyncio
+
+        while not self._buffer:
+            if self.closed:
+                raise StopAsyncIteration
+            self._waiter = asyncio.get_event_loop().create_future()
+            await self._waiter
+        return self.get_nowait()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+    def close(self):
+        """
+        Unsubscribe, the consumer still receives the pending readings
+        """
+        if not self.closed:
+            self.closed = True
+            self._hub._unsubscribe(self)
+            self._wake()
+
+
+class ReadingHub:
+    """
+    Publishes readings to subscriptions without copying them
+    """
+
+    def __init__(self):
+        self._subscriptions = []
+        self.published = 0
+
+    def subscribe(self, policy="all", maxsize=100, interval=None, endpoints=None):
+        """
+        Subscribe to the readings published from now on
+        :param maxsize: Readings buffered by the "all" policy
+        :param interval: Seconds between readings of the "sample" policy
+        :param endpoints: Endpoint names to receive, None for all
+        :return: Subscription
+        """
+        subscription = Subscription(self, policy, maxsize, interval, endpoints)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        try:
+            self._subscriptions.remove(subscription)
+        except ValueError:
+            pass
+
+    @property
+    def subscriptions(self):
+        return list(self._subscriptions)
+
+    def publish(self, url, endpoint, device, reading, timestamp=None):
+        """
+        Publish a reading to all subscriptions
+        :param url: Url of the device
+        :param endpoint: Name of the endpoint (i.e. "power_flow")
+        :param device: Device id of device endpoints, None for others
+        :return: The published Item
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        item = Item(url, endpoint, device, timestamp, reading)
+        self.published += 1
+        for subscription in self._subscriptions:
+            subscription._offer(item)
+        return item
+
+    def lag(self):
+        """
+        Lag counters of the subscriptions
+        :return: List of dictionaries with policy, pending, dropped and lag
+        """
+        return [
+            {
+                "policy": s.policy,
+                "pending": s.pending,
+                "dropped": s.dropped,
+                "lag": s.lag,
+            }
+            for s in self._subscriptions
+        ]
+
+    def close(self):
+        """
+        Close all subscriptions
+        """
+        for subscription in list(self._subscriptions):
+            subscription.close()
+
+    # writer interface of poll.poll_device
+    def write(self, host, key, timestamp, reading):
+        self.publish(host, key[0], key[1], reading, timestamp)
+
+    def end_cycle(self):
+        pass
+
+    async def poll(
+        self, fronius, rate=1.0, count=None, endpoints="power_flow", fields=None
+    ):
+        """
+        Poll a device at a fixed rate and publish its readings
+        :param endpoints: Comma separated endpoints, see poll.parse_endpoints
+        :param count: Number of cycles, None to poll until cancelled
+        :raise ValueError: The client keeps persistent readings
+        """
+        if fronius.persistent:
+            raise ValueError("Persistent readings cannot be published")
+        from .poll import parse_endpoints, poll_device
+
+        if not isinstance(endpoints, str):
+            endpoints = ",".join(endpoints)
+        await poll_device(
+            fronius, self, parse_endpoints(endpoints), rate, count, fields
+        )
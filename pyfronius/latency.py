@@ -0,0 +1,189 @@
+"""
+Latency tracking for requests to Fronius devices
+
+Derives per-endpoint request deadlines from the observed round-trip times,
+so that fast and slow dataloggers each get a deadline that fits them.
+LoopLagMonitor measures how long the event loop is blocked, i.e. by
+decoding large replies inline.
+"""
+
+import collections
+import math
+import time
+
+
+class LatencyTracker:
+    """
+    Tracks round-trip latency per endpoint and derives request deadlines.
+    The deadline for an endpoint is a high percentile of the latest observed
+    latencies times a safety factor, clamped to [min_timeout, max_timeout].
+    A single tracker may be shared among several Fronius instances,
+    endpoints are identified by their full url.
+    Attributes:
+        percentile      Percentile (0-100) of the observed latencies to use
+        factor          Safety factor applied to the percentile
+        window          Number of latest samples kept per endpoint
+        min_timeout     Lower bound for derived deadlines in seconds
+        max_timeout     Upper bound for derived deadlines in seconds
+        initial_timeout Deadline used for endpoints without any samples
+    """
+
+    def __init__(
+        self,
+        percentile=95,
+        factor=2.0,
+        window=50,
+        min_timeout=0.5,
+        max_timeout=30.0,
+        initial_timeout=10.0,
+    ):
+        if not 0 <= percentile <= 100:
+            raise ValueError("percentile must be within [0, 100]")
+        self.percentile = percentile
+        self.factor = factor
+        self.window = window
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.initial_timeout = initial_timeout
+        self._samples = {}
+
+    def record(self, key, latency):
+        """
+        Record an observed round-trip latency in seconds for an endpoint
+        """
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = collections.deque(maxlen=self.window)
+        samples.append(latency)
+
+    def latency_percentile(self, key, percentile=None):
+        """
+        Percentile of the observed latencies of an endpoint, None if unknown
+        """
+        samples = self._samples.get(key)
+        if not samples:
+            return None
+        if percentile is None:
+            percentile = self.percentile
+        ordered = sorted(samples)
+        # nearest-rank percentile
+        rank = max(int(math.ceil(percentile / 100 * len(ordered))), 1)
+        return ordered[rank - 1]
+
+    def timeout(self, key):
+        """
+        Deadline in seconds for the next request to an endpoint
+        """
+        latency = self.latency_percentile(key)
+        if latency is None:
+            return self.initial_timeout
+        return min(max(latency * self.factor, self.min_timeout), self.max_timeout)
+
+    def reset(self, key=None):
+        """
+        Forget the observed latencies of one or all endpoints
+        """
+        if key is None:
+            self._samples.clear()
+        else:
+            self._samples.pop(key, None)
+
+
+class LoopLagMonitor:
+    """
+    Measures the lag of the running event loop, i.e. how much later than
+    scheduled a periodic wakeup runs. Coroutines blocking the loop (such as
+    decoding and converting large replies inline) show up as lag.
+    Usable as async context manager around the code to measure.
+    Attributes:
+        interval    Seconds between two measurements
+        window      Number of latest lag samples kept
+    """
+
+    def __init__(self, interval=0.05, window=1000):
+        self.interval = interval
+        self.window = window
+        self._samples = collections.deque(maxlen=window)
+        self._maximum = 0.0
+        self._task = None
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.stop()
+
+    def start(self):
+        """
+        Start measuring on the running event loop
+        """
+        import asyncio
+
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """
+        Stop measuring, the samples are kept
+        """
+        import asyncio
+
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        import asyncio
+
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.record(max(time.monotonic() - start - self.interval, 0.0))
+
+    def record(self, lag):
+        """
+        Record an observed lag in seconds
+        """
+        self._samples.append(lag)
+        self._maximum = max(self._maximum, lag)
+
+    @property
+    def samples(self):
+        return len(self._samples)
+
+    @property
+    def maximum(self):
+        """
+        Largest lag observed since the last reset
+        """
+        return self._maximum
+
+    def mean(self):
+        """
+        Mean of the latest lag samples, None if unknown
+        """
+        if not self._samples:
+            return None
+        return sum(self._samples) / len(self._samples)
+
+    def lag_percentile(self, percentile=99):
+        """
+        Percentile of the latest lag samples, None if unknown
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = max(int(math.ceil(percentile / 100 * len(ordered))), 1)
+        return ordered[rank - 1]
+
+    def reset(self):
+        """
+        Forget the observed lag
+        """
+        self._samples.clear()
+        self._maximum = 0.0
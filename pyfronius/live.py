@@ -0,0 +1,333 @@
+"""
+Streaming of live readings to WebSocket and Server-Sent-Events clients
+
+LiveServer pushes the readings published to a ReadingHub to any number of
+clients. Each reading is serialized once, the same bytes are sent to every
+client, so the number of viewers adds neither load on the datalogger nor
+serialization work. Clients that cannot keep up are disconnected or skip
+readings, they never delay the others.
+
+    python -m pyfronius live http://10.0.0.5 --rate 1 --port 8081
+
+Clients connect to /events (Server-Sent-Events) or /ws (WebSocket, one
+binary frame of UTF-8 JSON per reading), optionally restricted to some
+endpoints with ?endpoints=power_flow,system_meter.
+"""
+
+import asyncio
+import collections
+import logging
+
+from aiohttp import web
+
+from . import Fronius
+from .hub import ReadingHub
+from .poll import DEFAULT_RATE, ReadingWriter, positive_rate
+from .session import create_session
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_MAX_PENDING = 32
+SLOW_POLICIES = ("disconnect", "skip")
+
+
+class _Client:
+    """
+    Frames waiting to be sent to one client
+    """
+
+    def __init__(self, send, sse, request, max_pending, slow_policy, endpoints):
+        self._send = send
+        self.sse = sse
+        self.peer = request.remote
+        self._transport = request.transport
+        self.max_pending = max_pending
+        self.slow_policy = slow_policy
+        self.endpoints = endpoints
+        self.frames = collections.deque()
+        self.sent = 0
+        self.skipped = 0
+        self.closed = False
+        self._waiter = None
+
+    def push(self, frame):
+        """
+        Queue a frame, applying the slow client policy if too many wait
+        :return: False if the client was disconnected
+        """
+        if self.closed:
+            return False
+        if len(self.frames) >= self.max_pending:
+            if self.slow_policy == "disconnect":
+                self.close(abort=True)
+                return False
+            self.frames.popleft()
+            self.skipped += 1
+        self.frames.append(frame)
+        self._wake()
+        return True
+
+    def _wake(self):
+        waiter, self._waiter = self._waiter, None
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def close(self, abort=False):
+        """
+        Stop sending, aborting the connection of a stalled client
+        """
+        self.closed = True
+        self.frames.clear()
+        if abort and self._transport is not None:
+            self._transport.abort()
+        self._wake()
+
+    async def run(self):
+        """
+        Send the queued frames until closed or the connection failed
+        """
+        try:
+            while not self.closed:
+                while self.frames:
+                    await self._send(self.frames.popleft())
+                    self.sent += 1
+                if not self.closed:
+                    self._waiter = asyncio.get_event_loop().create_future()
+                    await self._waiter
+        except (ConnectionError, RuntimeError) as e:
+            # RuntimeError is raised by aiohttp on writing to closed transports
+            _LOGGER.debug("Client connection lost: %r", e)
+            self.closed = True
+
+
+class LiveServer:
+    """
+    Pushes the readings of a hub to WebSocket and Server-Sent-Events clients
+    Attributes:
+        hub         ReadingHub the readings are published to
+        max_pending Frames waiting for a client before the slow client
+                    policy applies
+        slow_policy "disconnect" to drop slow clients, "skip" to drop their
+                    oldest frames
+        heartbeat   Seconds between WebSocket pings, None to send none
+        encoded     Number of readings serialized
+        slow_disconnects    Number of clients disconnected for being slow
+    """
+
+    def __init__(
+        self,
+        hub,
+        max_pending=DEFAULT_MAX_PENDING,
+        slow_policy="disconnect",
+        heartbeat=30.0,
+    ):
+        if slow_policy not in SLOW_POLICIES:
+            raise ValueError(
+                "slow_policy must be one of {}".format(", ".join(SLOW_POLICIES))
+            )
+        self.hub = hub
+        self.max_pending = max_pending
+        self.slow_policy = slow_policy
+        self.heartbeat = heartbeat
+        self.encoded = 0
+        self.slow_disconnects = 0
+        self._writer = ReadingWriter(None)
+        self._clients = set()
+        self._subscription = None
+        self._task = None
+
+    @property
+    def clients(self):
+        return len(self._clients)
+
+    def start(self):
+        """
+        Start forwarding the readings of the hub
+        """
+        if self._task is None:
+            # the clients apply their own policy, the hub must keep them all
+            self._subscription = self.hub.subscribe("all", maxsize=1 << 16)
+            self._task = asyncio.ensure_future(self._forward())
+
+    async def stop(self):
+        """
+        Stop forwarding and close all clients
+        """
+        task, self._task = self._task, None
+        if task is not None:
+            self._subscription.close()
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for client in list(self._clients):
+            client.close()
+
+    async def _forward(self):
+        async for item in self._subscription:
+            self.broadcast(item)
+
+    def broadcast(self, item):
+        """
+        Serialize a hub Item once and queue it for all clients
+        """
+        if not self._clients:
+            return
+        line = self._writer.encode(
+            item.url, item.endpoint, item.device, item.timestamp, item.reading
+        )
+        self.encoded += 1
+        frames = {False: line, True: b"data: " + line + b"\n"}
+        for client in list(self._clients):
+            if client.closed:
+                self._clients.discard(client)
+                continue
+            if client.endpoints is not None and item.endpoint not in client.endpoints:
+                continue
+            if not client.push(frames[client.sse]):
+                self._clients.discard(client)
+                self.slow_disconnects += 1
+                _LOGGER.info("Disconnected slow client %s", client.peer)
+
+    def _client(self, request, send, sse):
+        endpoints = request.query.get("endpoints")
+        if endpoints is not None:
+            endpoints = frozenset(endpoints.split(","))
+        client = _Client(
+            send, sse, request, self.max_pending, self.slow_policy, endpoints
+        )
+        self._clients.add(client)
+        return client
+
+    async def handle_events(self, request):
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        client = self._client(request, response.write, True)
+        try:
+            await client.run()
+        finally:
+            self._clients.discard(client)
+        return response
+
+    async def handle_websocket(self, request):
+        ws = web.WebSocketResponse(heartbeat=self.heartbeat)
+        await ws.prepare(request)
+        client = self._client(request, ws.send_bytes, False)
+        reader = asyncio.ensure_future(self._receive(ws))
+        reader.add_done_callback(lambda _: client.close())
+        try:
+            await client.run()
+        finally:
+            self._clients.discard(client)
+            reader.cancel()
+            if not ws.closed and not client.frames:
+                await ws.close()
+        return ws
+
+    @staticmethod
+    async def _receive(ws):
+        # incoming messages are ignored, reading detects the close
+        async for _ in ws:
+            pass
+
+    def make_app(self):
+        """
+        Create the aiohttp web application, forwarding while it runs
+        """
+
+        async def on_startup(app):
+            self.start()
+
+        async def on_shutdown(app):
+            await self.stop()
+
+        app = web.Application()
+        app.router.add_get("/events", self.handle_events)
+        app.router.add_get("/ws", self.handle_websocket)
+        app.on_startup.append(on_startup)
+        app.on_shutdown.append(on_shutdown)
+        return app
+
+
+async def serve(
+    urls,
+    host="0.0.0.0",
+    port=8081,
+    rate=DEFAULT_RATE,
+    endpoints="power_flow",
+    max_pending=DEFAULT_MAX_PENDING,
+    slow_policy="disconnect",
+):
+    """
+    Poll devices and stream their readings to clients until cancelled
+    """
+    hub = ReadingHub()
+    server = LiveServer(hub, max_pending, slow_policy)
+    async with create_session() as session:
+        polls = [
+            asyncio.ensure_future(
+                hub.poll(Fronius(session, url), rate, endpoints=endpoints)
+            )
+            for url in urls
+        ]
+        runner = web.AppRunner(server.make_app())
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+            _LOGGER.info("Streaming %s on %s:%s", ", ".join(urls), host, port)
+            await asyncio.gather(*polls)
+        finally:
+            for task in polls:
+                task.cancel()
+            await runner.cleanup()
+
+
+def add_arguments(parser):
+    parser.add_argument("urls", nargs="+", help="urls of the Fronius devices")
+    parser.add_argument("--host", default="0.0.0.0", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8081, help="port to listen on")
+    parser.add_argument(
+        "--rate",
+        type=positive_rate,
+        default=DEFAULT_RATE,
+        help="polls per second and device",
+    )
+    parser.add_argument(
+        "--endpoints",
+        default="power_flow",
+        help="comma separated endpoints, device endpoints as name:id",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=DEFAULT_MAX_PENDING,
+        help="readings waiting for a client before it counts as slow",
+    )
+    parser.add_argument(
+        "--slow-policy",
+        choices=SLOW_POLICIES,
+        default="disconnect",
+        help="disconnect slow clients or skip their oldest readings",
+    )
+
+
+def run(args):
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(
+            serve(
+                args.urls,
+                args.host,
+                args.port,
+                args.rate,
+                args.endpoints,
+                args.max_pending,
+                args.slow_policy,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
@@ -0,0 +1,298 @@
+"""
+Polling of Fronius devices to newline-delimited JSON or line protocol
+
+Polls one or many devices at a fixed rate and writes every reading as one
+line to a binary stream (stdout on the command line):
+
+    python -m pyfronius poll http://10.0.0.5 http://10.0.0.6 --rate 2 --flat
+
+Lines are serialized with orjson if installed and written block-buffered,
+so that the output keeps up with hundreds of devices piped into other
+tools.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import time
+
+from . import Fronius
+from ._readings import flatten
+from .session import create_session
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_RATE = 1.0
+DEFAULT_ENDPOINTS = ("power_flow", "system_meter", "system_inverter")
+# Endpoints of fetch_as_completed, device endpoints take a device id
+ENDPOINTS = (
+    "power_flow",
+    "system_meter",
+    "system_inverter",
+    "device_meter",
+    "device_storage",
+    "device_inverter",
+)
+DEFAULT_DEVICES = {"device_meter": 0, "device_storage": 0, "device_inverter": 1}
+BUFFER_SIZE = 1 << 16
+
+
+def _dumps_json(record):
+    return json.dumps(record, separators=(",", ":"), default=str).encode()
+
+
+def _dumps_orjson(record):
+    return orjson.dumps(record, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _escape_tag(value):
+    value = str(value).replace("\\", "\\\\")
+    for char in ", =":
+        value = value.replace(char, "\\" + char)
+    return value
+
+
+def _line_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        # devices send whole numbers as integers, i.e. 0 instead of 0.0, a
+        # field must not change its type between readings
+        value = float(value)
+        return repr(value) if math.isfinite(value) else None
+    if value is None:
+        return None
+    return '"{}"'.format(str(value).replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def line_protocol(host, endpoint, device, timestamp, reading):
+    """
+    Encode a reading in InfluxDB line protocol, one measurement per endpoint
+    :return: Line as bytes, None if the reading has no fields
+    """
+    tags = "{},host={}".format(_escape_tag(endpoint), _escape_tag(host))
+    if device is not None:
+        tags += ",device={}".format(_escape_tag(device))
+    fields = []
+    for column, value in flatten(reading).items():
+        value = _line_value(value)
+        if value is not None:
+            fields.append("{}={}".format(_escape_tag(column), value))
+    if not fields:
+        return None
+    return "{} {} {}\n".format(tags, ",".join(fields), int(timestamp * 1e9)).encode()
+
+
+class ReadingWriter:
+    """
+    Serializes readings to lines on a binary stream
+    Attributes:
+        out         Binary stream to write to
+        format      "ndjson" or "line"
+        flat        Write flattened columns instead of nested readings
+        flush_every Number of cycles after which the stream is flushed,
+                    None to flush only when the buffer is full
+        lines       Number of lines written
+    """
+
+    def __init__(self, out, format="ndjson", flat=False, flush_every=None):
+        if format not in ("ndjson", "line"):
+            raise ValueError("format must be 'ndjson' or 'line'")
+        self.out = out
+        self.format = format
+        self.flat = flat
+        self.flush_every = flush_every
+        self.lines = 0
+        self._cycles = 0
+        self._dumps = _dumps_json if orjson is None else _dumps_orjson
+
+    def encode(self, host, endpoint, device, timestamp, reading):
+        if self.format == "line":
+            return line_protocol(host, endpoint, device, timestamp, reading)
+        record = {"host": host, "endpoint": endpoint, "device": device}
+        record["time"] = timestamp
+        if self.flat:
+            flatten(reading, out=record)
+        else:
+            record["data"] = reading
+        return self._dumps(record) + b"\n"
+
+    def write(self, host, key, timestamp, reading):
+        line = self.encode(host, key[0], key[1], timestamp, reading)
+        if line is not None:
+            self.out.write(line)
+            self.lines += 1
+
+    def end_cycle(self):
+        self._cycles += 1
+        if self.flush_every is not None and self._cycles % self.flush_every == 0:
+            self.out.flush()
+
+
+def positive_rate(value):
+    """
+    Argument type of --rate
+    """
+    rate = float(value)
+    if not rate > 0:
+        raise argparse.ArgumentTypeError("rate must be positive")
+    return rate
+
+
+def parse_endpoints(spec):
+    """
+    Parse endpoints given as comma separated names, device endpoints
+    optionally with a device id (i.e. "power_flow,device_meter:1")
+    :return: Keyword arguments of Fronius.fetch_as_completed
+    """
+    kwargs = dict.fromkeys(ENDPOINTS[:3], False)
+    kwargs.update(dict.fromkeys(ENDPOINTS[3:], ()))
+    for item in spec.split(","):
+        name, _, device = item.strip().partition(":")
+        if name not in ENDPOINTS:
+            raise ValueError("Unknown endpoint {}".format(name))
+        if name in DEFAULT_DEVICES:
+            device = int(device) if device else DEFAULT_DEVICES[name]
+            kwargs[name] = tuple(kwargs[name]) + (device,)
+        else:
+            kwargs[name] = True
+    return kwargs
+
+
+async def poll_device(fronius, writer, endpoints, rate, count=None, fields=None):
+    """
+    Poll one device at a fixed rate, skipping cycles that were missed
+    :param count: Number of cycles, None to poll until cancelled
+    """
+    if not rate > 0:
+        raise ValueError("rate must be positive")
+    loop = asyncio.get_event_loop()
+    interval = 1 / rate
+    start = loop.time()
+    cycle = 0
+    while True:
+        async for key, result in fronius.fetch_as_completed(
+            deadline=interval, fields=fields, **endpoints
+        ):
+            if isinstance(result, Exception):
+                _LOGGER.warning("Polling %s %s failed: %r", fronius.url, key, result)
+                continue
+            writer.write(fronius.url, key, time.time(), result)
+        writer.end_cycle()
+        cycle += 1
+        if count is not None and cycle >= count:
+            break
+        # next tick, dropping the ones already missed
+        cycle_time = loop.time() - start
+        ticks = max(math.ceil(cycle_time / interval), cycle)
+        await asyncio.sleep(max(start + ticks * interval - loop.time(), 0))
+
+
+async def poll(
+    urls,
+    out,
+    rate=DEFAULT_RATE,
+    count=None,
+    endpoints=DEFAULT_ENDPOINTS,
+    fields=None,
+    format="ndjson",
+    flat=False,
+    flush_every=None,
+    session=None,
+):
+    """
+    Poll devices concurrently and write their readings to a binary stream
+    :param endpoints: Comma separated endpoints, see parse_endpoints
+    :return: Number of lines written
+    """
+    if not rate > 0:
+        raise ValueError("rate must be positive")
+    if not isinstance(endpoints, str):
+        endpoints = ",".join(endpoints)
+    endpoints = parse_endpoints(endpoints)
+    writer = ReadingWriter(out, format, flat, flush_every)
+    own_session = session is None
+    if own_session:
+        session = create_session(limit=max(len(urls) * 2, 100))
+    try:
+        await asyncio.gather(
+            *(
+                poll_device(
+                    Fronius(session, url), writer, endpoints, rate, count, fields
+                )
+                for url in urls
+            )
+        )
+    finally:
+        out.flush()
+        if own_session:
+            await session.close()
+    return writer.lines
+
+
+def add_arguments(parser):
+    parser.add_argument("urls", nargs="+", help="urls of the Fronius devices")
+    parser.add_argument(
+        "--rate",
+        type=positive_rate,
+        default=DEFAULT_RATE,
+        help="polls per second and device",
+    )
+    parser.add_argument(
+        "--count", type=int, default=None, help="number of polls, default unlimited"
+    )
+    parser.add_argument(
+        "--endpoints",
+        default=",".join(DEFAULT_ENDPOINTS),
+        help="comma separated endpoints, device endpoints as name:id "
+        "(i.e. power_flow,device_meter:0)",
+    )
+    parser.add_argument(
+        "--fields", help="comma separated output fields (i.e. power_grid,power_load)"
+    )
+    parser.add_argument(
+        "--format", choices=("ndjson", "line"), default="ndjson", help="output format"
+    )
+    parser.add_argument(
+        "--flat", action="store_true", help="flatten readings into columns"
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        default=None,
+        help="flush the output every N polls, default when the buffer is full",
+    )
+
+
+def run(args):
+    out = open(sys.stdout.fileno(), "wb", buffering=BUFFER_SIZE, closefd=False)
+    fields = None if args.fields is None else args.fields.split(",")
+    loop = asyncio.get_event_loop()
+    try:
+        loop.run_until_complete(
+            poll(
+                args.urls,
+                out,
+                args.rate,
+                args.count,
+                args.endpoints,
+                fields,
+                args.format,
+                args.flat,
+                args.flush_every,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    except BrokenPipeError:
+        # the consumer of the output went away
+        return 1
+    return 0
@@ -0,0 +1,382 @@
+"""
+Crash-safe on-disk ring log of readings
+
+RingLog keeps the latest values of readings in a file of fixed size,
+written through mmap: appending a value is a memory write, without a
+system call. Each value is a fixed-width record (sequence number,
+timestamp, device id, field id, value). The header holds the head and tail
+sequence numbers and the names of the devices and fields, its size is set
+when the log is created. Names are only appended, one JSON line each,
+before the length of the names is updated, so readers always see complete
+names. Records carry their own sequence number, so records written before
+a crash but not yet accounted for in the header are recovered when the log
+is opened again.
+
+    with RingLog("/var/lib/fronius/readings.log", capacity=1000000) as log:
+        log.append_reading("10.0.0.5", reading)
+
+RingLogReader tails a log written by another process, decoding records
+with struct.unpack_from directly from the mapped file instead of reading
+copies of it.
+"""
+
+import collections
+import json
+import mmap
+import os
+import struct
+import time
+
+from ._readings import numeric_values
+
+# magic, version, record size, capacity, head, tail, header size, length of
+# the names
+_HEADER = struct.Struct("<4sHHQQQII")
+_HEAD_TAIL = struct.Struct("<QQ")
+_HEAD_OFFSET = 16
+# sequence number + 1 (0 marks an empty slot), timestamp, device id, field
+# id, reserved, value
+RECORD = struct.Struct("<QdIHHd")
+MAX_DEVICES = 1 << 32
+MAX_FIELDS = 1 << 16
+# default size of the header with the names, a system meter reading of
+# two meters alone has about 70 fields
+HEADER_SIZE = 1 << 16
+MAGIC = b"PFRL"
+VERSION = 2
+# attempts of readers to load names the writer is still adding
+_NAME_ATTEMPTS = 10
+
+Record = collections.namedtuple(
+    "Record", ["sequence", "timestamp", "device", "field", "value"]
+)
+
+
+class _Mapping:
+    """
+    Memory-mapped log file with its header and name tables
+    """
+
+    def __init__(self, path, access):
+        self._file = open(path, "r+b" if access == mmap.ACCESS_WRITE else "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+        header = _HEADER.unpack_from(self._map)
+        magic, version, record_size, capacity, _, _, header_size, _ = header
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.close()
+            raise ValueError("{} is not a ring log of version {}".format(path, VERSION))
+        if len(self._map) != header_size + capacity * RECORD.size:
+            self.close()
+            raise ValueError("{} is truncated".format(path))
+        self.capacity = capacity
+        self.header_size = header_size
+        self._names_length = 0
+        self.devices = []
+        self.fields = []
+
+    def head_tail(self):
+        return _HEAD_TAIL.unpack_from(self._map, _HEAD_OFFSET)
+
+    def _load_names(self):
+        """
+        Load the names added since the last call
+        """
+        for _ in range(_NAME_ATTEMPTS):
+            length = _HEADER.unpack_from(self._map)[-1]
+            if length == self._names_length:
+                return
+            added = bytes(
+                self._map[_HEADER.size + self._names_length : _HEADER.size + length]
+            )
+            try:
+                if not added.endswith(b"\n"):
+                    raise ValueError("Incomplete names")
+                names = [json.loads(line) for line in added.splitlines()]
+            except ValueError:
+                # seen before the names themselves, read them again
+                time.sleep(0.001)
+                continue
+            for kind, name in names:
+                (self.devices if kind == "device" else self.fields).append(name)
+            self._names_length = length
+            return
+        raise ValueError("Invalid names in {}".format(self._file.name))
+
+    def _offset(self, sequence):
+        return self.header_size + (sequence % self.capacity) * RECORD.size
+
+    def record(self, sequence):
+        """
+        Decode the record with a sequence number, None if overwritten
+        """
+        stored, timestamp, device, field, _, value = RECORD.unpack_from(
+            self._map, self._offset(sequence)
+        )
+        if stored != sequence + 1:
+            return None
+        if device >= len(self.devices) or field >= len(self.fields):
+            self._load_names()
+        return Record(
+            sequence, timestamp, self.devices[device], self.fields[field], value
+        )
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+class RingLog(_Mapping):
+    """
+    Writes values to an on-disk ring log, overwriting the oldest ones
+    Attributes:
+        path        Path of the log file
+        capacity    Number of records kept, only needed to create the log
+        header_size Bytes reserved for the header with the names of the
+                    devices and fields, only used to create the log
+        sync_every  Number of appends after which the mapping is flushed to
+                    disk, None to leave it to the operating system. Values
+                    survive a crash of the process either way, flushing
+                    protects them against power loss.
+    """
+
+    def __init__(self, path, capacity=None, sync_every=None, header_size=HEADER_SIZE):
+        if not os.path.exists(path):
+            if capacity is None:
+                raise ValueError("capacity is required to create a ring log")
+            self._create(path, capacity, header_size)
+        super().__init__(path, mmap.ACCESS_WRITE)
+        self.path = path
+        self.sync_every = sync_every
+        self._load_names()
+        self._device_ids = {name: i for i, name in enumerate(self.devices)}
+        self._field_ids = {name: i for i, name in enumerate(self.fields)}
+        self._unsynced = 0
+        self._head, self._tail = self.head_tail()
+        self._recover()
+
+    @staticmethod
+    def _create(path, capacity, header_size):
+        if header_size < _HEADER.size:
+            raise ValueError("header_size must be at least {}".format(_HEADER.size))
+        header = _HEADER.pack(
+            MAGIC, VERSION, RECORD.size, capacity, 0, 0, header_size, 0
+        )
+        tmp = "{}.tmp".format(path)
+        with open(tmp, "wb") as file:
+            file.write(header)
+            file.truncate(header_size + capacity * RECORD.size)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp, path)
+
+    def _recover(self):
+        """
+        Account for records written after the last update of the header
+        """
+        recovered = 0
+        while recovered < self.capacity and self.record(self._head) is not None:
+            self._head += 1
+            recovered += 1
+        if recovered:
+            self._tail = max(self._tail, self._head - self.capacity)
+            _HEAD_TAIL.pack_into(self._map, _HEAD_OFFSET, self._head, self._tail)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self._head - self._tail
+
+    @property
+    def head(self):
+        """
+        Sequence number of the next record
+        """
+        return self._head
+
+    @property
+    def tail(self):
+        """
+        Sequence number of the oldest record kept
+        """
+        return self._tail
+
+    @staticmethod
+    def _name_id(ids, names, name, kind, added):
+        index = ids.get(name)
+        if index is None:
+            index = ids[name] = len(names)
+            names.append(name)
+            added.append((ids, names, name, kind))
+        return index
+
+    def _name_ids(self, device, fields):
+        """
+        Ids of a device and its fields, adding unknown names to the header
+        :raise ValueError: The names do not fit into the header or the
+            records, none of them is added then
+        """
+        added = []
+        device = self._name_id(self._device_ids, self.devices, device, "device", added)
+        fields = [
+            self._name_id(self._field_ids, self.fields, field, "field", added)
+            for field in fields
+        ]
+        if not added:
+            return device, fields
+        encoded = b"".join(
+            json.dumps([kind, name]).encode() + b"\n" for _, _, name, kind in added
+        )
+        length = self._names_length + len(encoded)
+        error = None
+        if len(self.devices) > MAX_DEVICES or len(self.fields) > MAX_FIELDS:
+            error = "Too many device or field names for the records"
+        elif _HEADER.size + length > self.header_size:
+            error = (
+                "Too many device and field names for a header of {} bytes, "
+                "create the log with a larger header_size".format(self.header_size)
+            )
+        if error is not None:
+            for ids, names, name, _ in reversed(added):
+                del ids[name]
+                names.pop()
+            raise ValueError(error)
+        # the names first, their length after them, readers only read up to
+        # the length
+        start = _HEADER.size + self._names_length
+        self._map[start : start + len(encoded)] = encoded
+        struct.pack_into("<I", self._map, _HEADER.size - 4, length)
+        self._names_length = length
+        return device, fields
+
+    def _append(self, timestamp, values):
+        """
+        Append the records of (device id, field id, value), moving the head
+        past them only after all are written
+        :return: Sequence number of the first record
+        """
+        first = self._head
+        # the records first, the header after them, so that a crash in
+        # between leaves records that are recovered on open
+        for sequence, (device, field, value) in enumerate(values, first):
+            RECORD.pack_into(
+                self._map,
+                self._offset(sequence),
+                sequence + 1,
+                timestamp,
+                device,
+                field,
+                0,
+                value,
+            )
+        self._head = first + len(values)
+        if self._head - self._tail > self.capacity:
+            self._tail = self._head - self.capacity
+        _HEAD_TAIL.pack_into(self._map, _HEAD_OFFSET, self._head, self._tail)
+        if self.sync_every is not None:
+            self._unsynced += len(values)
+            if self._unsynced >= self.sync_every:
+                self.flush()
+        return first
+
+    def append(self, device, field, value, timestamp=None):
+        """
+        Append a value
+        :param device: Name of the device, i.e. its url
+        :param field: Name of the field, i.e. "power_grid"
+        :return: Sequence number of the record
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        value = float(value)
+        device, (field,) = self._name_ids(device, (field,))
+        return self._append(timestamp, [(device, field, value)])
+
+    def append_reading(self, device, reading, timestamp=None):
+        """
+        Append all numeric values of a reading of the current_* methods,
+        nested values (i.e. of meters) as "meters.0.power_real".
+        Either all values are appended or, if their names do not fit into
+        the header, none.
+        :return: Number of values appended
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        values = numeric_values(reading)
+        device, fields = self._name_ids(device, [field for field, _ in values])
+        self._append(
+            timestamp,
+            [(device, field, value) for field, (_, value) in zip(fields, values)],
+        )
+        return len(values)
+
+    def flush(self):
+        """
+        Write the mapping to disk
+        """
+        self._map.flush()
+        self._unsynced = 0
+
+    def close(self):
+        if self._map is not None:
+            self.flush()
+        super().close()
+
+
+class RingLogReader(_Mapping):
+    """
+    Reads a ring log, possibly while another process appends to it
+    """
+
+    def __init__(self, path):
+        super().__init__(path, mmap.ACCESS_READ)
+        self._load_names()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read(self, start=None):
+        """
+        Records from a sequence number (the oldest kept if omitted or
+        overwritten already) up to the current head
+        :return: Iterator of Record
+        """
+        head, tail = self.head_tail()
+        sequence = tail if start is None else max(start, tail)
+        while sequence < head:
+            record = self.record(sequence)
+            if record is None:
+                # overwritten while reading, continue with the oldest kept
+                head, tail = self.head_tail()
+                sequence = max(sequence + 1, tail)
+                continue
+            yield record
+            sequence += 1
+
+    def follow(self, start=None, interval=0.1):
+        """
+        Records from a sequence number on, waiting for new ones forever
+        :param start: First sequence number, the current head if omitted
+        """
+        if start is None:
+            start = self.head_tail()[0]
+        return self._follow(start, interval)
+
+    def _follow(self, start, interval):
+        while True:
+            for record in self.read(start):
+                yield record
+                start = record.sequence + 1
+            time.sleep(interval)
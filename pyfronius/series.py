@@ -0,0 +1,327 @@
+"""
+Compressed in-memory time series of readings
+
+CompressedSeries keeps (timestamp, value) points encoded as in Facebook's
+Gorilla: timestamps as delta-of-delta, values as XOR with the previous
+value. Points of a series polled at a fixed rate take a single bit for the
+timestamp, and values that change rarely or slowly take a few bits each,
+instead of two Python floats in lists (about 64 bytes per point).
+Points are appended to an open block, full blocks are sealed to bytes.
+Range queries decode only the blocks overlapping the range.
+
+SeriesStore keeps one series per device and field of the readings appended.
+"""
+
+import collections
+import decimal
+import struct
+
+from ._readings import numeric_values
+
+DEFAULT_BLOCK_SIZE = 1024
+DEFAULT_RESOLUTION = 1.0
+
+_DOUBLE = struct.Struct(">d")
+_BITS = struct.Struct(">Q")
+# delta-of-delta buckets: (prefix, prefix bits, value bits)
+_DOD_BUCKETS = ((0b10, 2, 7), (0b110, 3, 9), (0b1110, 4, 12))
+_MASK64 = (1 << 64) - 1
+
+Block = collections.namedtuple("Block", ["first", "last", "count", "data"])
+
+
+def _float_bits(value):
+    return _BITS.unpack(_DOUBLE.pack(value))[0]
+
+
+def _bits_float(bits):
+    return _DOUBLE.unpack(_BITS.pack(bits))[0]
+
+
+def _decimals(resolution):
+    """
+    Decimal places of a resolution, i.e. 2 for 0.25
+    """
+    return max(-decimal.Decimal(repr(resolution)).as_tuple().exponent, 0)
+
+
+def _leading_zeros(bits):
+    return 64 - bits.bit_length()
+
+
+def _trailing_zeros(bits):
+    return (bits & -bits).bit_length() - 1
+
+
+class _BitWriter:
+    def __init__(self):
+        self.buf = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value, bits):
+        self._acc = (self._acc << bits) | (value & ((1 << bits) - 1))
+        self._bits += bits
+        while self._bits >= 8:
+            self._bits -= 8
+            self.buf.append((self._acc >> self._bits) & 0xFF)
+        self._acc &= (1 << self._bits) - 1
+
+    def getvalue(self):
+        if not self._bits:
+            return bytes(self.buf)
+        return bytes(self.buf) + bytes([(self._acc << (8 - self._bits)) & 0xFF])
+
+    def __len__(self):
+        return len(self.buf) + (1 if self._bits else 0)
+
+
+class _BitReader:
+    def __init__(self, data):
+        self._value = int.from_bytes(data, "big")
+        self._left = len(data) * 8
+
+    def read(self, bits):
+        self._left -= bits
+        return (self._value >> self._left) & ((1 << bits) - 1)
+
+
+class _Encoder:
+    """
+    Encodes the points of one block
+    """
+
+    def __init__(self, first, value):
+        self.writer = _BitWriter()
+        self.first = self.last = first
+        self.count = 1
+        self._delta = 0
+        self._bits = _float_bits(value)
+        self._leading = self._trailing = None
+        self.writer.write(self._bits, 64)
+
+    def append(self, timestamp, value):
+        writer = self.writer
+        delta = timestamp - self.last
+        dod = delta - self._delta
+        if dod == 0:
+            writer.write(0, 1)
+        else:
+            for prefix, prefix_bits, bits in _DOD_BUCKETS:
+                if -(1 << (bits - 1)) < dod <= 1 << (bits - 1):
+                    writer.write(prefix, prefix_bits)
+                    writer.write(dod, bits)
+                    break
+            else:
+                writer.write(0b1111, 4)
+                writer.write(dod & _MASK64, 64)
+        self._delta = delta
+        self.last = timestamp
+
+        bits = _float_bits(value)
+        xor = bits ^ self._bits
+        self._bits = bits
+        if xor == 0:
+            writer.write(0, 1)
+        else:
+            leading = min(_leading_zeros(xor), 31)
+            trailing = _trailing_zeros(xor)
+            if (
+                self._leading is not None
+                and leading >= self._leading
+                and trailing >= self._trailing
+            ):
+                # fits into the window of the previous value
+                writer.write(0b10, 2)
+                writer.write(xor >> self._trailing, 64 - self._leading - self._trailing)
+            else:
+                length = 64 - leading - trailing
+                writer.write(0b11, 2)
+                writer.write(leading, 5)
+                # a length of 64 is written as 0
+                writer.write(length & 63, 6)
+                writer.write(xor >> trailing, length)
+                self._leading, self._trailing = leading, trailing
+        self.count += 1
+
+    def block(self):
+        return Block(self.first, self.last, self.count, self.writer.getvalue())
+
+
+def _decode(block):
+    """
+    Decode the points of a block
+    :return: List of (timestamp, value) with timestamps in resolution units
+    """
+    reader = _BitReader(block.data)
+    timestamp = block.first
+    bits = reader.read(64)
+    points = [(timestamp, _bits_float(bits))]
+    delta = 0
+    leading = trailing = 0
+    for _ in range(block.count - 1):
+        if reader.read(1):
+            if not reader.read(1):
+                dod_bits = 7
+            elif not reader.read(1):
+                dod_bits = 9
+            elif not reader.read(1):
+                dod_bits = 12
+            else:
+                dod_bits = 64
+            dod = reader.read(dod_bits)
+            if dod > 1 << (dod_bits - 1):
+                dod -= 1 << dod_bits
+            delta += dod
+        timestamp += delta
+
+        if reader.read(1):
+            if reader.read(1):
+                leading = reader.read(5)
+                length = reader.read(6) or 64
+                trailing = 64 - leading - length
+            bits ^= reader.read(64 - leading - trailing) << trailing
+        points.append((timestamp, _bits_float(bits)))
+    return points
+
+
+class CompressedSeries:
+    """
+    Gorilla-compressed series of (timestamp, value) points
+    Attributes:
+        block_size  Number of points per block
+        resolution  Seconds timestamps are rounded to
+    """
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, resolution=DEFAULT_RESOLUTION):
+        if block_size < 2:
+            raise ValueError("block_size must be at least 2")
+        self.block_size = block_size
+        self.resolution = resolution
+        self._decimals = _decimals(resolution)
+        self._blocks = []
+        self._open = None
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        """
+        Size of the encoded points in bytes
+        """
+        size = sum(len(block.data) for block in self._blocks)
+        if self._open is not None:
+            size += len(self._open.writer)
+        return size
+
+    def append(self, timestamp, value):
+        """
+        Append a point, timestamps must not decrease
+        """
+        timestamp = round(timestamp / self.resolution)
+        value = float(value)
+        if self._open is None:
+            if self._blocks and timestamp < self._blocks[-1].last:
+                raise ValueError("Timestamps must not decrease")
+            self._open = _Encoder(timestamp, value)
+        else:
+            if timestamp < self._open.last:
+                raise ValueError("Timestamps must not decrease")
+            self._open.append(timestamp, value)
+        self._count += 1
+        if self._open.count >= self.block_size:
+            self._blocks.append(self._open.block())
+            self._open = None
+
+    def blocks(self):
+        """
+        The sealed blocks and the open one
+        :return: List of Block
+        """
+        if self._open is None:
+            return list(self._blocks)
+        return self._blocks + [self._open.block()]
+
+    def range(self, start=None, stop=None):
+        """
+        Points with start <= timestamp < stop, decoding only the blocks
+        overlapping the range
+        :return: List of (timestamp, value)
+        """
+        lower = None if start is None else start / self.resolution
+        upper = None if stop is None else stop / self.resolution
+        points = []
+        for block in self.blocks():
+            if lower is not None and block.last < lower:
+                continue
+            if upper is not None and block.first >= upper:
+                break
+            for timestamp, value in _decode(block):
+                if (lower is None or timestamp >= lower) and (
+                    upper is None or timestamp < upper
+                ):
+                    points.append(
+                        (round(timestamp * self.resolution, self._decimals), value)
+                    )
+        return points
+
+    def __iter__(self):
+        return iter(self.range())
+
+
+class SeriesStore:
+    """
+    Compressed series per device and field of readings
+    Attributes:
+        block_size  Number of points per block of each series
+        resolution  Seconds timestamps are rounded to
+    """
+
+    def __init__(self, block_size=DEFAULT_BLOCK_SIZE, resolution=DEFAULT_RESOLUTION):
+        self.block_size = block_size
+        self.resolution = resolution
+        self._series = {}
+
+    def series(self, device, field):
+        """
+        The series of a device and field, created if unknown
+        """
+        series = self._series.get((device, field))
+        if series is None:
+            series = self._series[(device, field)] = CompressedSeries(
+                self.block_size, self.resolution
+            )
+        return series
+
+    def keys(self):
+        """
+        Tuples (device, field) of the series kept
+        """
+        return list(self._series)
+
+    def append_reading(self, device, reading, timestamp):
+        """
+        Append all numeric values of a reading of the current_* methods,
+        nested values (i.e. of meters) as "meters.0.power_real"
+        :return: Number of values appended
+        """
+        values = numeric_values(reading)
+        for field, value in values:
+            self.series(device, field).append(timestamp, value)
+        return len(values)
+
+    def range(self, device, field, start=None, stop=None):
+        """
+        Points of a device and field with start <= timestamp < stop
+        :return: List of (timestamp, value), empty if unknown
+        """
+        series = self._series.get((device, field))
+        if series is None:
+            return []
+        return series.range(start, stop)
+
+    @property
+    def nbytes(self):
+        return sum(series.nbytes for series in self._series.values())
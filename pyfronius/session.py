@@ -0,0 +1,78 @@
+"""
+HTTP session factory tuned for Fronius dataloggers
+
+The embedded web server of the dataloggers handles only a few concurrent
+connections well, so sessions created here limit the connections per host
+and keep them alive between polls instead of reconnecting every request.
+aiohttp is imported on first use, so that importing pyfronius stays cheap.
+"""
+
+# Dataloggers start failing requests beyond a couple of parallel connections
+DEFAULT_LIMIT_PER_HOST = 2
+# Total number of connections, relevant when polling many hosts
+DEFAULT_LIMIT = 100
+# Dataloggers drop idle connections after some seconds on their own
+DEFAULT_KEEPALIVE_TIMEOUT = 15
+# Datalogger addresses rarely change, resolve them once every five minutes
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_TIMEOUT = 10
+
+
+def create_connector(
+    limit=DEFAULT_LIMIT,
+    limit_per_host=DEFAULT_LIMIT_PER_HOST,
+    keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache=DEFAULT_DNS_CACHE_TTL,
+    **kwargs
+):
+    """
+    Create a TCP connector tuned for Fronius dataloggers.
+    Needs to be called within a running event loop.
+    Further keyword arguments are passed on to aiohttp.TCPConnector.
+    """
+    import aiohttp
+
+    return aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        use_dns_cache=ttl_dns_cache is not None,
+        ttl_dns_cache=ttl_dns_cache,
+        **kwargs
+    )
+
+
+def create_session(
+    limit=DEFAULT_LIMIT,
+    limit_per_host=DEFAULT_LIMIT_PER_HOST,
+    keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache=DEFAULT_DNS_CACHE_TTL,
+    timeout=DEFAULT_TIMEOUT,
+    **kwargs
+):
+    """
+    Create an AIO session tuned for Fronius dataloggers.
+    Needs to be called within a running event loop.
+    The session is an async context manager and closes its connector on exit:
+
+        async with create_session() as session:
+            fronius = Fronius(session, "http://192.168.0.10")
+
+    :param limit: Maximum number of simultaneous connections
+    :param limit_per_host: Maximum number of simultaneous connections per host
+    :param keepalive_timeout: Seconds to keep idle connections open
+    :param ttl_dns_cache: Seconds to cache DNS lookups, None disables the cache
+    :param timeout: Total timeout per request in seconds, None disables it
+    Further keyword arguments are passed on to aiohttp.ClientSession.
+    """
+    import aiohttp
+
+    connector = create_connector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=ttl_dns_cache,
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=aiohttp.ClientTimeout(total=timeout), **kwargs
+    )
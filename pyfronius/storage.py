@@ -0,0 +1,124 @@
+"""
+Analytics of the battery modules of a storage device
+
+Decodes the modules of a storage reading into one column per field and
+computes stack-level indicators (cell voltage spread, hottest and weakest
+module, state of charge imbalance, outliers) on whole columns.
+Uses NumPy if installed and falls back to plain Python.
+"""
+
+from . import _vector, MODULE_FIELDS
+
+# Module fields decoded into columns
+MODULE_COLUMNS = (
+    "voltage_dc",
+    "voltage_dc_minimum_cell",
+    "voltage_dc_maximum_cell",
+    "temperature_cell",
+    "temperature_cell_minimum",
+    "temperature_cell_maximum",
+    "state_of_charge",
+    "cycle_count_cell",
+    "capacity_maximum",
+    "current_dc",
+)
+# Fields checked for outlier modules
+OUTLIER_COLUMNS = (
+    "voltage_dc_minimum_cell",
+    "voltage_dc_maximum_cell",
+    "temperature_cell_maximum",
+    "state_of_charge",
+    "capacity_maximum",
+)
+
+
+class StorageStack:
+    """
+    Columnar view of the modules of one storage device
+    Attributes:
+        columns     Dictionary of field to column of module values,
+                    NaN for values a module does not provide
+        use_numpy   Whether NumPy is used for computations
+    """
+
+    def __init__(self, columns, use_numpy=None):
+        self.use_numpy = _vector.available(use_numpy)
+        self.columns = {
+            field: _vector.column(values, self.use_numpy)
+            for field, values in columns.items()
+        }
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    @classmethod
+    def from_raw(cls, data, use_numpy=None):
+        """
+        Decode the modules of a raw storage reply (the "Data" of the body)
+        directly, without building a dictionary per module
+        """
+        keys = {name: key for key, name, _ in MODULE_FIELDS if name in MODULE_COLUMNS}
+        modules = data.get("Modules", ())
+        columns = {
+            field: [_vector.to_float(module.get(keys[field])) for module in modules]
+            for field in MODULE_COLUMNS
+        }
+        return cls(columns, use_numpy)
+
+    @classmethod
+    def from_reading(cls, reading, use_numpy=None):
+        """
+        Decode the modules of a reading of Fronius.current_storage_data
+        """
+        modules = reading.get("modules", {})
+        ordered = [modules[i] for i in sorted(modules)]
+        columns = {
+            field: [
+                _vector.to_float(module.get(field, {}).get("value"))
+                for module in ordered
+            ]
+            for field in MODULE_COLUMNS
+        }
+        return cls(columns, use_numpy)
+
+    def _stat(self, fun, field):
+        return fun(self.columns[field], self.use_numpy)
+
+    def _extreme_module(self, field, largest):
+        idx = _vector.top(self.columns[field], 1, self.use_numpy, largest)
+        return idx[0] if idx else None
+
+    def analyze(self, outlier_threshold=3.5):
+        """
+        Compute the stack-level indicators
+        :param outlier_threshold: Robust z-score above which a module value
+            counts as outlier
+        :return: Dictionary of indicators, NaN (or None for module indices)
+            where the modules provide no data
+        """
+        cell_min = self._stat(_vector.minimum, "voltage_dc_minimum_cell")
+        cell_max = self._stat(_vector.maximum, "voltage_dc_maximum_cell")
+        soc_min = self._stat(_vector.minimum, "state_of_charge")
+        soc_max = self._stat(_vector.maximum, "state_of_charge")
+        return {
+            "module_count": len(self),
+            "cell_voltage_minimum": cell_min,
+            "cell_voltage_maximum": cell_max,
+            "cell_voltage_spread": cell_max - cell_min,
+            "weakest_module": self._extreme_module("voltage_dc_minimum_cell", False),
+            "temperature_maximum": self._stat(
+                _vector.maximum, "temperature_cell_maximum"
+            ),
+            "hottest_module": self._extreme_module("temperature_cell_maximum", True),
+            "state_of_charge_mean": self._stat(_vector.mean, "state_of_charge"),
+            "state_of_charge_std": self._stat(_vector.std, "state_of_charge"),
+            "state_of_charge_imbalance": soc_max - soc_min,
+            "cycle_count_maximum": self._stat(_vector.maximum, "cycle_count_cell"),
+            "cycle_count_mean": self._stat(_vector.mean, "cycle_count_cell"),
+            "outliers": {
+                field: _vector.outliers(
+                    self.columns[field], outlier_threshold, self.use_numpy
+                )
+                for field in OUTLIER_COLUMNS
+            },
+        }
@@ -0,0 +1,191 @@
+"""
+Incremental parsing of large Solar API replies
+
+RecordParser consumes a JSON reply chunk by chunk and emits the records
+below a path (i.e. each meter of Body.Data) as soon as they are complete.
+Only the structure along the path is scanned character by character, the
+records themselves are located with regular expressions and decoded with
+json.loads. The buffered text is bounded by the largest single record
+instead of the whole reply.
+"""
+
+import json
+import re
+
+# Records of system scope replies, i.e. one per meter or inverter channel
+RECORD_PATH = ("Body", "Data")
+
+_STRING = re.compile(r'"(?:[^"\\]|\\.)*"', re.S)
+_STRUCTURE = re.compile(r'[{}\[\]"]')
+_SCALAR_END = re.compile(r"[\s,}\]]")
+_WHITESPACE = re.compile(r"\s*")
+
+_OPEN = "{["
+_CLOSE = "}]"
+
+
+class RecordParser:
+    """
+    Incremental JSON parser emitting events (path, value).
+    Each element of the container at path is emitted as soon as it is
+    complete, as well as each value not on the path (i.e. the "Head" of a
+    reply) as a whole. A path of () emits the members of the document.
+    """
+
+    def __init__(self, path=RECORD_PATH):
+        self.path = tuple(path)
+        self._buf = ""
+        self._pos = 0
+        # frames of the containers entered: [bracket, key or index]
+        self._stack = []
+        self._state = "value"
+        # scan state of the value being captured: [start, position, depth]
+        self._capture = None
+
+    def _current_path(self):
+        return tuple(frame[1] for frame in self._stack)
+
+    def _descend(self, path):
+        return self.path[: len(path)] == path
+
+    def feed(self, text):
+        """
+        Parse the next chunk of the reply
+        :return: List of events (path, value) completed by this chunk
+        """
+        self._buf += text
+        events = []
+        while self._step(events, final=False):
+            pass
+        # drop the consumed text
+        start = self._pos if self._capture is None else self._capture[0]
+        if start:
+            self._buf = self._buf[start:]
+            self._pos -= start
+            if self._capture is not None:
+                self._capture[0] -= start
+                self._capture[1] -= start
+        return events
+
+    def close(self):
+        """
+        Signal the end of the reply
+        :return: List of the remaining events
+        """
+        events = []
+        while self._step(events, final=True):
+            pass
+        if self._stack or self._state != "end":
+            raise ValueError("Incomplete JSON document")
+        if _WHITESPACE.match(self._buf, self._pos).end() != len(self._buf):
+            raise ValueError("Extra data after JSON document")
+        return events
+
+    def _skip_whitespace(self):
+        self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+        return self._pos < len(self._buf)
+
+    def _step(self, events, final):
+        """
+        Advance by one token
+        :return: Whether progress was made
+        """
+        if self._capture is not None:
+            return self._continue_capture(events, final)
+        if not self._skip_whitespace() or self._state == "end":
+            return False
+        char = self._buf[self._pos]
+        frame = self._stack[-1] if self._stack else None
+
+        if self._state == "key":
+            if char == "}":
+                return self._close_container()
+            match = _STRING.match(self._buf, self._pos)
+            if match is None:
+                if char != '"':
+                    raise ValueError("Expected object key at {}".format(self._pos))
+                return False
+            frame[1] = json.loads(match.group())
+            self._pos = match.end()
+            self._state = "colon"
+        elif self._state == "colon":
+            if char != ":":
+                raise ValueError("Expected ':' at {}".format(self._pos))
+            self._pos += 1
+            self._state = "value"
+        elif self._state == "next":
+            if char == ",":
+                self._pos += 1
+                if frame[0] == "{":
+                    self._state = "key"
+                else:
+                    frame[1] += 1
+                    self._state = "value"
+            elif char in _CLOSE:
+                return self._close_container()
+            else:
+                raise ValueError("Expected ',' at {}".format(self._pos))
+        elif char == "]" and frame is not None and frame[0] == "[":
+            # empty array
+            return self._close_container()
+        elif char in _OPEN and self._descend(self._current_path()):
+            self._pos += 1
+            if char == "{":
+                self._stack.append(["{", None])
+                self._state = "key"
+            else:
+                self._stack.append(["[", 0])
+                self._state = "value"
+        else:
+            self._capture = [self._pos, self._pos, 0]
+        return True
+
+    def _close_container(self):
+        frame = self._stack.pop()
+        if self._buf[self._pos] != _CLOSE[_OPEN.index(frame[0])]:
+            raise ValueError("Mismatched bracket at {}".format(self._pos))
+        self._pos += 1
+        self._state = "next" if self._stack else "end"
+        return True
+
+    def _continue_capture(self, events, final):
+        start, pos, depth = self._capture
+        buf = self._buf
+        char = buf[start]
+        end = None
+        if char in _OPEN:
+            while end is None:
+                match = _STRUCTURE.search(buf, pos)
+                if match is None:
+                    pos = len(buf)
+                    break
+                token = match.group()
+                if token == '"':
+                    string = _STRING.match(buf, match.start())
+                    if string is None:
+                        pos = match.start()
+                        break
+                    pos = string.end()
+                    continue
+                pos = match.end()
+                depth += 1 if token in _OPEN else -1
+                if depth == 0:
+                    end = pos
+        elif char == '"':
+            string = _STRING.match(buf, start)
+            if string is not None:
+                end = string.end()
+        else:
+            match = _SCALAR_END.search(buf, start)
+            if match is not None:
+                end = match.start()
+            elif final:
+                end = len(buf)
+        if end is None:
+            self._capture = [start, pos, depth]
+            return False
+        self._capture = None
+        self._pos = end
+        events.append((self._current_path(), json.loads(buf[start:end])))
+        self._state = "next" if self._stack else "end"
+        return True
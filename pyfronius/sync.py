@@ -0,0 +1,177 @@
+"""
+Blocking interface to Fronius devices for synchronous code
+
+Running every call with asyncio.run creates a new event loop, session and
+connection each time. FroniusSync instead runs its Fronius instance on an
+event loop in a background thread, with one long-lived session keeping its
+connections alive, and blocks the calling thread until the result is
+ready. It may be shared among threads.
+
+    with FroniusSync("http://10.0.0.5") as fronius:
+        power_flow = fronius.current_power_flow()
+        meter, inverter = fronius.batch(
+            [("current_meter_data", 0), ("current_inverter_data", 1)]
+        )
+
+Several FroniusSync instances may share one BackgroundLoop and its session.
+"""
+
+import asyncio
+import concurrent.futures
+import threading
+
+from . import API_VERSION, Fronius
+from .session import create_session
+
+
+class BackgroundLoop:
+    """
+    Event loop running in a daemon thread, with a session for the requests
+    Keyword arguments are passed on to create_session.
+    """
+
+    def __init__(self, **session_kwargs):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="pyfronius-loop", daemon=True
+        )
+        self._thread.start()
+        self.session = self.run(self._create_session(session_kwargs))
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @staticmethod
+    async def _create_session(session_kwargs):
+        return create_session(**session_kwargs)
+
+    @property
+    def closed(self):
+        return self.loop.is_closed()
+
+    def run(self, coro, timeout=None):
+        """
+        Run a coroutine on the loop and wait for its result
+        :param timeout: Seconds to wait, None to wait until done. The
+            coroutine is cancelled on timeout.
+        :raise concurrent.futures.TimeoutError: The timeout expired
+        """
+        if self.closed:
+            coro.close()
+            raise RuntimeError("Background loop is closed")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def close(self):
+        """
+        Close the session and stop the loop thread
+        """
+        if self.closed:
+            return
+        self.run(self.session.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+def _blocking(name):
+    def method(self, *args, **kwargs):
+        return self.call(name, *args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = getattr(Fronius, name).__doc__
+    return method
+
+
+async def _gather(coros):
+    return await asyncio.gather(*coros, return_exceptions=True)
+
+
+class FroniusSync:
+    """
+    Blocking counterpart of Fronius, with the same current_* and fetch
+    methods
+    Attributes:
+        url         The url for reaching of the Fronius device
+        timeout     Seconds to wait for each call, None to wait until done
+        background  BackgroundLoop to run on (optional, may be shared among
+                    devices). Created and closed along with this instance if
+                    omitted.
+    Further keyword arguments are passed on to Fronius.
+    """
+
+    def __init__(
+        self, url, api_version=API_VERSION.AUTO, timeout=None, background=None, **kwargs
+    ):
+        self._own_background = background is None
+        if background is None:
+            background = BackgroundLoop()
+        self.background = background
+        self.timeout = timeout
+        self.fronius = Fronius(background.session, url, api_version, **kwargs)
+
+    @property
+    def url(self):
+        return self.fronius.url
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def call(self, name, *args, **kwargs):
+        """
+        Call a coroutine method of the Fronius instance and wait for its result
+        """
+        return self.background.run(
+            getattr(self.fronius, name)(*args, **kwargs), self.timeout
+        )
+
+    def batch(self, calls):
+        """
+        Run several calls concurrently and wait for all of them.
+        A failing call does not affect the others, its exception is returned
+        as result instead.
+        :param calls: Iterable of method names or tuples of method name and
+            arguments (i.e. ("current_meter_data", 0))
+        :return: List of results in the order of the calls
+        """
+        # resolve all methods first, unknown ones leave no coroutines behind
+        methods = []
+        for call in calls:
+            if isinstance(call, str):
+                call = (call,)
+            methods.append((getattr(self.fronius, call[0]), call[1:]))
+        coros = []
+        try:
+            for method, args in methods:
+                coros.append(method(*args))
+        except Exception:
+            for coro in coros:
+                coro.close()
+            raise
+        return self.background.run(_gather(coros), self.timeout)
+
+    def close(self):
+        """
+        Close the background loop if created along with this instance
+        """
+        if self._own_background:
+            self.background.close()
+
+    fetch_api_version = _blocking("fetch_api_version")
+    fetch = _blocking("fetch")
+    fetch_named = _blocking("fetch_named")
+    current_power_flow = _blocking("current_power_flow")
+    current_system_meter_data = _blocking("current_system_meter_data")
+    current_system_inverter_data = _blocking("current_system_inverter_data")
+    current_meter_data = _blocking("current_meter_data")
+    current_storage_data = _blocking("current_storage_data")
+    current_inverter_data = _blocking("current_inverter_data")
+    current_led_data = _blocking("current_led_data")
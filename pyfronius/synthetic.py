@@ -0,0 +1,496 @@
+"""
+Synthetic Solar API replies for scale testing
+
+SyntheticSite generates valid Solar API V0 and V1 replies of a site with
+any number of inverters, meters and battery modules. Values follow daily
+curves (photovoltaic production over the daylight hours with passing
+clouds, household consumption with morning and evening peaks, a battery
+absorbing the surplus) and are a pure function of the requested time, so
+replies of any point in time are reproducible without simulating the day
+up to it.
+
+    site = SyntheticSite(inverters=50, meters=20, modules=16)
+    replies = site.replies(datetime.datetime(2021, 6, 1, 12, tzinfo=tz))
+"""
+
+import json
+import math
+import random
+from pathlib import Path
+
+from . import (
+    API_BASEPATHS,
+    API_VERSION,
+    URL_API_VERSION,
+    URL_DEVICE_INVERTER_COMMON,
+    URL_DEVICE_INVERTER_CUMULATIVE,
+    URL_DEVICE_METER,
+    URL_DEVICE_STORAGE,
+    URL_POWER_FLOW,
+    URL_SYSTEM_INVERTER,
+    URL_SYSTEM_LED,
+    URL_SYSTEM_METER,
+)
+
+# Daylight hours of the daily curves
+_SUNRISE = 6.0
+_SUNSET = 20.0
+_MODULE_CELLS = 16
+
+
+def _reply(when, data, status=0, reason="", **arguments):
+    res = {
+        "Head": {
+            "RequestArguments": arguments,
+            "Status": {"Code": status, "Reason": reason, "UserMessage": ""},
+            "Timestamp": when.isoformat(timespec="seconds"),
+        }
+    }
+    if data is not None:
+        res["Body"] = {"Data": data}
+    return res
+
+
+def _daylight(hour):
+    """
+    Position within the daylight hours, None at night
+    """
+    if not _SUNRISE < hour < _SUNSET:
+        return None
+    return (hour - _SUNRISE) / (_SUNSET - _SUNRISE)
+
+
+class SyntheticSite:
+    """
+    Generates consistent Solar API replies of one site
+    Attributes:
+        inverters   Number of inverters (ids 1 to inverters)
+        meters      Number of meters (ids 0 to meters - 1), meter 0 being
+                    the feed-in meter and the others consumer meters
+        modules     Number of battery modules of storage 0, 0 for no storage
+        peak_power  Peak AC power per inverter in W
+        base_load   Consumption of the site outside the peaks in W
+        capacity    Usable battery capacity in Wh
+        seed        Seed of the per-device variation and noise
+    """
+
+    def __init__(
+        self,
+        inverters=1,
+        meters=1,
+        modules=0,
+        peak_power=5000.0,
+        base_load=400.0,
+        capacity=10000.0,
+        seed=0,
+    ):
+        self.inverters = inverters
+        self.meters = meters
+        self.modules = modules
+        self.peak_power = peak_power
+        self.base_load = base_load
+        self.capacity = capacity
+        self.seed = seed
+        rng = random.Random(seed)
+        # per inverter orientation and per site cloud pattern
+        self._scale = [rng.uniform(0.85, 1.05) for _ in range(inverters)]
+        self._clouds = [rng.uniform(0, 2 * math.pi) for _ in range(3)]
+        self._module_offsets = [rng.uniform(-0.02, 0.02) for _ in range(modules)]
+        self._serials = [rng.randrange(10**7, 10**8) for _ in range(meters)]
+
+    def _noise(self, seconds, device, width):
+        # seeded by a string, which unlike hash() is stable across processes
+        rng = random.Random("{}/{}/{}".format(self.seed, seconds, device))
+        return rng.uniform(-width, width)
+
+    def _cloud_factor(self, hours):
+        a, b, c = self._clouds
+        factor = (
+            0.8
+            + 0.12 * math.sin(hours * 1.3 + a)
+            + 0.08 * math.sin(hours * 4.7 + b)
+            + 0.05 * math.sin(hours * 11.0 + c)
+        )
+        return min(max(factor, 0.2), 1.0)
+
+    def _state(self, when):
+        """
+        Physical state of the site at a point in time
+        """
+        hour = when.hour + when.minute / 60 + when.second / 3600
+        seconds = int(when.timestamp())
+        day = _daylight(hour)
+
+        inverters = []
+        for i, scale in enumerate(self._scale):
+            if day is None:
+                inverters.append(0.0)
+                continue
+            power = self.peak_power * scale * math.sin(math.pi * day)
+            power *= self._cloud_factor(seconds / 3600)
+            inverters.append(max(power * (1 + self._noise(seconds, i, 0.01)), 0.0))
+        pv = sum(inverters)
+
+        load = self.base_load * (
+            1
+            + 1.5 * math.exp(-(((hour - 7.5) / 1.0) ** 2))
+            + 2.5 * math.exp(-(((hour - 19.0) / 1.5) ** 2))
+        )
+        load *= 1 + self._noise(seconds, "load", 0.05)
+
+        # the battery fills up over the sunny hours and empties overnight
+        if self.modules:
+            if day is None:
+                night = (hour - _SUNSET) % 24 / (24 - (_SUNSET - _SUNRISE))
+                soc = 95 - 75 * night
+            else:
+                soc = 20 + 75 * min(day * 1.6, 1.0)
+            limit = self.capacity / 4
+            battery = max(min(load - pv, limit), -limit)
+            if soc >= 95 and battery < 0:
+                battery = 0.0
+        else:
+            soc, battery = None, 0.0
+        grid = load - pv - battery
+
+        # daily production as integral of the undisturbed curve
+        if day is None:
+            day_fraction = 0.0 if hour <= _SUNRISE else 1.0
+        else:
+            day_fraction = (1 - math.cos(math.pi * day)) / 2
+        day_energy = [
+            self.peak_power * scale * (_SUNSET - _SUNRISE) * 2 / math.pi * day_fraction
+            for scale in self._scale
+        ]
+        return {
+            "when": when,
+            "seconds": seconds,
+            "inverters": inverters,
+            "day_energy": day_energy,
+            "pv": pv,
+            "load": load,
+            "battery": battery,
+            "grid": grid,
+            "soc": soc,
+        }
+
+    def _year_energy(self, state, i):
+        day_of_year = state["when"].timetuple().tm_yday
+        yearly = self.peak_power * self._scale[i] * 4.0
+        return yearly * (day_of_year - 1) + state["day_energy"][i]
+
+    def _total_energy(self, state, i):
+        # about 4 kWh/kWp per day since 2015
+        days = (state["seconds"] - 1420070400) / 86400
+        return self.peak_power * self._scale[i] * 4.0 * days
+
+    def power_flow(self, state):
+        inverters = {}
+        for i in range(self.inverters):
+            inverter = {"DT": 102, "P": round(state["inverters"][i], 1)}
+            if i == 0 and self.modules:
+                inverter["Battery_Mode"] = "normal"
+                inverter["SOC"] = round(state["soc"], 1)
+            inverters[str(i + 1)] = inverter
+        pv, load = state["pv"], state["load"]
+        # locally consumed or stored production, i.e. not exported
+        self_consumed = pv - max(-state["grid"], 0)
+        site = {
+            "Mode": "bidirectional" if self.modules else "meter",
+            "Meter_Location": "grid",
+            "P_Grid": round(state["grid"], 2),
+            "P_Load": round(-load, 2),
+            "P_Akku": round(state["battery"], 2) if self.modules else None,
+            "P_PV": round(pv, 2),
+            "E_Day": round(sum(state["day_energy"]), 1),
+            "E_Year": round(
+                sum(self._year_energy(state, i) for i in range(self.inverters)), 1
+            ),
+            "E_Total": round(
+                sum(self._total_energy(state, i) for i in range(self.inverters)), 1
+            ),
+            "rel_Autonomy": round(
+                min(max(100 * (1 - max(state["grid"], 0) / load), 0), 100), 2
+            ),
+            "rel_SelfConsumption": (
+                round(min(max(100 * self_consumed / pv, 0), 100), 2) if pv else None
+            ),
+        }
+        if self.modules:
+            site["BatteryStandby"] = False
+        return {"Site": site, "Inverters": inverters, "Version": "12"}
+
+    def meter(self, state, meter):
+        """
+        Data of one meter: meter 0 measures the grid, the others share the load
+        """
+        seconds = state["seconds"]
+        if meter == 0:
+            power = state["grid"]
+        else:
+            power = state["load"] / max(self.meters - 1, 1)
+        voltage = [
+            230 + self._noise(seconds, ("voltage", meter, phase), 3)
+            for phase in range(3)
+        ]
+        phases = [
+            power / 3 * (1 + self._noise(seconds, ("power", meter, phase), 0.1))
+            for phase in range(3)
+        ]
+        factor = 0.95 + self._noise(seconds, ("factor", meter), 0.04)
+        mean = (
+            self.base_load * 2
+            if meter == 0
+            else self.base_load / max(self.meters - 1, 1)
+        )
+        # counters growing with the mean power since the epoch
+        consumed = mean * seconds / 3600
+        produced = (self.peak_power * self.inverters / 4 if meter == 0 else 0) * (
+            seconds / 3600
+        )
+        data = {
+            "Details": {
+                "Manufacturer": "Fronius",
+                "Model": "Smart Meter 63A",
+                "Serial": str(self._serials[meter]),
+            },
+            "Enable": 1,
+            "Visible": 1,
+            "TimeStamp": seconds,
+            "Meter_Location_Current": 0 if meter == 0 else 1,
+            "Frequency_Phase_Average": round(50 + self._noise(seconds, "f", 0.05), 2),
+            "PowerReal_P_Sum": round(sum(phases), 2),
+            "PowerApparent_S_Sum": round(abs(sum(phases)) / factor, 2),
+            "PowerReactive_Q_Sum": round(sum(phases) * 0.3, 2),
+            "PowerFactor_Sum": round(factor, 2),
+            "EnergyReal_WAC_Sum_Consumed": round(consumed),
+            "EnergyReal_WAC_Sum_Produced": round(produced),
+            "EnergyReal_WAC_Plus_Absolute": round(consumed),
+            "EnergyReal_WAC_Minus_Absolute": round(produced),
+            "EnergyReactive_VArAC_Sum_Consumed": round(consumed * 0.2),
+            "EnergyReactive_VArAC_Sum_Produced": round(produced * 0.2),
+        }
+        for phase in range(3):
+            n = phase + 1
+            data["Voltage_AC_Phase_{}".format(n)] = round(voltage[phase], 1)
+            data["Voltage_AC_PhaseToPhase_{}{}".format(n, n % 3 + 1)] = round(
+                voltage[phase] * math.sqrt(3), 1
+            )
+            data["Current_AC_Phase_{}".format(n)] = round(
+                abs(phases[phase]) / voltage[phase], 3
+            )
+            data["PowerReal_P_Phase_{}".format(n)] = round(phases[phase], 2)
+            data["PowerApparent_S_Phase_{}".format(n)] = round(
+                abs(phases[phase]) / factor, 2
+            )
+            data["PowerReactive_Q_Phase_{}".format(n)] = round(phases[phase] * 0.3, 2)
+            data["PowerFactor_Phase_{}".format(n)] = round(factor, 2)
+        return data
+
+    def storage(self, state):
+        seconds = state["seconds"]
+        soc = state["soc"]
+        # LiFePO4 cells, about 3.2 V empty and 3.4 V full
+        cell = 3.2 + 0.2 * soc / 100
+        current = -state["battery"] / (cell * _MODULE_CELLS * max(self.modules, 1))
+        modules = []
+        for i, offset in enumerate(self._module_offsets):
+            temperature = (
+                22 + 6 * abs(current) / 50 + self._noise(seconds, ("t", i), 0.5)
+            )
+            modules.append(
+                {
+                    "Details": {
+                        "Manufacturer": "BYD",
+                        "Model": "BYD Battery-Box HV",
+                        "Serial": "P3HV{:07d}".format(self.seed * 1000 + i),
+                    },
+                    "Enable": 1,
+                    "Capacity_Maximum": round(self.capacity / self.modules / 51.2, 2),
+                    "DesignedCapacity": round(self.capacity / self.modules / 51.2, 2),
+                    "Current_DC": round(current, 2),
+                    "Voltage_DC": round((cell + offset) * _MODULE_CELLS, 2),
+                    "Voltage_DC_Maximum_Cell": round(cell + offset + 0.01, 3),
+                    "Voltage_DC_Minimum_Cell": round(cell + offset - 0.01, 3),
+                    "StateOfCharge_Relative": round(
+                        min(max(soc + 100 * offset, 0), 100), 1
+                    ),
+                    "Temperature_Cell": round(temperature, 1),
+                    "Temperature_Cell_Maximum": round(temperature + 1, 1),
+                    "Temperature_Cell_Minimum": round(temperature - 1, 1),
+                    "CycleCount_BatteryCell": 300 + i,
+                    "Status_BatteryCell": 3,
+                }
+            )
+        controller = {
+            "Details": {
+                "Manufacturer": "BYD",
+                "Model": "BYD Battery-Box HV",
+                "Serial": "P3HV{:07d}".format(self.seed),
+            },
+            "Enable": 1,
+            "Capacity_Maximum": round(self.capacity / 51.2, 2),
+            "DesignedCapacity": round(self.capacity / 51.2, 2),
+            "Current_DC": round(current * self.modules, 2),
+            "Voltage_DC": round(cell * _MODULE_CELLS * self.modules, 2),
+            "Voltage_DC_Maximum_Cell": round(cell + 0.03, 3),
+            "Voltage_DC_Minimum_Cell": round(cell - 0.03, 3),
+            "StateOfCharge_Relative": round(soc, 1),
+            "Temperature_Cell": 24.0,
+        }
+        return {"Controller": controller, "Modules": modules}
+
+    def system_inverter(self, state):
+        inverters = [str(i + 1) for i in range(self.inverters)]
+        return {
+            "PAC": {
+                "Unit": "W",
+                "Values": {i: round(p) for i, p in zip(inverters, state["inverters"])},
+            },
+            "DAY_ENERGY": {
+                "Unit": "Wh",
+                "Values": {i: round(e) for i, e in zip(inverters, state["day_energy"])},
+            },
+            "YEAR_ENERGY": {
+                "Unit": "Wh",
+                "Values": {
+                    i: round(self._year_energy(state, n))
+                    for n, i in enumerate(inverters)
+                },
+            },
+            "TOTAL_ENERGY": {
+                "Unit": "Wh",
+                "Values": {
+                    i: round(self._total_energy(state, n))
+                    for n, i in enumerate(inverters)
+                },
+            },
+        }
+
+    def inverter(self, state, device, cumulative=False):
+        """
+        Data of one inverter (id 1 to inverters)
+        """
+        i = device - 1
+        power = state["inverters"][i]
+        running = power > 0
+        data = {
+            "PAC": {"Value": round(power), "Unit": "W"},
+            "DAY_ENERGY": {"Value": round(state["day_energy"][i]), "Unit": "Wh"},
+            "YEAR_ENERGY": {"Value": round(self._year_energy(state, i)), "Unit": "Wh"},
+            "TOTAL_ENERGY": {
+                "Value": round(self._total_energy(state, i)),
+                "Unit": "Wh",
+            },
+            "DeviceStatus": {
+                "StatusCode": 7 if running else 3,
+                "MgmtTimerRemainingTime": -1,
+                "ErrorCode": 0 if running else 306,
+                "LEDColor": 2,
+                "LEDState": 0,
+                "StateToReset": False,
+            },
+        }
+        if not cumulative and running:
+            voltage_dc = 350 + 100 * power / self.peak_power
+            voltage_ac = 230 + self._noise(state["seconds"], ("uac", i), 3)
+            data.update(
+                {
+                    "UAC": {"Value": round(voltage_ac, 1), "Unit": "V"},
+                    "IAC": {"Value": round(power / voltage_ac, 2), "Unit": "A"},
+                    "FAC": {"Value": 50, "Unit": "Hz"},
+                    "UDC": {"Value": round(voltage_dc, 1), "Unit": "V"},
+                    "IDC": {"Value": round(power / 0.97 / voltage_dc, 2), "Unit": "A"},
+                }
+            )
+        return data
+
+    @staticmethod
+    def led():
+        return {
+            name: {"Color": "green", "State": "on"}
+            for name in ("PowerLED", "SolarNetLED", "SolarWebLED", "WLANLED")
+        }
+
+    def replies(self, when, api_version=API_VERSION.V1):
+        """
+        All replies of the site at a point in time
+        :param when: Timezone aware datetime
+        :param api_version: API_VERSION.V0 or API_VERSION.V1
+        :return: Dictionary of url path (relative to the host, i.e.
+            "solar_api/v1/GetPowerFlowRealtimeData.fcgi") to reply
+        """
+        if api_version not in (API_VERSION.V0, API_VERSION.V1):
+            raise ValueError("Unsupported API version {}".format(api_version))
+        state = self._state(when)
+        v1 = api_version == API_VERSION.V1
+        device_key = "DeviceId" if v1 else "DeviceIndex"
+        base = API_BASEPATHS[api_version].strip("/")
+        res = {}
+
+        def add(spec, data, *formattings, **arguments):
+            url = spec[api_version].format(*formattings)
+            res["{}/{}".format(base, url)] = _reply(when, data, **arguments)
+
+        if v1:
+            res[URL_API_VERSION] = {"APIVersion": 1, "BaseURL": "/solar_api/v1/"}
+            add(URL_POWER_FLOW, self.power_flow(state))
+            add(URL_SYSTEM_LED, self.led())
+            add(
+                URL_SYSTEM_METER,
+                {str(m): self.meter(state, m) for m in range(self.meters)},
+                DeviceClass="Meter",
+                Scope="System",
+            )
+            for m in range(self.meters):
+                add(
+                    URL_DEVICE_METER,
+                    self.meter(state, m),
+                    m,
+                    DeviceClass="Meter",
+                    DeviceId=str(m),
+                    Scope="Device",
+                )
+            arguments = {"DeviceClass": "Storage", "Scope": "Device"}
+            if self.modules:
+                add(URL_DEVICE_STORAGE, self.storage(state), 0, **arguments)
+            else:
+                res["{}/{}".format(base, URL_DEVICE_STORAGE[api_version].format(0))] = (
+                    _reply(when, None, 255, "Storages are not supported", **arguments)
+                )
+        add(
+            URL_SYSTEM_INVERTER,
+            self.system_inverter(state),
+            DataCollection="",
+            Scope="System",
+        )
+        for device in range(1, self.inverters + 1):
+            for spec, collection, cumulative in (
+                (URL_DEVICE_INVERTER_COMMON, "CommonInverterData", False),
+                (URL_DEVICE_INVERTER_CUMULATIVE, "CumulationInverterData", True),
+            ):
+                add(
+                    spec,
+                    self.inverter(state, device, cumulative),
+                    device,
+                    DataCollection=collection,
+                    DeviceClass="Inverter",
+                    Scope="Device",
+                    **{device_key: str(device)}
+                )
+        return res
+
+    def write(self, directory, when, api_version=API_VERSION.V1):
+        """
+        Write the replies of a point in time as files, in the layout served
+        by the mock server of the tests
+        :return: List of the written paths
+        """
+        paths = []
+        for url, reply in self.replies(when, api_version).items():
+            path = Path(directory).joinpath(*url.split("/"))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("w") as file:
+                json.dump(reply, file, indent=4)
+            paths.append(path)
+        return paths
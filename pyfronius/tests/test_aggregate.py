@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import math
+import unittest
+
+# for the tests
+from .web_raw.v1 import web_state
+from pyfronius import _vector
+from pyfronius.aggregate import FleetAggregator
+
+
+def _reading(power, energy):
+    return {
+        "power_ac": {"value": power, "unit": "W"},
+        "energy_day": {"value": energy, "unit": "Wh"},
+    }
+
+
+class FleetAggregatorPythonTest(unittest.TestCase):
+
+    use_numpy = False
+
+    def setUp(self):
+        self.agg = FleetAggregator(("power_ac", "energy_day"), self.use_numpy)
+        for site, power, energy in (
+            ("a", 100, 1000),
+            ("b", 400, 3000),
+            ("c", None, 2000),
+            ("d", 200, 500),
+        ):
+            self.agg.add(site, _reading(power, energy))
+        # reading without any of the fields
+        self.agg.add("e", {})
+
+    def test_totals(self):
+        self.assertEqual(len(self.agg), 5)
+        self.assertEqual(self.agg.count("power_ac"), 3)
+        self.assertAlmostEqual(self.agg.sum("power_ac"), 700)
+        self.assertAlmostEqual(self.agg.mean("energy_day"), 1625)
+        self.assertAlmostEqual(self.agg.min("energy_day"), 500)
+        self.assertAlmostEqual(self.agg.max("power_ac"), 400)
+
+    def test_quantiles(self):
+        q = self.agg.quantiles("power_ac", (0, 0.5, 0.75, 1))
+        for value, expected in zip(q, (100, 200, 300, 400)):
+            self.assertAlmostEqual(value, expected)
+
+    def test_ranking(self):
+        self.assertEqual(self.agg.top("power_ac", 2), [("b", 400.0), ("d", 200.0)])
+        self.assertEqual(self.agg.top("energy_day", 1, largest=False), [("d", 500.0)])
+        self.assertEqual(self.agg.ranks("power_ac"), {"b": 1, "d": 2, "a": 3})
+
+    def test_summary_and_clear(self):
+        summary = self.agg.summary(qs=(0.5,))
+        self.assertAlmostEqual(summary["energy_day"]["sum"], 6500)
+        self.assertAlmostEqual(summary["power_ac"]["quantiles"][0.5], 200)
+        self.agg.clear()
+        self.assertEqual(len(self.agg), 0)
+        self.assertTrue(math.isnan(self.agg.sum("power_ac")))
+
+    def test_system_inverter_reading(self):
+        agg = FleetAggregator(use_numpy=self.use_numpy)
+        agg.add("site", web_state.GET_INVERTER_REALTIME_DATA_SYSTEM)
+        agg.add_inverters("site", web_state.GET_INVERTER_REALTIME_DATA_SYSTEM)
+        self.assertEqual(agg.sites, ["site", ("site", "1")])
+        self.assertAlmostEqual(agg.sum("energy_total"), 2 * 26213502)
+
+
+@unittest.skipUnless(_vector.np is not None, "NumPy not installed")
+class FleetAggregatorNumpyTest(FleetAggregatorPythonTest):
+
+    use_numpy = True
+
+
+if __name__ == "__main__":
+    unittest.main()
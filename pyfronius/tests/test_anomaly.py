@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import math
+import unittest
+
+# for the tests
+from .web_raw.v1 import web_state
+from pyfronius import _vector
+from pyfronius.anomaly import (
+    ANOMALY,
+    InverterAnomalyDetector,
+    samples_from_devices,
+    samples_from_system,
+)
+
+
+def _cycle(powers, site="s"):
+    return [(site, str(i), p) for i, p in enumerate(powers)]
+
+
+class SamplesTest(unittest.TestCase):
+    def test_samples_from_system(self):
+        self.assertEqual(
+            samples_from_system("s", web_state.GET_INVERTER_REALTIME_DATA_SYSTEM),
+            [("s", "1", 0)],
+        )
+
+    def test_samples_from_devices(self):
+        # the recorded inverter reports no AC power at night
+        readings = {1: web_state.GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE}
+        self.assertEqual(samples_from_devices("s", readings), [("s", 1, None)])
+        reading = {
+            "power_ac": {"value": 900},
+            "voltage_dc": {"value": 400},
+            "current_dc": {"value": 2.5},
+        }
+        self.assertEqual(
+            samples_from_devices("s", {1: reading}, dc=True), [("s", 1, 1000)]
+        )
+
+
+class InverterAnomalyPythonTest(unittest.TestCase):
+
+    use_numpy = False
+
+    def detector(self, **kwargs):
+        return InverterAnomalyDetector(use_numpy=self.use_numpy, warmup=3, **kwargs)
+
+    def test_underperformance(self):
+        detector = self.detector(alpha=0.5)
+        found = []
+        for _ in range(10):
+            found.append(detector.update(_cycle([1000, 1010, 990, 500, 1000])))
+        self.assertEqual(found[0], [])
+        self.assertEqual(
+            [(a.inverter, a.kind) for a in found[-1]],
+            [("3", ANOMALY.UNDERPERFORMANCE)],
+        )
+        self.assertAlmostEqual(found[-1][0].ratio, 0.5)
+        self.assertAlmostEqual(detector.baseline("s", "3")[0], 0.5)
+
+    def test_sudden_drop(self):
+        detector = self.detector()
+        for _ in range(5):
+            self.assertEqual(detector.update(_cycle([1000, 1000, 1000, 1000])), [])
+        # clouds: all inverters drop together
+        self.assertEqual(detector.update(_cycle([300, 300, 300, 300])), [])
+        res = detector.update(_cycle([1000, 100, 1000, 1000]))
+        self.assertEqual(
+            [(a.inverter, a.kind) for a in res], [("1", ANOMALY.SUDDEN_DROP)]
+        )
+
+    def test_night_not_scored(self):
+        detector = self.detector()
+        for _ in range(10):
+            self.assertEqual(detector.update(_cycle([10, 0, None, 20])), [])
+        self.assertTrue(math.isnan(detector.baseline("s", "0")[1]))
+
+    def test_scopes(self):
+        cycle = _cycle([1000, 1000, 1000], "a") + _cycle([400, 400, 400], "b")
+        site = self.detector()
+        fleet = self.detector(scope="fleet")
+        for _ in range(5):
+            site_res = site.update(cycle)
+            fleet_res = fleet.update(cycle)
+        # every site is consistent in itself, but site b lags behind the fleet
+        self.assertEqual(site_res, [])
+        self.assertEqual({a.site for a in fleet_res}, {"b"})
+        self.assertEqual(len(fleet_res), 3)
+        with self.assertRaises(ValueError):
+            InverterAnomalyDetector(scope="plant")
+
+
+@unittest.skipUnless(_vector.np is not None, "NumPy not installed")
+class InverterAnomalyNumpyTest(InverterAnomalyPythonTest):
+
+    use_numpy = True
+
+    def test_many_inverters(self):
+        detector = self.detector()
+        powers = [1000.0] * 100
+        powers[42] = 200.0
+        for _ in range(5):
+            res = detector.update(_cycle(powers))
+        self.assertEqual([a.inverter for a in res], ["42"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the server in this case
+import time
+
+# For the tests
+import aiohttp
+import asyncio
+import pyfronius
+from pyfronius.budget import Priority, RequestBudget
+from pyfronius.tests.web_raw.v1.web_state import GET_POWER_FLOW_REALTIME_DATA
+
+ADDRESS = "localhost"
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class RequestBudgetTest(unittest.TestCase):
+    def test_burst_granted_at_once(self):
+        budget = RequestBudget(rate=1, burst=3)
+
+        async def acquire():
+            for _ in range(3):
+                await budget.acquire("a")
+
+        start = time.monotonic()
+        run(acquire())
+        self.assertLess(time.monotonic() - start, 0.1)
+        self.assertEqual(budget.granted("a"), 3)
+        self.assertEqual(budget.mean_wait("a", Priority.INTERACTIVE), 0)
+
+    def test_rate_limited(self):
+        budget = RequestBudget(rate=20, burst=1)
+
+        async def acquire():
+            await asyncio.gather(*(budget.acquire("a") for _ in range(5)))
+
+        start = time.monotonic()
+        run(acquire())
+        # one at once, four at 20 per second
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+        self.assertEqual(budget.queue_depth(), 0)
+        self.assertGreater(budget.wait_percentile("a", Priority.INTERACTIVE, 100), 0.1)
+
+    def test_hosts_independent(self):
+        budget = RequestBudget(rate=0.1, burst=1)
+
+        async def acquire():
+            await budget.acquire("a")
+            await budget.acquire("b")
+
+        run(asyncio.wait_for(acquire(), 1))
+
+    def test_priority_overtakes(self):
+        budget = RequestBudget(rate=50, burst=1)
+        order = []
+
+        async def request(name, priority):
+            await budget.acquire("a", priority)
+            order.append(name)
+
+        async def schedule():
+            await budget.acquire("a")
+            tasks = [
+                asyncio.ensure_future(request("bulk{}".format(i), Priority.BULK))
+                for i in range(3)
+            ]
+            await asyncio.sleep(0)
+            self.assertEqual(budget.queue_depth("a", Priority.BULK), 3)
+            tasks.append(asyncio.ensure_future(request("control", Priority.CONTROL)))
+            await asyncio.gather(*tasks)
+
+        run(schedule())
+        self.assertEqual(order, ["control", "bulk0", "bulk1", "bulk2"])
+        stats = budget.stats("a")
+        self.assertEqual(stats["bulk"]["granted"], 3)
+        self.assertEqual(stats["control"]["queued"], 0)
+        self.assertGreater(stats["bulk"]["max_wait"], stats["control"]["max_wait"])
+
+    def test_cancelled_request_leaves_queue(self):
+        budget = RequestBudget(rate=10, burst=1)
+
+        async def schedule():
+            await budget.acquire("a")
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(budget.acquire("a", Priority.BULK), 0.01)
+            self.assertEqual(budget.queue_depth("a"), 0)
+            await asyncio.wait_for(budget.acquire("a"), 1)
+
+        run(schedule())
+        self.assertEqual(budget.granted("a"), 2)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            RequestBudget(rate=0)
+        with self.assertRaises(ValueError):
+            RequestBudget(burst=0)
+
+
+class FroniusBudgetTest(unittest.TestCase):
+
+    server = None
+    api_version = pyfronius.API_VERSION.V1
+    server_control = None
+    port = 0
+    url = "http://localhost:80"
+    session = None
+
+    def setUp(self):
+        handler = FroniusRequestHandler
+
+        max_retries = 10
+        r = 0
+        while not self.server:
+            try:
+                # Connect to any open port
+                self.server = FroniusServer(
+                    (ADDRESS, 0), handler, self.api_version.value
+                )
+            except OSError:
+                if r < max_retries:
+                    r += 1
+                else:
+                    raise
+                time.sleep(1)
+
+        self.server_control = Server(self.server)
+        self.port = self.server_control.get_port()
+        self.url = "http://{}:{}".format(ADDRESS, self.port)
+        # Start test server before running any tests
+        self.server_control.start_server()
+        self.session = aiohttp.ClientSession()
+
+    def test_shared_budget(self):
+        budget = RequestBudget(rate=100, burst=1)
+        control = pyfronius.Fronius(
+            self.session,
+            self.url,
+            self.api_version,
+            budget=budget,
+            priority=Priority.CONTROL,
+        )
+        bulk = pyfronius.Fronius(
+            self.session,
+            self.url,
+            self.api_version,
+            budget=budget,
+            priority=Priority.BULK,
+        )
+
+        async def fetch():
+            return await asyncio.gather(
+                control.current_power_flow(), bulk.current_power_flow()
+            )
+
+        self.assertEqual(run(fetch()), [GET_POWER_FLOW_REALTIME_DATA] * 2)
+        # the api version lookup counts as well
+        self.assertEqual(budget.granted(self.url, Priority.CONTROL), 2)
+        self.assertEqual(budget.granted(self.url, Priority.BULK), 2)
+
+    def tearDown(self):
+        run(self.session.close())
+        self.server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
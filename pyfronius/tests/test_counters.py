@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import os
+import sqlite3
+import tempfile
+import unittest
+
+# for the tests
+from .web_raw.v1 import web_state
+from pyfronius.counters import CounterTracker, DELTA_KIND, device_key
+
+
+def _meter(value, serial="123"):
+    return {
+        "energy_real_consumed": {"value": value, "unit": "Wh"},
+        "manufacturer": {"value": "Fronius"},
+        "model": {"value": "Smart Meter"},
+        "serial": {"value": serial},
+    }
+
+
+class CounterTrackerTest(unittest.TestCase):
+    def test_device_key(self):
+        self.assertEqual(device_key(_meter(0)), "Fronius/Smart Meter/123")
+        self.assertEqual(device_key(_meter(0, serial=""), default=0), "0")
+        with self.assertRaises(ValueError):
+            device_key({})
+
+    def test_deltas(self):
+        tracker = CounterTracker(max_jump=1000)
+        self.assertEqual(tracker.update("m", "c", 100, 0).kind, DELTA_KIND.INITIAL)
+        self.assertEqual(tracker.update("m", "c", 150, 10), (50, DELTA_KIND.NORMAL))
+        self.assertEqual(tracker.update("m", "c", 150, 20), (0, DELTA_KIND.NORMAL))
+        # counter restarted from zero
+        self.assertEqual(tracker.update("m", "c", 20, 30), (20, DELTA_KIND.RESET))
+        # replaced device with an arbitrary start value
+        self.assertEqual(tracker.update("m", "c", 5, 40), (5, DELTA_KIND.RESET))
+        self.assertEqual(tracker.update("m", "c", 10000, 50), (None, DELTA_KIND.JUMP))
+        self.assertEqual(tracker.update("m", "c", 10010, 60), (10, DELTA_KIND.NORMAL))
+        self.assertEqual(tracker.update("m", "c", 0, 70), (0, DELTA_KIND.RESET))
+
+    def test_max_rate(self):
+        tracker = CounterTracker(max_rate=1)
+        tracker.update("m", "c", 0, 0)
+        self.assertEqual(tracker.update("m", "c", 10, 10).kind, DELTA_KIND.NORMAL)
+        self.assertEqual(tracker.update("m", "c", 30, 11).kind, DELTA_KIND.JUMP)
+
+    def test_track_readings(self):
+        tracker = CounterTracker()
+        tracker.track(_meter(100), timestamp=0)
+        res = tracker.track(_meter(130), timestamp=1)
+        self.assertEqual(res, {"energy_real_consumed": (30, DELTA_KIND.NORMAL)})
+        res = tracker.track_system_meters(web_state.GET_METER_REALTIME_DATA_SYSTEM)
+        # the recorded meter provides no counters
+        self.assertEqual(res, {"0": {}})
+
+    def test_periodic_counters_not_tracked(self):
+        tracker = CounterTracker()
+        reading = dict(_meter(100), energy_day={"value": 5000, "unit": "Wh"})
+        tracker.track(reading, timestamp=0)
+        reading["energy_day"] = {"value": 0, "unit": "Wh"}
+        self.assertEqual(
+            list(tracker.track(reading, timestamp=1)), ["energy_real_consumed"]
+        )
+
+    def test_commit_interval(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "counters.sqlite")
+            tracker = CounterTracker(path, commit_interval=0)
+            tracker.update("m", "c", 100, 0)
+            db = sqlite3.connect(path)
+            self.assertEqual(
+                db.execute("SELECT value FROM counters").fetchall(), [(100,)]
+            )
+            db.close()
+            tracker.close()
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "counters.sqlite")
+            with CounterTracker(path) as tracker:
+                tracker.track(_meter(100), timestamp=0)
+            with CounterTracker(path) as tracker:
+                self.assertEqual(
+                    tracker.last("Fronius/Smart Meter/123", "energy_real_consumed"),
+                    (100, 0),
+                )
+                res = tracker.track(_meter(120), timestamp=1)
+                self.assertEqual(res["energy_real_consumed"].value, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
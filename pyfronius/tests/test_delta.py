@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import copy
+import unittest
+
+# for the tests
+from .web_raw.v1 import web_state
+from pyfronius.delta import DeltaFilter
+
+
+def _reading(timestamp, power_grid, meter_power=-367.722145):
+    reading = copy.deepcopy(web_state.GET_POWER_FLOW_REALTIME_DATA)
+    reading["timestamp"]["value"] = timestamp
+    reading["power_grid"]["value"] = power_grid
+    reading["meters"] = {"0": {"power_real": {"value": meter_power, "unit": "W"}}}
+    return reading
+
+
+class DeltaFilterTest(unittest.TestCase):
+    def test_first_reading_is_keyframe(self):
+        delta = DeltaFilter()
+        reading = _reading("t0", 100)
+        changes, keyframe = delta.filter("pf", reading, now=0)
+        self.assertTrue(keyframe)
+        self.assertEqual(changes, reading)
+
+    def test_changes_only(self):
+        delta = DeltaFilter({"power_grid": 10})
+        delta.filter("pf", _reading("t0", 100), now=0)
+        # within the deadband
+        self.assertEqual(delta.filter("pf", _reading("t1", 105), now=1), ({}, False))
+        # drift is measured against the last emitted value
+        changes, keyframe = delta.filter("pf", _reading("t2", 111), now=2)
+        self.assertFalse(keyframe)
+        self.assertEqual(
+            changes,
+            {
+                "timestamp": {"value": "t2"},
+                "power_grid": {"value": 111, "unit": "W"},
+            },
+        )
+        # nested fields keep their structure
+        changes, _ = delta.filter("pf", _reading("t3", 111, 5), now=3)
+        self.assertEqual(
+            changes["meters"], {"0": {"power_real": {"value": 5, "unit": "W"}}}
+        )
+
+    def test_non_numeric_changes(self):
+        delta = DeltaFilter(default_deadband=1000)
+        reading = _reading("t0", 100)
+        delta.filter("pf", reading, now=0)
+        reading = _reading("t1", 100)
+        reading["meter_location"]["value"] = "grid"
+        reading["power_battery"]["value"] = 5
+        changes, _ = delta.filter("pf", reading, now=1)
+        self.assertEqual(set(changes), {"timestamp", "meter_location", "power_battery"})
+
+    def test_keyframes(self):
+        delta = DeltaFilter(keyframe_interval=60)
+        delta.filter("pf", _reading("t0", 100), now=0)
+        delta.filter("meter", _reading("t0", 100), now=30)
+        self.assertEqual(delta.filter("pf", _reading("t1", 100), now=59), ({}, False))
+        changes, keyframe = delta.filter("pf", _reading("t2", 100), now=60)
+        self.assertTrue(keyframe)
+        self.assertEqual(changes, _reading("t2", 100))
+        # streams are independent
+        self.assertEqual(
+            delta.filter("meter", _reading("t1", 100), now=61), ({}, False)
+        )
+        delta.reset("meter")
+        self.assertTrue(delta.filter("meter", _reading("t1", 100), now=62)[1])
+
+    def test_in_place_updates(self):
+        delta = DeltaFilter()
+        reading = _reading("t0", 100)
+        delta.filter("pf", reading, now=0)
+        reading["power_grid"]["value"] = 200
+        changes, _ = delta.filter("pf", reading, now=1)
+        self.assertEqual(changes["power_grid"]["value"], 200)
+        # emitted changes do not change along with the reading
+        reading["power_grid"]["value"] = 300
+        reading["timestamp"]["value"] = "t2"
+        self.assertEqual(changes["power_grid"]["value"], 200)
+        self.assertEqual(changes["timestamp"]["value"], "t0")
+
+    def test_removed_fields(self):
+        delta = DeltaFilter()
+        reading = _reading("t0", 100)
+        reading["meters"]["1"] = {"power_real": {"value": 1, "unit": "W"}}
+        delta.filter("pf", reading, now=0)
+        reading = _reading("t1", 100)
+        del reading["power_battery"]
+        changes, _ = delta.filter("pf", reading, now=1)
+        self.assertEqual(
+            changes,
+            {
+                "timestamp": {"value": "t1"},
+                "power_battery": None,
+                "meters": {"1": {"power_real": None}},
+            },
+        )
+        self.assertEqual(delta.filter("pf", reading, now=2), ({}, False))
+
+
+if __name__ == "__main__":
+    unittest.main()
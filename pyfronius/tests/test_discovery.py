@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+from http.server import SimpleHTTPRequestHandler
+
+# For the tests
+import socket
+import asyncio
+import pyfronius
+from pyfronius.discovery import _expand_hosts, discover
+
+ADDRESS = "localhost"
+
+
+class ExpandHostsTest(unittest.TestCase):
+    def test_cidr(self):
+        self.assertEqual(list(_expand_hosts("10.0.0.0/30")), ["10.0.0.1", "10.0.0.2"])
+        self.assertEqual(len(list(_expand_hosts("10.0.0.0/22"))), 1022)
+
+    def test_single_hosts(self):
+        self.assertEqual(list(_expand_hosts("10.0.0.7")), ["10.0.0.7"])
+        self.assertEqual(
+            list(_expand_hosts(["localhost:8080", "10.0.0.1/32", "::1"])),
+            ["localhost:8080", "10.0.0.1", "[::1]"],
+        )
+
+
+class FroniusDiscoveryTest(unittest.TestCase):
+    def setUp(self):
+        self.servers = []
+        self.hosts = []
+        for api_version, handler in (
+            (1, FroniusRequestHandler),
+            (0, FroniusRequestHandler),
+            (1, FroniusRequestHandler),
+            # web server that is not a Fronius device
+            (1, SimpleHTTPRequestHandler),
+        ):
+            server_control = Server(FroniusServer((ADDRESS, 0), handler, api_version))
+            server_control.start_server()
+            self.servers.append(server_control)
+            self.hosts.append("{}:{}".format(ADDRESS, server_control.get_port()))
+        # closed port
+        with socket.socket() as s:
+            s.bind((ADDRESS, 0))
+            self.hosts.append("{}:{}".format(ADDRESS, s.getsockname()[1]))
+
+    def test_discover(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            discover(self.hosts, concurrency=3, timeout=5)
+        )
+        self.assertEqual([r["host"] for r in res], self.hosts[:3])
+        self.assertEqual(
+            [r["api_version"] for r in res],
+            [
+                pyfronius.API_VERSION.V1,
+                pyfronius.API_VERSION.V0,
+                pyfronius.API_VERSION.V1,
+            ],
+        )
+        self.assertEqual(res[0]["url"], "http://" + self.hosts[0])
+        self.assertEqual(res[0]["base_url"], "/solar_api/v1/")
+        self.assertEqual(res[1]["base_url"], "/solar_api/")
+
+    def tearDown(self):
+        for server_control in self.servers:
+            server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+
+# for the tests
+from .web_raw.v1 import web_state
+import datetime
+from pyfronius import energy
+from pyfronius.energy import PowerFlowIntegrator, _split_trapezoid
+
+
+def _reading(timestamp, grid=0, battery=None, pv=0, load=0):
+    return {
+        "timestamp": {"value": timestamp},
+        "power_grid": {"value": grid, "unit": "W"},
+        "power_battery": {"value": battery, "unit": "W"},
+        "power_photovoltaics": {"value": pv, "unit": "W"},
+        "power_load": {"value": load, "unit": "W"},
+    }
+
+
+class SplitTrapezoidTest(unittest.TestCase):
+    def test_same_sign(self):
+        self.assertEqual(_split_trapezoid(100, 300, 10), (2000, 0))
+        self.assertEqual(_split_trapezoid(-100, -300, 10), (0, 2000))
+
+    def test_sign_change(self):
+        # zero crossing after 5 seconds
+        self.assertEqual(_split_trapezoid(100, -100, 10), (250, 250))
+        pos, neg = _split_trapezoid(-300, 100, 4)
+        self.assertAlmostEqual(pos, 50)
+        self.assertAlmostEqual(neg, 450)
+
+
+class PowerFlowIntegratorTest(unittest.TestCase):
+    def test_integration(self):
+        integrator = PowerFlowIntegrator()
+        self.assertIsNone(
+            integrator.update(_reading("2020-06-01T12:00:00+02:00", 1000, 0, 0, -1000))
+        )
+        interval = integrator.update(
+            _reading("2020-06-01T12:01:00+02:00", -1000, -500, 3000, -1500)
+        )
+        self.assertAlmostEqual(interval["grid_import"], 1000 * 30 / 2 / 3600)
+        self.assertAlmostEqual(interval["grid_export"], 1000 * 30 / 2 / 3600)
+        self.assertAlmostEqual(interval["battery_charge"], 500 * 60 / 2 / 3600)
+        self.assertAlmostEqual(interval["pv_production"], 3000 * 60 / 2 / 3600)
+        self.assertAlmostEqual(interval["load_consumption"], 2500 * 60 / 2 / 3600)
+        day = integrator.day()
+        self.assertEqual(integrator.days, ["2020-06-01"])
+        self.assertEqual(integrator.months, ["2020-06"])
+        self.assertAlmostEqual(day["pv_production"], interval["pv_production"])
+        self.assertAlmostEqual(
+            day["relative_autonomy"],
+            (1 - interval["grid_import"] / interval["load_consumption"]) * 100,
+        )
+        self.assertEqual(integrator.month("2020-06"), day)
+
+    def test_gaps_and_duplicates(self):
+        integrator = PowerFlowIntegrator(max_gap=60)
+        integrator.update(_reading("2020-06-01T12:00:00+02:00", 1000))
+        self.assertIsNone(integrator.update(_reading("2020-06-01T12:00:00+02:00")))
+        self.assertIsNone(integrator.update(_reading("2020-06-01T13:00:00+02:00")))
+        self.assertEqual(integrator.gaps, 1)
+        self.assertIsNone(integrator.day())
+        interval = integrator.update(_reading("2020-06-01T13:00:30+02:00", 100))
+        self.assertAlmostEqual(interval["grid_import"], 50 * 30 / 3600)
+
+    def test_day_rollover(self):
+        integrator = PowerFlowIntegrator(retain_days=1)
+        integrator.update(_reading("2020-06-01T23:59:30+02:00", 100))
+        integrator.update(_reading("2020-06-02T00:00:30+02:00", 100))
+        self.assertEqual(integrator.days, ["2020-06-02"])
+        self.assertIsNone(integrator.day()["relative_autonomy"])
+
+    def test_recorded_reading(self):
+        integrator = PowerFlowIntegrator()
+        integrator.update(web_state.GET_POWER_FLOW_REALTIME_DATA)
+        reading = dict(web_state.GET_POWER_FLOW_REALTIME_DATA)
+        reading["timestamp"] = {"value": "2019-01-10T23:34:12+01:00"}
+        interval = integrator.update(reading)
+        self.assertAlmostEqual(interval["grid_import"], 367.722145 / 60)
+        self.assertEqual(interval["pv_production"], 0)
+
+    def test_timestamp_formats(self):
+        for value in (
+            "2019-01-10T23:34:12+01:00",
+            "2019-01-10T22:34:12Z",
+            "2019-01-10T23:34:12.000+0100",
+        ):
+            self.assertEqual(
+                energy._parse_timestamp({"timestamp": {"value": value}}),
+                datetime.datetime(
+                    2019, 1, 10, 22, 34, 12, tzinfo=datetime.timezone.utc
+                ),
+            )
+        with self.assertRaises(ValueError):
+            energy._parse_timestamp({"timestamp": {"value": "yesterday"}})
+
+    def test_missing_timestamp(self):
+        with self.assertRaises(ValueError):
+            PowerFlowIntegrator().update({})
+
+
+if __name__ == "__main__":
+    unittest.main()
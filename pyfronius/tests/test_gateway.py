@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the tests
+import json
+import aiohttp
+import asyncio
+from aiohttp import web
+import pyfronius
+from pyfronius.gateway import FroniusGateway, upstream_path
+from pyfronius.tests.test_structure.fronius_mock_server import SERVER_DIR
+from pyfronius.tests.web_raw.v1.web_state import GET_POWER_FLOW_REALTIME_DATA
+
+ADDRESS = "localhost"
+POWER_FLOW_PATH = "/solar_api/v1/GetPowerFlowRealtimeData.fcgi"
+
+
+class FroniusGatewayTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FroniusServer(
+            (ADDRESS, 0), FroniusRequestHandler, pyfronius.API_VERSION.V1.value
+        )
+        self.server_control = Server(self.server)
+        self.server_control.start_server()
+        self.upstream_url = "http://{}:{}".format(
+            ADDRESS, self.server_control.get_port()
+        )
+        self.loop = asyncio.get_event_loop()
+        self.session = aiohttp.ClientSession()
+        self.gateway = FroniusGateway(
+            pyfronius.Fronius(self.session, self.upstream_url), cache_ttl=60
+        )
+        self.runner = web.AppRunner(self.gateway.make_app())
+        self.loop.run_until_complete(self.runner.setup())
+        self.loop.run_until_complete(web.TCPSite(self.runner, ADDRESS, 0).start())
+        self.url = "http://{}:{}".format(ADDRESS, self.runner.addresses[0][1])
+
+    def test_proxy_reply(self):
+        async def get():
+            async with self.session.get(self.url + POWER_FLOW_PATH) as res:
+                return res.status, await res.json()
+
+        status, body = self.loop.run_until_complete(get())
+        self.assertEqual(status, 200)
+        with SERVER_DIR.joinpath(
+            "v1", "solar_api", "v1", "GetPowerFlowRealtimeData.fcgi"
+        ).open() as f:
+            self.assertEqual(body, json.load(f))
+
+    def test_coalesce_requests(self):
+        async def get():
+            async with self.session.get(self.url + POWER_FLOW_PATH) as res:
+                return await res.read()
+
+        async def get_many():
+            return await asyncio.gather(*[get() for _ in range(10)])
+
+        bodies = self.loop.run_until_complete(get_many())
+        self.assertEqual(len(set(bodies)), 1)
+        self.assertEqual(self.gateway.upstream_requests, 1)
+        self.loop.run_until_complete(get())
+        self.assertEqual(self.gateway.upstream_requests, 1)
+        self.assertGreaterEqual(self.gateway.cache_hits, 1)
+
+    def test_cache_key_normalised(self):
+        async def get(query):
+            async with self.session.get(self.url + POWER_FLOW_PATH + query) as res:
+                return await res.read()
+
+        self.loop.run_until_complete(get(""))
+        self.loop.run_until_complete(get("?_=1234"))
+        self.assertEqual(self.gateway.upstream_requests, 1)
+        self.assertEqual(
+            upstream_path(
+                "/solar_api/v1/GetMeterRealtimeData.cgi",
+                [("Scope", "Device"), ("x", "1"), ("DeviceId", "0"), ("Scope", "x")],
+            ),
+            "/solar_api/v1/GetMeterRealtimeData.cgi?Scope=Device&DeviceId=0",
+        )
+
+    def test_expired_entries_evicted(self):
+        self.gateway.cache_ttl = 0
+        self.gateway.max_entries = 2
+        for path in (POWER_FLOW_PATH, "/solar_api/v1/GetLoggerLEDInfo.cgi"):
+            self.loop.run_until_complete(self.gateway.get(path))
+        self.assertEqual(len(self.gateway._cache), 1)
+
+    def test_client_through_gateway(self):
+        fronius = pyfronius.Fronius(self.session, self.url)
+        res = self.loop.run_until_complete(fronius.current_power_flow())
+        self.assertDictEqual(res, GET_POWER_FLOW_REALTIME_DATA)
+        self.assertEqual(fronius.api_version, pyfronius.API_VERSION.V1)
+
+    def test_not_found(self):
+        async def get():
+            async with self.session.get(self.url + "/solar_api/missing") as res:
+                return res.status
+
+        self.assertEqual(self.loop.run_until_complete(get()), 404)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.runner.cleanup())
+        self.loop.run_until_complete(self.session.close())
+        self.server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the server in this case
+import time
+
+# For the tests
+import aiohttp
+import asyncio
+import pyfronius
+from pyfronius.hub import ReadingHub
+from pyfronius.tests.web_raw.v1.web_state import GET_POWER_FLOW_REALTIME_DATA
+
+ADDRESS = "localhost"
+
+
+def run(coro):
+    return asyncio.get_event_loop().run_until_complete(coro)
+
+
+class ReadingHubTest(unittest.TestCase):
+    def test_published_once(self):
+        hub = ReadingHub()
+        first, second = hub.subscribe(), hub.subscribe("latest")
+        reading = {"power_grid": {"value": 1, "unit": "W"}}
+        hub.publish("a", "power_flow", None, reading, timestamp=1)
+        one, two = first.get_nowait(), second.get_nowait()
+        self.assertIs(one, two)
+        self.assertIs(one.reading, reading)
+        self.assertEqual(one[:4], ("a", "power_flow", None, 1))
+        self.assertIsNone(first.get_nowait())
+
+    def test_all_bounded(self):
+        hub = ReadingHub()
+        sub = hub.subscribe("all", maxsize=3)
+        for i in range(5):
+            hub.publish("a", "power_flow", None, i)
+        self.assertEqual((sub.pending, sub.dropped, sub.lag), (3, 2, 5))
+        self.assertEqual([sub.get_nowait().reading for _ in range(3)], [2, 3, 4])
+        self.assertEqual((sub.pending, sub.delivered, sub.lag), (0, 3, 2))
+
+    def test_latest_conflated(self):
+        hub = ReadingHub()
+        sub = hub.subscribe("latest")
+        for i in range(5):
+            hub.publish("a", "power_flow", None, i)
+        self.assertEqual(sub.get_nowait().reading, 4)
+        self.assertEqual(sub.dropped, 4)
+        self.assertEqual(
+            hub.lag(), [{"policy": "latest", "pending": 0, "dropped": 4, "lag": 4}]
+        )
+
+    def test_sample(self):
+        hub = ReadingHub()
+        sub = hub.subscribe("sample", interval=1)
+        received = []
+        for i in range(6):
+            hub.publish("a", "power_flow", None, i, timestamp=i * 0.5)
+            item = sub.get_nowait()
+            if item is not None:
+                received.append(item.reading)
+        self.assertEqual(received, [0, 2, 4])
+        self.assertEqual(sub.dropped, 3)
+
+    def test_endpoint_filter(self):
+        hub = ReadingHub()
+        sub = hub.subscribe(endpoints={"system_meter"})
+        hub.publish("a", "power_flow", None, 1)
+        hub.publish("a", "system_meter", None, 2)
+        self.assertEqual(sub.get_nowait().reading, 2)
+        self.assertEqual(sub.offered, 1)
+
+    def test_invalid_policy(self):
+        hub = ReadingHub()
+        with self.assertRaises(ValueError):
+            hub.subscribe("newest")
+        with self.assertRaises(ValueError):
+            hub.subscribe("sample")
+        with self.assertRaises(ValueError):
+            hub.subscribe("all", maxsize=0)
+
+    def test_async_iteration(self):
+        hub = ReadingHub()
+        sub = hub.subscribe()
+
+        async def consume():
+            return [item.reading async for item in sub]
+
+        async def produce():
+            for i in range(3):
+                await asyncio.sleep(0)
+                hub.publish("a", "power_flow", None, i)
+            hub.close()
+
+        received, _ = run(asyncio.gather(consume(), produce()))
+        self.assertEqual(received, [0, 1, 2])
+        self.assertEqual(hub.subscriptions, [])
+
+
+class ReadingHubPollTest(unittest.TestCase):
+
+    server = None
+    api_version = pyfronius.API_VERSION.V1
+    server_control = None
+    port = 0
+    url = "http://localhost:80"
+    session = None
+
+    def setUp(self):
+        handler = FroniusRequestHandler
+
+        max_retries = 10
+        r = 0
+        while not self.server:
+            try:
+                # Connect to any open port
+                self.server = FroniusServer(
+                    (ADDRESS, 0), handler, self.api_version.value
+                )
+            except OSError:
+                if r < max_retries:
+                    r += 1
+                else:
+                    raise
+                time.sleep(1)
+
+        self.server_control = Server(self.server)
+        self.port = self.server_control.get_port()
+        self.url = "http://{}:{}".format(ADDRESS, self.port)
+        # Start test server before running any tests
+        self.server_control.start_server()
+        self.session = aiohttp.ClientSession()
+
+    def test_poll(self):
+        hub = ReadingHub()
+        sub = hub.subscribe()
+        fronius = pyfronius.Fronius(self.session, self.url, self.api_version)
+        run(hub.poll(fronius, rate=100, count=2))
+        self.assertEqual(hub.published, 2)
+        item = sub.get_nowait()
+        self.assertEqual((item.url, item.endpoint), (self.url, "power_flow"))
+        self.assertEqual(item.reading, GET_POWER_FLOW_REALTIME_DATA)
+        # persistent readings would change under the buffered items
+        persistent = pyfronius.Fronius(
+            self.session, self.url, self.api_version, persistent=True
+        )
+        with self.assertRaises(ValueError):
+            run(hub.poll(persistent, rate=100, count=1))
+
+    def tearDown(self):
+        run(self.session.close())
+        self.server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import subprocess
+import sys
+import unittest
+
+CHECK = """
+import sys
+import pyfronius
+from pyfronius import Fronius, URL_POWER_FLOW, ENDPOINT_FIELDS
+
+reading = Fronius._meter_data({"PowerReal_P_Sum": 1.0})
+assert reading["power_real"]["value"] == 1.0, reading
+print(",".join(m for m in sys.argv[1:] if m in sys.modules))
+"""
+
+CLI_CHECK = """
+import sys
+from pyfronius.__main__ import main
+
+try:
+    main(sys.argv[1].split())
+except SystemExit:
+    pass
+print(",".join(m for m in sys.argv[2:] if m in sys.modules), file=sys.stderr)
+"""
+
+
+class ImportTest(unittest.TestCase):
+    def test_http_stack_imported_lazily(self):
+        deferred = ("aiohttp", "asyncio", "json", "concurrent.futures")
+        res = subprocess.run(
+            [sys.executable, "-c", CHECK] + list(deferred),
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        self.assertEqual(res.stdout.strip(), "")
+
+    def test_cli_imports_command_only(self):
+        for command, deferred in (
+            ("--help", ("aiohttp",)),
+            ("poll --help", ("aiohttp", "pyfronius.gateway", "pyfronius.live")),
+        ):
+            res = subprocess.run(
+                [sys.executable, "-c", CLI_CHECK, command] + list(deferred),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                check=True,
+            )
+            self.assertEqual(res.stderr.strip(), "", command)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the server in this case
+import time
+
+# For the tests
+import aiohttp
+import asyncio
+import pyfronius
+import concurrent.futures
+from pyfronius.latency import LatencyTracker, LoopLagMonitor
+from pyfronius.tests.web_raw.v1.web_state import (
+    GET_POWER_FLOW_REALTIME_DATA,
+    GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
+)
+
+ADDRESS = "localhost"
+
+
+class LatencyTrackerTest(unittest.TestCase):
+    def test_initial_timeout(self):
+        tracker = LatencyTracker(initial_timeout=7)
+        self.assertEqual(tracker.timeout("a"), 7)
+        self.assertIsNone(tracker.latency_percentile("a"))
+
+    def test_percentile_timeout(self):
+        tracker = LatencyTracker(percentile=90, factor=2, min_timeout=0)
+        for i in range(1, 11):
+            tracker.record("a", i / 10)
+        self.assertAlmostEqual(tracker.latency_percentile("a"), 0.9)
+        self.assertAlmostEqual(tracker.timeout("a"), 1.8)
+        # other endpoints are unaffected
+        self.assertEqual(tracker.timeout("b"), tracker.initial_timeout)
+
+    def test_timeout_bounds(self):
+        tracker = LatencyTracker(min_timeout=1, max_timeout=5)
+        tracker.record("fast", 0.01)
+        tracker.record("slow", 100)
+        self.assertEqual(tracker.timeout("fast"), 1)
+        self.assertEqual(tracker.timeout("slow"), 5)
+
+    def test_window(self):
+        tracker = LatencyTracker(window=3, percentile=100, factor=1, min_timeout=0)
+        for latency in (10, 1, 1, 1):
+            tracker.record("a", latency)
+        self.assertEqual(tracker.timeout("a"), 1)
+
+    def test_reset(self):
+        tracker = LatencyTracker()
+        tracker.record("a", 1)
+        tracker.record("b", 3)
+        tracker.reset("a")
+        self.assertIsNone(tracker.latency_percentile("a"))
+        self.assertEqual(tracker.latency_percentile("b"), 3)
+
+    def test_invalid_percentile(self):
+        with self.assertRaises(ValueError):
+            LatencyTracker(percentile=101)
+
+
+class LoopLagMonitorTest(unittest.TestCase):
+    def test_blocking_call_shows_as_lag(self):
+        async def block():
+            monitor = LoopLagMonitor(interval=0.01)
+            async with monitor:
+                await asyncio.sleep(0.05)
+                time.sleep(0.2)
+                await asyncio.sleep(0.05)
+            return monitor
+
+        monitor = asyncio.get_event_loop().run_until_complete(block())
+        self.assertGreater(monitor.samples, 1)
+        self.assertGreaterEqual(monitor.maximum, 0.15)
+        self.assertGreaterEqual(monitor.lag_percentile(100), 0.15)
+        self.assertLess(monitor.lag_percentile(0), 0.15)
+        monitor.reset()
+        self.assertIsNone(monitor.mean())
+        self.assertEqual(monitor.maximum, 0)
+
+
+class FroniusAdaptiveTimeoutTest(unittest.TestCase):
+
+    server = None
+    api_version = pyfronius.API_VERSION.V1
+    server_control = None
+    port = 0
+    url = "http://localhost:80"
+    session = None
+    fronius = None
+
+    def setUp(self):
+        handler = FroniusRequestHandler
+
+        max_retries = 10
+        r = 0
+        while not self.server:
+            try:
+                # Connect to any open port
+                self.server = FroniusServer(
+                    (ADDRESS, 0), handler, self.api_version.value
+                )
+            except OSError:
+                if r < max_retries:
+                    r += 1
+                else:
+                    raise
+                time.sleep(1)
+
+        self.server_control = Server(self.server)
+        self.port = self.server_control.get_port()
+        self.url = "http://{}:{}".format(ADDRESS, self.port)
+        # Start test server before running any tests
+        self.server_control.start_server()
+        # set up a fronius client and aiohttp session
+        self.session = aiohttp.ClientSession()
+        self.tracker = LatencyTracker()
+        self.fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, latency_tracker=self.tracker
+        )
+
+    def test_latency_recorded(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.current_power_flow()
+        )
+        self.assertDictEqual(res, GET_POWER_FLOW_REALTIME_DATA)
+        # version lookup and power flow request were both tracked
+        self.assertEqual(len(self.tracker._samples), 2)
+        for key in self.tracker._samples:
+            self.assertTrue(key.startswith(self.url))
+            self.assertIsNotNone(self.tracker.latency_percentile(key))
+
+    def test_fetch_deadline(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.fetch(
+                power_flow=True,
+                system_meter=False,
+                system_inverter=False,
+                device_meter=(),
+                device_storage=(),
+                device_inverter=(1,),
+                deadline=10,
+            )
+        )
+        self.assertEqual(
+            res, [GET_POWER_FLOW_REALTIME_DATA, GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE]
+        )
+
+    def test_offloaded_decoding(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            fronius = pyfronius.Fronius(
+                self.session,
+                self.url,
+                self.api_version,
+                offload_threshold=0,
+                executor=executor,
+            )
+            res = asyncio.get_event_loop().run_until_complete(
+                fronius.current_power_flow()
+            )
+        self.assertDictEqual(res, GET_POWER_FLOW_REALTIME_DATA)
+
+    def test_offloaded_decoding_process_pool(self):
+        with concurrent.futures.ProcessPoolExecutor(1) as executor:
+            fronius = pyfronius.Fronius(
+                self.session,
+                self.url,
+                self.api_version,
+                offload_threshold=0,
+                executor=executor,
+            )
+            res = asyncio.get_event_loop().run_until_complete(
+                fronius.current_inverter_data()
+            )
+            self.assertDictEqual(res, GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE)
+            with self.assertRaises(ValueError):
+                pyfronius.Fronius(
+                    self.session, self.url, persistent=True, executor=executor
+                )
+
+    def test_fetch_deadline_exceeded(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.fetch(deadline=0)
+        )
+        self.assertEqual(res, [{}] * 6)
+
+    def tearDown(self):
+        asyncio.get_event_loop().run_until_complete(self.session.close())
+        self.server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
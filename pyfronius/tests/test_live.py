@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+
+# For the tests
+import json
+import aiohttp
+import asyncio
+from aiohttp import web
+from pyfronius.hub import ReadingHub
+from pyfronius.live import LiveServer
+
+ADDRESS = "localhost"
+READING = {"power_grid": {"value": 100.5, "unit": "W"}}
+
+
+class FakeRequest:
+    remote = "peer"
+    transport = None
+    query = {}
+
+
+class LiveServerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = asyncio.get_event_loop()
+        self.session = aiohttp.ClientSession()
+        self.hub = ReadingHub()
+        self.live = LiveServer(self.hub, max_pending=4)
+        self.runner = web.AppRunner(self.live.make_app())
+        self.loop.run_until_complete(self.runner.setup())
+        self.loop.run_until_complete(web.TCPSite(self.runner, ADDRESS, 0).start())
+        self.url = "http://{}:{}".format(ADDRESS, self.runner.addresses[0][1])
+
+    def run_until(self, coro):
+        return self.loop.run_until_complete(asyncio.wait_for(coro, 5))
+
+    async def wait_clients(self, count):
+        while self.live.clients < count:
+            await asyncio.sleep(0.01)
+
+    def test_serialized_once(self):
+        async def stream():
+            events = await self.session.get(self.url + "/events")
+            ws = await self.session.ws_connect(self.url + "/ws")
+            filtered = await self.session.ws_connect(
+                self.url + "/ws?endpoints=system_meter"
+            )
+            await self.wait_clients(3)
+            self.hub.publish("http://a", "power_flow", None, READING, timestamp=1)
+            self.hub.publish("http://a", "system_meter", None, READING, timestamp=2)
+            line = await events.content.readline()
+            self.assertEqual(await events.content.readline(), b"\n")
+            message = await ws.receive_bytes()
+            other = await filtered.receive_bytes()
+            await ws.close()
+            await filtered.close()
+            events.close()
+            return line, message, other
+
+        line, message, other = self.run_until(stream())
+        self.assertEqual(line, b"data: " + message)
+        self.assertEqual(
+            json.loads(message),
+            {
+                "host": "http://a",
+                "endpoint": "power_flow",
+                "device": None,
+                "time": 1,
+                "data": READING,
+            },
+        )
+        self.assertEqual(json.loads(other)["endpoint"], "system_meter")
+        # one serialization per reading, whatever the number of clients
+        self.assertEqual(self.live.encoded, 2)
+
+    def test_closed_clients_removed(self):
+        async def connect():
+            ws = await self.session.ws_connect(self.url + "/ws")
+            await self.wait_clients(1)
+            await ws.close()
+            while self.live.clients:
+                self.hub.publish("http://a", "power_flow", None, READING)
+                await asyncio.sleep(0.01)
+
+        self.run_until(connect())
+        self.assertEqual(self.live.slow_disconnects, 0)
+
+    def test_slow_client_disconnected(self):
+        async def never(frame):
+            await asyncio.sleep(3600)
+
+        client = self.live._client(FakeRequest(), never, False)
+        task = asyncio.ensure_future(client.run())
+        for i in range(6):
+            self.hub.publish("http://a", "power_flow", None, i)
+        self.run_until(asyncio.sleep(0.05))
+        self.assertEqual(self.live.slow_disconnects, 1)
+        self.assertEqual(self.live.clients, 0)
+        self.assertTrue(client.closed)
+        task.cancel()
+
+    def test_slow_client_skips(self):
+        self.live.slow_policy = "skip"
+        client = self.live._client(FakeRequest(), None, False)
+        for i in range(6):
+            self.live.broadcast(self.hub.publish("http://a", "power_flow", None, i))
+        self.assertEqual((len(client.frames), client.skipped), (4, 2))
+        self.assertEqual(json.loads(client.frames[0])["data"], 2)
+
+    def test_invalid_policy(self):
+        with self.assertRaises(ValueError):
+            LiveServer(self.hub, slow_policy="block")
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.runner.cleanup())
+        self.loop.run_until_complete(self.session.close())
+
+
+if __name__ == "__main__":
+    unittest.main()
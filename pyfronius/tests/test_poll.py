@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import argparse
+import asyncio
+import io
+import json
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the tests
+import pyfronius
+from pyfronius import poll
+from pyfronius.tests.web_raw.v1.web_state import (
+    GET_METER_REALTIME_DATA_SYSTEM,
+    GET_POWER_FLOW_REALTIME_DATA,
+)
+
+ADDRESS = "localhost"
+
+
+class PollFormatTest(unittest.TestCase):
+    def test_flatten(self):
+        flat = poll.flatten(GET_METER_REALTIME_DATA_SYSTEM)
+        self.assertEqual(flat["meters.0.power_real"], -367.722145)
+        self.assertEqual(flat["status.Code"], 0)
+        self.assertNotIn("meters.0.power_real.unit", flat)
+
+    def test_line_protocol(self):
+        line = poll.line_protocol(
+            "http://a b", "device_meter", 0, 1.5, GET_METER_REALTIME_DATA_SYSTEM
+        )
+        _, fields, timestamp = line.decode().rstrip("\n").split(" ")[-3:]
+        self.assertTrue(line.startswith(b"device_meter,host=http://a\\ b,device=0 "))
+        self.assertEqual(timestamp, "1500000000")
+        self.assertIn("meters.0.power_real=-367.722145", fields)
+        # integers are written as floats, devices send either for a field
+        self.assertIn("meters.0.enable=1.0", fields)
+        self.assertIn('status.Reason=""', fields)
+        self.assertIsNone(poll.line_protocol("a", "power_flow", None, 0, {}))
+
+    def test_positive_rate(self):
+        self.assertEqual(poll.positive_rate("0.5"), 0.5)
+        with self.assertRaises(argparse.ArgumentTypeError):
+            poll.positive_rate("0")
+        with self.assertRaises(ValueError):
+            asyncio.get_event_loop().run_until_complete(
+                poll.poll(["http://a"], io.BytesIO(), rate=0)
+            )
+
+    def test_parse_endpoints(self):
+        kwargs = poll.parse_endpoints("power_flow,device_meter,device_meter:2")
+        self.assertTrue(kwargs["power_flow"])
+        self.assertFalse(kwargs["system_meter"])
+        self.assertEqual(kwargs["device_meter"], (0, 2))
+        self.assertEqual(kwargs["device_inverter"], ())
+        with self.assertRaises(ValueError):
+            poll.parse_endpoints("archive")
+
+
+class PollTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FroniusServer(
+            (ADDRESS, 0), FroniusRequestHandler, pyfronius.API_VERSION.V1.value
+        )
+        self.server_control = Server(self.server)
+        self.server_control.start_server()
+        self.url = "http://{}:{}".format(ADDRESS, self.server_control.get_port())
+
+    def poll(self, **kwargs):
+        out = io.BytesIO()
+        lines = asyncio.get_event_loop().run_until_complete(
+            poll.poll([self.url, self.url], out, rate=20, count=2, **kwargs)
+        )
+        return lines, out.getvalue().splitlines()
+
+    def test_ndjson(self):
+        lines, output = self.poll(endpoints="power_flow,device_meter:0")
+        self.assertEqual(lines, 8)
+        records = [json.loads(line) for line in output]
+        self.assertEqual(len(records), 8)
+        flows = [r for r in records if r["endpoint"] == "power_flow"]
+        self.assertEqual(len(flows), 4)
+        self.assertEqual(flows[0]["host"], self.url)
+        self.assertIsNone(flows[0]["device"])
+        self.assertEqual(flows[0]["data"], GET_POWER_FLOW_REALTIME_DATA)
+
+    def test_flat_fields(self):
+        _, output = self.poll(
+            endpoints=("power_flow",), fields=["power_grid"], flat=True
+        )
+        record = json.loads(output[0])
+        self.assertEqual(
+            set(record),
+            {
+                "host",
+                "endpoint",
+                "device",
+                "time",
+                "timestamp",
+                "status.Code",
+                "status.Reason",
+                "status.UserMessage",
+                "power_grid",
+            },
+        )
+
+    def test_line_format(self):
+        lines, output = self.poll(endpoints="system_inverter", format="line")
+        self.assertEqual(lines, 4)
+        self.assertTrue(
+            all(line.startswith(b"system_inverter,host=") for line in output)
+        )
+
+    def tearDown(self):
+        self.server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
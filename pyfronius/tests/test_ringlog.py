@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import datetime
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+# For the tests
+from pyfronius import Fronius, ringlog
+from pyfronius.ringlog import HEADER_SIZE, RECORD, RingLog, RingLogReader
+from pyfronius.synthetic import SyntheticSite
+
+
+def synthetic_readings():
+    """
+    System meter and storage readings of a site with 2 meters and 8 modules
+    """
+    site = SyntheticSite(inverters=2, meters=2, modules=8)
+    when = datetime.datetime(2021, 6, 21, 12, tzinfo=datetime.timezone.utc)
+    replies = site.replies(when)
+    meter = replies["solar_api/v1/GetMeterRealtimeData.cgi?Scope=System"]
+    storage = replies["solar_api/v1/GetStorageRealtimeData.cgi?Scope=Device&DeviceId=0"]
+    return [
+        Fronius._system_meter_data({}, meter["Body"]["Data"]),
+        Fronius._device_storage_data({}, storage["Body"]["Data"]),
+    ]
+
+
+class RingLogTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, "readings.log")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_requires_capacity_to_create(self):
+        with self.assertRaises(ValueError):
+            RingLog(self.path)
+
+    def test_file_size_fixed(self):
+        with RingLog(self.path, capacity=8) as log:
+            for i in range(20):
+                log.append("a", "power_grid", i, timestamp=i)
+        self.assertEqual(os.path.getsize(self.path), HEADER_SIZE + 8 * RECORD.size)
+
+    def test_wraps_around(self):
+        with RingLog(self.path, capacity=4) as log:
+            for i in range(10):
+                log.append("a", "power_grid", i, timestamp=100 + i)
+            self.assertEqual((log.tail, log.head, len(log)), (6, 10, 4))
+        with RingLogReader(self.path) as reader:
+            records = list(reader.read())
+            self.assertEqual([r.value for r in records], [6, 7, 8, 9])
+            self.assertEqual([r.sequence for r in records], [6, 7, 8, 9])
+            self.assertEqual(records[0].timestamp, 106)
+            self.assertEqual(records[0].device, "a")
+            self.assertEqual(records[0].field, "power_grid")
+            # start before the tail begins at the oldest kept
+            self.assertEqual([r.value for r in reader.read(2)], [6, 7, 8, 9])
+            self.assertEqual([r.value for r in reader.read(8)], [8, 9])
+
+    def test_append_reading(self):
+        reading = {
+            "power_flow": {"value": 1000.5, "unit": "W"},
+            "status": {"Code": 0, "Reason": "", "UserMessage": ""},
+            "meter_mode": {"value": "meter", "unit": ""},
+            "meters": {"0": {"power_real": {"value": 20, "unit": "W"}}},
+        }
+        with RingLog(self.path, capacity=16) as log:
+            self.assertEqual(log.append_reading("http://a", reading, timestamp=1), 2)
+        with RingLogReader(self.path) as reader:
+            self.assertEqual(
+                [(r.device, r.field, r.value) for r in reader.read()],
+                [
+                    ("http://a", "power_flow", 1000.5),
+                    ("http://a", "meters.0.power_real", 20.0),
+                ],
+            )
+
+    def test_many_names(self):
+        with RingLog(self.path, capacity=1024) as log:
+            count = sum(
+                log.append_reading("http://a", reading, timestamp=1)
+                for reading in synthetic_readings()
+            )
+            self.assertEqual(log.head, count)
+            self.assertEqual(len(log.fields), count)
+
+    def test_header_size(self):
+        with RingLog(self.path, capacity=128, header_size=3072) as log:
+            log.append("a", "power_grid", 1)
+        self.assertEqual(os.path.getsize(self.path), 3072 + 128 * RECORD.size)
+        with RingLog(self.path) as log:
+            self.assertEqual(log.header_size, 3072)
+            meter, storage = synthetic_readings()
+            log.append_reading("a", meter)
+            head, fields = log.head, list(log.fields)
+            # names that do not fit add neither names nor records
+            with self.assertRaises(ValueError):
+                log.append_reading("a", storage)
+            self.assertEqual((log.head, log.fields), (head, fields))
+            log.append("a", "power_grid", 2)
+        with RingLogReader(self.path) as reader:
+            self.assertEqual(reader.fields, fields)
+            self.assertEqual(len(list(reader.read())), head + 1)
+
+    def test_field_id_limit(self):
+        with RingLog(self.path, capacity=8) as log:
+            log.append("a", "power_grid", 1)
+            with mock.patch.object(ringlog, "MAX_FIELDS", 2):
+                with self.assertRaises(ValueError):
+                    log.append_reading(
+                        "a",
+                        {
+                            "power_load": {"value": 2},
+                            "power_pv": {"value": 3},
+                        },
+                    )
+            self.assertEqual((log.head, log.fields), (1, ["power_grid"]))
+
+    def test_reader_sees_complete_names(self):
+        with RingLog(self.path, capacity=8) as log:
+            log.append("a", "power_grid", 1)
+            with RingLogReader(self.path) as reader:
+                self.assertEqual(reader.fields, ["power_grid"])
+                # names being written beyond the length are not read yet
+                length = struct.unpack_from("<I", log._map, 36)[0]
+                log._map[40 + length : 40 + length + 5] = b'["fie'
+                reader._load_names()
+                self.assertEqual(reader.fields, ["power_grid"])
+                log.append("b", "power_load", 2)
+                self.assertEqual(
+                    [(r.device, r.field) for r in reader.read()],
+                    [("a", "power_grid"), ("b", "power_load")],
+                )
+
+    def test_reopen_keeps_names(self):
+        with RingLog(self.path, capacity=16) as log:
+            log.append("a", "power_grid", 1)
+            log.append("b", "power_load", 2)
+        with RingLog(self.path) as log:
+            self.assertEqual(log.head, 2)
+            log.append("b", "power_grid", 3)
+            self.assertEqual(log.devices, ["a", "b"])
+            self.assertEqual(log.fields, ["power_grid", "power_load"])
+        with RingLogReader(self.path) as reader:
+            self.assertEqual(
+                [(r.device, r.field) for r in reader.read()],
+                [("a", "power_grid"), ("b", "power_load"), ("b", "power_grid")],
+            )
+
+    def test_recovers_records_missing_from_header(self):
+        with RingLog(self.path, capacity=4) as log:
+            for i in range(6):
+                log.append("a", "power_grid", i)
+        # simulate a crash before the header update of the last two appends
+        with open(self.path, "r+b") as file:
+            file.seek(16)
+            file.write(struct.pack("<QQ", 4, 0))
+        with RingLog(self.path) as log:
+            self.assertEqual((log.tail, log.head), (2, 6))
+        with RingLogReader(self.path) as reader:
+            self.assertEqual([r.value for r in reader.read()], [2, 3, 4, 5])
+
+    def test_reader_follows_writer(self):
+        with RingLog(self.path, capacity=4) as log:
+            log.append("a", "power_grid", 1)
+            with RingLogReader(self.path) as reader:
+                follow = reader.follow(interval=0)
+                log.append("a", "power_grid", 2)
+                self.assertEqual(next(follow).value, 2)
+                # overwritten records are skipped
+                for i in range(3, 9):
+                    log.append("a", "power_grid", i)
+                self.assertEqual(next(follow).value, 5)
+                reader.close()
+
+    def test_not_a_ring_log(self):
+        with open(self.path, "wb") as file:
+            file.write(b"\0" * HEADER_SIZE)
+        with self.assertRaises(ValueError):
+            RingLogReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import math
+import random
+import unittest
+from unittest import mock
+
+# For the tests
+from pyfronius import series
+from pyfronius.series import CompressedSeries, SeriesStore
+
+
+def voltage(count, seed=1):
+    """
+    Slowly varying meter field polled every second with jitter
+    """
+    rnd = random.Random(seed)
+    points = []
+    timestamp, value = 1.7e9, 230.0
+    for _ in range(count):
+        timestamp += 1 + (rnd.random() - 0.5) * 0.2
+        if rnd.random() < 0.05:
+            value = round(value + rnd.choice((-0.1, 0.1)), 1)
+        points.append((timestamp, value))
+    return points
+
+
+class CompressedSeriesTest(unittest.TestCase):
+    def test_roundtrip(self):
+        points = voltage(3000)
+        s = CompressedSeries(block_size=256)
+        for timestamp, value in points:
+            s.append(timestamp, value)
+        self.assertEqual(len(s), 3000)
+        self.assertEqual(len(s.blocks()), 12)
+        self.assertEqual(list(s), [(round(t), v) for t, v in points])
+
+    def test_special_values(self):
+        values = [0.0, -0.0, math.inf, -math.inf, 1e300, 5e-324, -1.5, 2**53]
+        s = CompressedSeries(block_size=3, resolution=0.001)
+        for i, value in enumerate(values):
+            s.append(i * 1234.567, value)
+        s.append(1e9, math.nan)
+        decoded = list(s)
+        self.assertEqual([v for _, v in decoded[:-1]], values)
+        self.assertEqual(math.copysign(1, decoded[1][1]), -1)
+        self.assertTrue(math.isnan(decoded[-1][1]))
+        self.assertEqual(decoded[3][0], 3703.701)
+
+    def test_resolution_rounding(self):
+        s = CompressedSeries(resolution=0.1)
+        for i in range(10):
+            s.append(i * 0.1, i)
+        # without float noise, i.e. 0.30000000000000004
+        self.assertEqual([t for t, _ in s], [i / 10 for i in range(10)])
+
+    def test_compression(self):
+        s = CompressedSeries()
+        for timestamp, value in voltage(10000):
+            s.append(timestamp, value)
+        # against 16 bytes per point of two doubles
+        self.assertGreater(16 * len(s) / s.nbytes, 10)
+
+    def test_range_decodes_overlapping_blocks(self):
+        s = CompressedSeries(block_size=100)
+        for i in range(1000):
+            s.append(i, i / 2)
+        with mock.patch.object(series, "_decode", wraps=series._decode) as decode:
+            points = s.range(250, 260)
+        self.assertEqual(points, [(i, i / 2) for i in range(250, 260)])
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(len(s.range(990)), 10)
+        self.assertEqual(s.range(2000), [])
+
+    def test_decreasing_timestamp(self):
+        s = CompressedSeries(block_size=2)
+        s.append(10, 1)
+        s.append(11, 1)
+        with self.assertRaises(ValueError):
+            s.append(9, 1)
+        with self.assertRaises(ValueError):
+            CompressedSeries(block_size=1)
+
+
+class SeriesStoreTest(unittest.TestCase):
+    def test_append_reading(self):
+        store = SeriesStore(block_size=16)
+        for i in range(40):
+            reading = {
+                "power_grid": {"value": 100 + i, "unit": "W"},
+                "meter_location": {"value": "grid", "unit": ""},
+                "meters": {"0": {"power_real": {"value": i, "unit": "W"}}},
+            }
+            self.assertEqual(store.append_reading("a", reading, 1000 + i), 2)
+        self.assertEqual(
+            sorted(store.keys()), [("a", "meters.0.power_real"), ("a", "power_grid")]
+        )
+        self.assertEqual(
+            store.range("a", "power_grid", 1010, 1012), [(1010, 110), (1011, 111)]
+        )
+        self.assertEqual(store.range("b", "power_grid"), [])
+        self.assertGreater(store.nbytes, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
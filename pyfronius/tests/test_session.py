@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the tests
+import asyncio
+import pyfronius
+from pyfronius.tests.web_raw.v1.web_state import GET_POWER_FLOW_REALTIME_DATA
+
+ADDRESS = "localhost"
+
+
+class FroniusSessionTest(unittest.TestCase):
+    def test_connector_settings(self):
+        async def check():
+            async with pyfronius.create_session(
+                limit_per_host=3, ttl_dns_cache=60, timeout=5
+            ) as session:
+                self.assertEqual(session.connector.limit_per_host, 3)
+                self.assertEqual(session.connector.limit, 100)
+                self.assertTrue(session.connector.use_dns_cache)
+                self.assertEqual(session.timeout.total, 5)
+            self.assertTrue(session.closed)
+
+        asyncio.get_event_loop().run_until_complete(check())
+
+    def test_no_dns_cache(self):
+        async def check():
+            async with pyfronius.create_session(ttl_dns_cache=None) as session:
+                self.assertFalse(session.connector.use_dns_cache)
+
+        asyncio.get_event_loop().run_until_complete(check())
+
+    def test_fetch_with_session(self):
+        server = FroniusServer(
+            (ADDRESS, 0), FroniusRequestHandler, pyfronius.API_VERSION.V1.value
+        )
+        server_control = Server(server)
+        server_control.start_server()
+        url = "http://{}:{}".format(ADDRESS, server_control.get_port())
+
+        async def fetch():
+            async with pyfronius.create_session() as session:
+                fronius = pyfronius.Fronius(session, url)
+                # more concurrent requests than connections per host
+                return await asyncio.gather(
+                    *[fronius.current_power_flow() for _ in range(5)]
+                )
+
+        try:
+            res = asyncio.get_event_loop().run_until_complete(fetch())
+        finally:
+            server_control.stop_server()
+        self.assertEqual(res, [GET_POWER_FLOW_REALTIME_DATA] * 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import math
+import unittest
+
+# for the tests
+from pyfronius import Fronius, _vector
+from pyfronius.storage import StorageStack
+
+
+def _module(v_min, v_max, t_max, soc, cycles):
+    return {
+        "Voltage_DC_Minimum_Cell": v_min,
+        "Voltage_DC_Maximum_Cell": v_max,
+        "Temperature_Cell_Maximum": t_max,
+        "StateOfCharge_Relative": soc,
+        "CycleCount_BatteryCell": cycles,
+        "Capacity_Maximum": 50,
+        "Enable": 1,
+    }
+
+
+RAW_STORAGE = {
+    "Controller": {"StateOfCharge_Relative": 60, "Enable": 1},
+    "Modules": [
+        _module(3.30, 3.35, 25.0, 61, 100),
+        _module(3.31, 3.36, 26.0, 60, 102),
+        _module(3.05, 3.34, 25.5, 52, 180),
+        _module(3.30, 3.35, 38.0, 61, 101),
+        _module(3.32, 3.36, 25.2, 62, 99),
+    ],
+}
+
+
+class StorageStackPythonTest(unittest.TestCase):
+
+    use_numpy = False
+
+    def test_raw_and_reading_agree(self):
+        reading = Fronius._device_storage_data({}, RAW_STORAGE)
+        raw = StorageStack.from_raw(RAW_STORAGE, self.use_numpy)
+        converted = StorageStack.from_reading(reading, self.use_numpy)
+        self.assertEqual(len(raw), 5)
+        for field in raw.columns:
+            for a, b in zip(raw.columns[field], converted.columns[field]):
+                self.assertTrue(a == b or (math.isnan(a) and math.isnan(b)))
+
+    def test_analyze(self):
+        res = StorageStack.from_raw(RAW_STORAGE, self.use_numpy).analyze()
+        self.assertEqual(res["module_count"], 5)
+        self.assertAlmostEqual(res["cell_voltage_spread"], 0.31)
+        self.assertEqual(res["weakest_module"], 2)
+        self.assertEqual(res["hottest_module"], 3)
+        self.assertAlmostEqual(res["temperature_maximum"], 38.0)
+        self.assertAlmostEqual(res["state_of_charge_imbalance"], 10)
+        self.assertAlmostEqual(res["state_of_charge_mean"], 59.2)
+        self.assertAlmostEqual(res["cycle_count_maximum"], 180)
+        self.assertEqual(res["outliers"]["voltage_dc_minimum_cell"], [2])
+        self.assertEqual(res["outliers"]["temperature_cell_maximum"], [3])
+        self.assertEqual(res["outliers"]["state_of_charge"], [2])
+        self.assertEqual(res["outliers"]["capacity_maximum"], [])
+
+    def test_no_modules(self):
+        res = StorageStack.from_raw({}, self.use_numpy).analyze()
+        self.assertEqual(res["module_count"], 0)
+        self.assertIsNone(res["weakest_module"])
+        self.assertTrue(math.isnan(res["cell_voltage_spread"]))
+
+
+@unittest.skipUnless(_vector.np is not None, "NumPy not installed")
+class StorageStackNumpyTest(StorageStackPythonTest):
+
+    use_numpy = True
+
+
+if __name__ == "__main__":
+    unittest.main()
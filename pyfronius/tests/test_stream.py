@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import json
+import unittest
+
+# For the tests
+from pyfronius.stream import RecordParser
+
+REPLY = {
+    "Head": {"Status": {"Code": 0, "Reason": ""}, "Timestamp": "2019-01-10"},
+    "Body": {
+        "Data": {
+            "0": {"Details": {"Model": 'Smart Meter "63A" {3}'}, "Values": [1, 2]},
+            "1": {"PowerReal_P_Sum": -1.5e3, "Enable": None},
+            "2": True,
+        }
+    },
+}
+
+
+def parse(parser, text, chunk_size):
+    events = []
+    for i in range(0, len(text), chunk_size):
+        events += parser.feed(text[i : i + chunk_size])
+    return events + parser.close()
+
+
+class RecordParserTest(unittest.TestCase):
+    def test_records_at_any_chunk_size(self):
+        text = json.dumps(REPLY, indent=2)
+        data = REPLY["Body"]["Data"]
+        expected = [(("Head",), REPLY["Head"])] + [
+            (("Body", "Data", key), data[key]) for key in data
+        ]
+        for chunk_size in range(1, len(text) + 1):
+            self.assertEqual(parse(RecordParser(), text, chunk_size), expected)
+
+    def test_records_emitted_when_complete(self):
+        text = json.dumps(REPLY)
+        parser = RecordParser()
+        events = parser.feed(text[: text.index('"1"')])
+        self.assertEqual(
+            [path for path, _ in events], [("Head",), ("Body", "Data", "0")]
+        )
+        # only the unfinished record stays buffered
+        self.assertLess(len(parser._buf), 10)
+
+    def test_array_records(self):
+        text = json.dumps(
+            {"Body": {"Data": {"Controller": {}, "Modules": [{}, {"a": 1}]}}}
+        )
+        events = parse(RecordParser(("Body", "Data", "Modules")), text, 7)
+        self.assertEqual(
+            events,
+            [
+                (("Body", "Data", "Controller"), {}),
+                (("Body", "Data", "Modules", 0), {}),
+                (("Body", "Data", "Modules", 1), {"a": 1}),
+            ],
+        )
+
+    def test_invalid_documents(self):
+        for text in ('{"Body": {"Data": {"0": 1}', '{"Body" 1}', "[1] 2", '{"a": 1]'):
+            with self.assertRaises(ValueError):
+                parse(RecordParser(), text, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import unittest
+from .test_structure.server_control import Server
+from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+
+# For the server in this case
+import time
+
+# For the tests
+import concurrent.futures
+import gc
+import warnings
+import pyfronius
+from pyfronius.sync import BackgroundLoop, FroniusSync
+from pyfronius.tests.web_raw.v1.web_state import (
+    GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
+    GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+    GET_POWER_FLOW_REALTIME_DATA,
+)
+
+ADDRESS = "localhost"
+
+
+class FroniusSyncTest(unittest.TestCase):
+
+    server = None
+    api_version = pyfronius.API_VERSION.V1
+    server_control = None
+    port = 0
+    url = "http://localhost:80"
+
+    def setUp(self):
+        handler = FroniusRequestHandler
+
+        max_retries = 10
+        r = 0
+        while not self.server:
+            try:
+                # Connect to any open port
+                self.server = FroniusServer(
+                    (ADDRESS, 0), handler, self.api_version.value
+                )
+            except OSError:
+                if r < max_retries:
+                    r += 1
+                else:
+                    raise
+                time.sleep(1)
+
+        self.server_control = Server(self.server)
+        self.port = self.server_control.get_port()
+        self.url = "http://{}:{}".format(ADDRESS, self.port)
+        # Start test server before running any tests
+        self.server_control.start_server()
+        self.fronius = FroniusSync(self.url, self.api_version, timeout=10)
+
+    def test_current_data(self):
+        self.assertEqual(
+            self.fronius.current_power_flow(), GET_POWER_FLOW_REALTIME_DATA
+        )
+        self.assertEqual(
+            self.fronius.current_meter_data(), GET_METER_REALTIME_DATA_SCOPE_DEVICE
+        )
+        self.assertEqual(
+            self.fronius.current_power_flow.__doc__,
+            pyfronius.Fronius.current_power_flow.__doc__,
+        )
+
+    def test_fetch(self):
+        res = self.fronius.fetch(
+            power_flow=True,
+            system_meter=False,
+            system_inverter=False,
+            device_meter=(),
+            device_storage=(),
+            device_inverter=(1,),
+        )
+        self.assertEqual(
+            res, [GET_POWER_FLOW_REALTIME_DATA, GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE]
+        )
+
+    def test_batch(self):
+        res = self.fronius.batch(["current_power_flow", ("current_meter_data", 0)])
+        self.assertEqual(
+            res, [GET_POWER_FLOW_REALTIME_DATA, GET_METER_REALTIME_DATA_SCOPE_DEVICE]
+        )
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            with self.assertRaises(AttributeError):
+                self.fronius.batch(["current_power_flow", ("unknown_data", 0)])
+            with self.assertRaises(TypeError):
+                self.fronius.batch(
+                    ["current_power_flow", ("current_meter_data", 0, 1, 2)]
+                )
+            gc.collect()
+        # no coroutine is left behind without being awaited
+        self.assertEqual([w for w in caught if w.category is RuntimeWarning], [])
+
+    def test_threads_share_instance(self):
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            results = list(
+                executor.map(lambda _: self.fronius.current_power_flow(), range(16))
+            )
+        self.assertEqual(results, [GET_POWER_FLOW_REALTIME_DATA] * 16)
+
+    def test_shared_background(self):
+        background = BackgroundLoop()
+        try:
+            with FroniusSync(self.url, background=background) as first:
+                first.current_power_flow()
+            # closing an instance leaves a shared loop running
+            second = FroniusSync(self.url, background=background)
+            self.assertEqual(second.current_power_flow(), GET_POWER_FLOW_REALTIME_DATA)
+        finally:
+            background.close()
+        with self.assertRaises(RuntimeError):
+            second.current_power_flow()
+
+    def tearDown(self):
+        self.fronius.close()
+        self.server_control.stop_server()
+
+
+if __name__ == "__main__":
+    unittest.main()
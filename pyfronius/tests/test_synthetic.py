@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import datetime
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+# For the tests
+from pyfronius import API_VERSION, Fronius
+from pyfronius.synthetic import SyntheticSite
+
+TZ = datetime.timezone(datetime.timedelta(hours=2))
+DAY = datetime.datetime(2021, 6, 21, tzinfo=TZ)
+
+
+def convert(fun, reply):
+    return Fronius._convert_reply(fun, {}, None, reply)
+
+
+class SyntheticSiteTest(unittest.TestCase):
+    def setUp(self):
+        self.site = SyntheticSite(inverters=5, meters=3, modules=8, seed=1)
+
+    def test_topology(self):
+        replies = self.site.replies(DAY + datetime.timedelta(hours=12))
+        meters = convert(
+            Fronius._system_meter_data,
+            replies["solar_api/v1/GetMeterRealtimeData.cgi?Scope=System"],
+        )
+        self.assertEqual(sorted(meters["meters"]), ["0", "1", "2"])
+        self.assertEqual(len(meters["meters"]["0"]["serial"]["value"]), 8)
+        inverters = convert(
+            Fronius._system_inverter_data,
+            replies["solar_api/v1/GetInverterRealtimeData.cgi?Scope=System"],
+        )
+        self.assertEqual(len(inverters["inverters"]), 5)
+        self.assertGreater(inverters["power_ac"]["value"], 0)
+        storage = convert(
+            Fronius._device_storage_data,
+            replies["solar_api/v1/GetStorageRealtimeData.cgi?Scope=Device&DeviceId=0"],
+        )
+        self.assertEqual(len(storage["modules"]), 8)
+        self.assertIn("state_of_charge", storage)
+
+    def test_power_balance(self):
+        for hour in range(24):
+            replies = self.site.replies(DAY + datetime.timedelta(hours=hour))
+            site = replies["solar_api/v1/GetPowerFlowRealtimeData.fcgi"]["Body"][
+                "Data"
+            ]["Site"]
+            total = site["P_Grid"] + site["P_Akku"] + site["P_PV"] + site["P_Load"]
+            self.assertAlmostEqual(total, 0, delta=0.1)
+            self.assertGreaterEqual(site["P_PV"], 0)
+            if hour < 5:
+                self.assertEqual(site["P_PV"], 0)
+
+    def test_daily_curve(self):
+        energy = []
+        for hour in range(24):
+            flow = convert(
+                Fronius._system_power_flow,
+                self.site.replies(DAY + datetime.timedelta(hours=hour))[
+                    "solar_api/v1/GetPowerFlowRealtimeData.fcgi"
+                ],
+            )
+            energy.append(flow["energy_day"]["value"])
+        self.assertEqual(energy[0], 0)
+        self.assertEqual(energy, sorted(energy))
+        self.assertGreater(energy[-1], 0)
+
+    def test_reproducible(self):
+        when = DAY + datetime.timedelta(hours=9, minutes=17, seconds=3)
+        other = SyntheticSite(inverters=5, meters=3, modules=8, seed=1)
+        self.assertEqual(self.site.replies(when), other.replies(when))
+
+    def test_api_v0(self):
+        replies = self.site.replies(DAY, API_VERSION.V0)
+        self.assertIn(
+            "solar_api/GetInverterRealtimeData.cgi?Scope=Device&DeviceIndex=5&"
+            "DataCollection=CommonInverterData",
+            replies,
+        )
+        self.assertFalse(any(url.startswith("solar_api/v1") for url in replies))
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = self.site.write(directory, DAY)
+            path = Path(directory, "solar_api", "GetAPIVersion.cgi")
+            self.assertIn(path, paths)
+            with path.open() as file:
+                self.assertEqual(json.load(file)["APIVersion"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
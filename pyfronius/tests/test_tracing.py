@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# general requirements
+import logging
+import unittest
+
+# For the tests
+from pyfronius.tracing import PayloadTracer
+
+
+class Payload:
+    """
+    Counts how often it is formatted
+    """
+
+    formatted = 0
+
+    def __str__(self):
+        Payload.formatted += 1
+        return "payload"
+
+
+class PayloadTracerTest(unittest.TestCase):
+    def setUp(self):
+        Payload.formatted = 0
+        self.logger = logging.getLogger("pyfronius.tests.tracing")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def test_ring_per_device(self):
+        tracer = PayloadTracer(ring_size=2, logger=self.logger)
+        for i in range(3):
+            tracer.record("a", "power flow", i)
+        tracer.record("b", "power flow", "b")
+        self.assertEqual([t.payload for t in tracer.dump("a")], [1, 2])
+        self.assertEqual([t.payload for t in tracer.dump("b")], ["b"])
+        tracer.clear("a")
+        self.assertEqual(tracer.dump("a"), [])
+
+    def test_not_formatted_when_disabled(self):
+        tracer = PayloadTracer(logger=self.logger)
+        tracer.record("a", "power flow", Payload())
+        tracer.log_dump("a", level=logging.DEBUG)
+        self.assertEqual(Payload.formatted, 0)
+
+    def test_sampling_per_endpoint(self):
+        self.logger.setLevel(logging.DEBUG)
+        tracer = PayloadTracer(
+            ring_size=0,
+            sample_rates={"meter": 0.25},
+            default_rate=0,
+            logger=self.logger,
+        )
+        with self.assertLogs(self.logger, logging.DEBUG) as logs:
+            for _ in range(8):
+                tracer.record("a", "meter", "m")
+                tracer.record("a", "inverter", "i")
+        # the first reply is logged, a rate of 0 logs none
+        self.assertEqual(len(logs.records), 2)
+        self.assertTrue(all(r.endpoint == "meter" for r in logs.records))
+        self.assertEqual(tracer.dump("a"), [])
+
+    def test_dump(self):
+        tracer = PayloadTracer(logger=self.logger)
+        tracer.record("a", "power flow", Payload())
+        with self.assertLogs(self.logger, logging.WARNING) as logs:
+            tracer.log_dump("a", "KeyError('Site')")
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("payload", logs.output[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,7 +13,9 @@ import time
 # For the tests
 import aiohttp
 import asyncio
+from unittest import mock
 import pyfronius
+from pyfronius.tracing import PayloadTracer
 from pyfronius.tests.web_raw.v0.web_state import (
     GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
     GET_INVERTER_REALTIME_DATA_SYSTEM,
@@ -214,6 +216,17 @@ class FroniusWebTestV0(unittest.TestCase):
         self.assertDictEqual(res, {})
         # Mainly asserts that no error is thrown by illegal access!
 
+    def test_fronius_unsupported_not_dumped(self):
+        tracer = PayloadTracer()
+        fronius = pyfronius.Fronius(self.session, self.url, tracer=tracer)
+        with mock.patch.object(tracer, "log_dump") as log_dump:
+            for _ in range(2):
+                asyncio.get_event_loop().run_until_complete(
+                    fronius.current_storage_data()
+                )
+                asyncio.get_event_loop().run_until_complete(fronius.current_led_data())
+        log_dump.assert_not_called()
+
     def tearDown(self):
         asyncio.get_event_loop().run_until_complete(self.session.close())
         self.server_control.stop_server()
@@ -238,6 +238,206 @@ class FroniusWebTestV1(unittest.TestCase):
             ],
         )
 
+    def test_fronius_fetch_named(self):
+        res = asyncio.get_event_loop().run_until_complete(self.fronius.fetch_named())
+        self.assertEqual(
+            res,
+            {
+                ("power_flow", None): GET_POWER_FLOW_REALTIME_DATA,
+                ("system_meter", None): GET_METER_REALTIME_DATA_SYSTEM,
+                ("system_inverter", None): GET_INVERTER_REALTIME_DATA_SYSTEM,
+                ("device_meter", 0): GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+                ("device_storage", 0): GET_STORAGE_REALTIME_DATA_SCOPE_DEVICE,
+                ("device_inverter", 1): GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
+            },
+        )
+
+    def test_fronius_fetch_named_partial_failure(self):
+        async def fail(device=0, fields=None):
+            raise ConnectionError("meter unreachable")
+
+        self.fronius.current_meter_data = fail
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.fetch_named(device_storage=(), device_inverter=())
+        )
+        self.assertIsInstance(res[("device_meter", 0)], ConnectionError)
+        self.assertEqual(res[("power_flow", None)], GET_POWER_FLOW_REALTIME_DATA)
+        self.assertEqual(res[("system_meter", None)], GET_METER_REALTIME_DATA_SYSTEM)
+
+    def test_fronius_fetch_named_deadline(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.fetch_named(deadline=0)
+        )
+        self.assertEqual(len(res), 6)
+        for result in res.values():
+            self.assertIsInstance(result, asyncio.TimeoutError)
+
+    def test_fronius_power_flow_projection(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.current_power_flow(fields={"power_grid", "power_load"})
+        )
+        self.assertDictEqual(
+            res,
+            {
+                key: GET_POWER_FLOW_REALTIME_DATA[key]
+                for key in ("timestamp", "status", "power_grid", "power_load")
+            },
+        )
+
+    def test_fronius_system_projection(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.current_system_meter_data(fields=["power_real"])
+        )
+        self.assertEqual(
+            res["meters"], {"0": {"power_real": {"value": -367.722145, "unit": "W"}}}
+        )
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.current_system_inverter_data(fields=["power_ac"])
+        )
+        self.assertEqual(res["power_ac"], {"value": 0, "unit": "W"})
+        self.assertNotIn("energy_day", res)
+        self.assertEqual(
+            res["inverters"], {"1": {"power_ac": {"value": 0, "unit": "W"}}}
+        )
+
+    def test_fronius_fetch_projection(self):
+        res = asyncio.get_event_loop().run_until_complete(
+            self.fronius.fetch_named(fields={"power_grid", "power_real"})
+        )
+        # inverter and storage endpoints provide none of the fields
+        self.assertCountEqual(
+            res,
+            [("power_flow", None), ("system_meter", None), ("device_meter", 0)],
+        )
+        self.assertEqual(
+            set(res[("power_flow", None)]), {"timestamp", "status", "power_grid"}
+        )
+        self.assertEqual(
+            set(res[("device_meter", 0)]), {"timestamp", "status", "power_real"}
+        )
+
+    def test_fronius_persistent_readings(self):
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, persistent=True
+        )
+        first = asyncio.get_event_loop().run_until_complete(
+            fronius.current_system_meter_data()
+        )
+        power_real = first["meters"]["0"]["power_real"]
+        self.assertEqual(first["sequence"], {"value": 1})
+        self.assertDictEqual(
+            {k: v for k, v in first.items() if k != "sequence"},
+            GET_METER_REALTIME_DATA_SYSTEM,
+        )
+        second = asyncio.get_event_loop().run_until_complete(
+            fronius.current_system_meter_data()
+        )
+        # the same reading is updated in place
+        self.assertIs(first, second)
+        self.assertIs(second["meters"]["0"]["power_real"], power_real)
+        self.assertEqual(second["sequence"], {"value": 2})
+        # other devices and projections get readings of their own
+        other = asyncio.get_event_loop().run_until_complete(
+            fronius.current_system_meter_data(fields={"power_real"})
+        )
+        self.assertIsNot(other, second)
+        self.assertEqual(other["sequence"], {"value": 1})
+
+        async def broken_reply(spec, spec_name, *spec_formattings, convert):
+            head = {"Timestamp": "2021-10-07T10:01:18+02:00", "Status": {}}
+            return convert({"Head": head, "Body": {}})
+
+        fronius._fetch_solar_api = broken_reply
+        # a failed update returns no stale values
+        self.assertEqual(
+            asyncio.get_event_loop().run_until_complete(
+                fronius.current_system_meter_data()
+            ),
+            {},
+        )
+        del fronius._fetch_solar_api
+        third = asyncio.get_event_loop().run_until_complete(
+            fronius.current_system_meter_data()
+        )
+        self.assertIsNot(third, second)
+        self.assertEqual(third["sequence"], {"value": 3})
+
+    def test_fronius_persistent_removed_entries(self):
+        sensor = {}
+        meter = {"PowerReal_P_Sum": 10, "Details": {"Serial": "1"}}
+        pyfronius.Fronius._system_meter_data(sensor, {"0": meter, "1": meter})
+        pyfronius.Fronius._system_meter_data(sensor, {"1": {"PowerReal_P_Sum": 5}})
+        self.assertEqual(
+            sensor, {"meters": {"1": {"power_real": {"value": 5, "unit": "W"}}}}
+        )
+        module = {"Temperature_Cell": 20}
+        pyfronius.Fronius._device_storage_data(
+            sensor, {"Controller": {}, "Modules": [module, module]}
+        )
+        pyfronius.Fronius._device_storage_data(sensor, {"Modules": [module]})
+        self.assertEqual(list(sensor["modules"]), [0])
+
+    def test_fronius_fetch_as_completed(self):
+        async def collect():
+            keys = []
+            async for key, result in self.fronius.fetch_as_completed(
+                system_meter=False, system_inverter=False, device_storage=()
+            ):
+                keys.append(key)
+                self.assertIsInstance(result, dict)
+            return keys
+
+        keys = asyncio.get_event_loop().run_until_complete(collect())
+        self.assertCountEqual(
+            keys,
+            [("power_flow", None), ("device_meter", 0), ("device_inverter", 1)],
+        )
+
+    def test_fronius_tracer(self):
+        tracer = pyfronius.PayloadTracer()
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, tracer=tracer
+        )
+        asyncio.get_event_loop().run_until_complete(fronius.current_power_flow())
+        traces = tracer.dump(self.url)
+        self.assertEqual(
+            [t.endpoint for t in traces], ["api version", "current power flow"]
+        )
+        self.assertIsInstance(traces[0].payload, str)
+
+    def test_fronius_stream_system_meter_data(self):
+        async def collect():
+            return [
+                meter
+                async for meter in self.fronius.stream_system_meter_data(
+                    fields={"power_real"}
+                )
+            ]
+
+        meters = asyncio.get_event_loop().run_until_complete(collect())
+        expected = GET_METER_REALTIME_DATA_SYSTEM["meters"]["0"]["power_real"]
+        self.assertEqual(meters, [("0", {"power_real": expected})])
+
+    def test_fronius_stream_system_inverter_data(self):
+        async def collect():
+            return dict(
+                [
+                    channel
+                    async for channel in self.fronius.stream_system_inverter_data()
+                ]
+            )
+
+        channels = asyncio.get_event_loop().run_until_complete(collect())
+        for name, inverters in channels.items():
+            for inverter, entry in inverters.items():
+                self.assertEqual(
+                    entry,
+                    GET_INVERTER_REALTIME_DATA_SYSTEM["inverters"][inverter][name],
+                )
+        self.assertEqual(
+            set(channels), set(GET_INVERTER_REALTIME_DATA_SYSTEM["inverters"]["1"])
+        )
+
     def tearDown(self):
         asyncio.get_event_loop().run_until_complete(self.session.close())
         self.server_control.stop_server()
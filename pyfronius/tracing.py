@@ -0,0 +1,119 @@
+"""
+Tracing of the raw replies of Fronius devices
+
+PayloadTracer keeps the last raw replies of each device in memory, so that
+they can be dumped when a reply fails to convert, and logs a configurable
+sample of the replies per endpoint. Replies are kept as the received text
+and formatted only when a log record is actually emitted, so tracing costs
+little more than a reference when logging is off.
+"""
+
+import collections
+import logging
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+Trace = collections.namedtuple("Trace", ["timestamp", "endpoint", "payload"])
+
+
+class PayloadTracer:
+    """
+    Keeps the last replies per device and logs a sample of them at DEBUG
+    Attributes:
+        ring_size       Number of replies kept per device, 0 to keep none
+        sample_rates    Dictionary of endpoint (i.e. "current power flow") to
+                        the fraction of its replies logged, 0 to log none
+        default_rate    Fraction of the replies of other endpoints logged
+        dump_level      Level at which the kept replies are dumped on error
+        logger          Logger the replies are logged to
+    """
+
+    def __init__(
+        self,
+        ring_size=10,
+        sample_rates=None,
+        default_rate=1.0,
+        dump_level=logging.WARNING,
+        logger=_LOGGER,
+    ):
+        self.ring_size = ring_size
+        self.sample_rates = dict(sample_rates or {})
+        self.default_rate = default_rate
+        self.dump_level = dump_level
+        self.logger = logger
+        self._rings = {}
+        self._credit = {}
+
+    def _sampled(self, endpoint):
+        # deterministic sampling, every 1/rate-th reply is logged
+        rate = self.sample_rates.get(endpoint, self.default_rate)
+        if rate <= 0:
+            return False
+        credit = self._credit.get(endpoint, 1.0 - rate) + rate
+        if credit >= 1.0:
+            self._credit[endpoint] = credit - 1.0
+            return True
+        self._credit[endpoint] = credit
+        return False
+
+    def record(self, device, endpoint, payload):
+        """
+        Record a raw reply of a device
+        :param device: Identifies the device, i.e. its url
+        :param endpoint: Identifies the endpoint for sampling
+        :param payload: The reply as received
+        """
+        if self.ring_size:
+            ring = self._rings.get(device)
+            if ring is None:
+                ring = self._rings[device] = collections.deque(maxlen=self.ring_size)
+            ring.append(Trace(time.time(), endpoint, payload))
+        if self.logger.isEnabledFor(logging.DEBUG) and self._sampled(endpoint):
+            self.logger.debug(
+                "Reply of %s from %s: %s",
+                endpoint,
+                device,
+                payload,
+                extra={"device": device, "endpoint": endpoint},
+            )
+
+    def dump(self, device):
+        """
+        The kept replies of a device, oldest first
+        :return: List of Trace
+        """
+        return list(self._rings.get(device, ()))
+
+    def log_dump(self, device, reason=None, level=None):
+        """
+        Log the kept replies of a device, i.e. after a failed conversion
+        :param level: Log level, dump_level if omitted
+        """
+        if level is None:
+            level = self.dump_level
+        if not self.logger.isEnabledFor(level):
+            return
+        traces = self.dump(device)
+        self.logger.log(
+            level, "Dumping %d replies of %s: %s", len(traces), device, reason
+        )
+        for trace in traces:
+            self.logger.log(
+                level,
+                "Reply of %s from %s at %.3f: %s",
+                trace.endpoint,
+                device,
+                trace.timestamp,
+                trace.payload,
+                extra={"device": device, "endpoint": trace.endpoint},
+            )
+
+    def clear(self, device=None):
+        """
+        Forget the kept replies of one or all devices
+        """
+        if device is None:
+            self._rings.clear()
+        else:
+            self._rings.pop(device, None)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Allocation benchmark of the converters
+
+Compares the objects allocated per conversion of the recorded payloads
+when building a new reading each time and when updating one reading in
+place (as Fronius does with persistent=True).
+Usage: python scripts/bench_allocations.py [iterations]
+"""
+
+import json
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+
+from pyfronius import Fronius  # noqa: E402
+
+PAYLOADS = ROOT.joinpath(
+    "pyfronius", "tests", "test_structure", "v1", "solar_api", "v1"
+)
+CONVERTERS = {
+    "GetPowerFlowRealtimeData.fcgi": Fronius._system_power_flow,
+    "GetMeterRealtimeData.cgi?Scope=System": Fronius._system_meter_data,
+    "GetMeterRealtimeData.cgi?Scope=Device&DeviceId=0": Fronius._device_meter_data,
+    "GetInverterRealtimeData.cgi?Scope=System": Fronius._system_inverter_data,
+    (
+        "GetInverterRealtimeData.cgi?Scope=Device&DeviceId=1&"
+        "DataCollection=CommonInverterData"
+    ): Fronius._device_inverter_data,
+}
+
+
+def convert(fun, res, sensor):
+    Fronius._status_data(res, sensor)
+    return fun(sensor, res["Body"]["Data"])
+
+
+def allocated_per_call(fun, res, persistent, iterations):
+    """
+    Average number of memory blocks and bytes allocated by each conversion.
+    The readings are kept until all conversions are done, so that their
+    dictionaries are not reused from the interpreter's free list, which
+    tracemalloc does not see.
+    :return: Tuple of blocks and bytes per call
+    """
+    sensor = convert(fun, res, {})
+    readings = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(iterations):
+        readings.append(convert(fun, res, sensor if persistent else {}))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    # the list holding the readings
+    blocks -= 1
+    size -= sys.getsizeof(readings)
+    return blocks / iterations, size / iterations
+
+
+def main(iterations=1000):
+    print(
+        "{:<50} {:>10} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+            "payload",
+            "new blk",
+            "inplace",
+            "new B",
+            "inplace",
+            "new us",
+            "inplace",
+        )
+    )
+    for name, fun in CONVERTERS.items():
+        with PAYLOADS.joinpath(name).open() as f:
+            res = json.load(f)
+        new_blocks, new = allocated_per_call(fun, res, False, iterations)
+        inplace_blocks, inplace = allocated_per_call(fun, res, True, iterations)
+        sensor = convert(fun, res, {})
+        t_new = timeit.timeit(lambda: convert(fun, res, {}), number=iterations)
+        t_inplace = timeit.timeit(lambda: convert(fun, res, sensor), number=iterations)
+        print(
+            "{:<50} {:>10.1f} {:>10.1f} {:>10.0f} {:>10.0f} {:>10.2f} {:>10.2f}".format(
+                name[:50],
+                new_blocks,
+                inplace_blocks,
+                new,
+                inplace,
+                t_new / iterations * 1e6,
+                t_inplace / iterations * 1e6,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+"""
+Converter benchmark on synthetic sites
+
+Converts the replies of synthetic sites of growing size and reports the
+reply size and the time per conversion of each system scope and storage
+converter, both building a new reading and updating one in place.
+Usage: python scripts/bench_converters.py [iterations]
+"""
+
+import datetime
+import json
+import sys
+import timeit
+
+from pyfronius import Fronius
+from pyfronius.synthetic import SyntheticSite
+
+# (inverters, meters, battery modules)
+SIZES = ((1, 1, 4), (10, 10, 16), (100, 50, 32), (500, 200, 64))
+CONVERTERS = {
+    "GetPowerFlowRealtimeData.fcgi": Fronius._system_power_flow,
+    "GetMeterRealtimeData.cgi?Scope=System": Fronius._system_meter_data,
+    "GetInverterRealtimeData.cgi?Scope=System": Fronius._system_inverter_data,
+    "GetStorageRealtimeData.cgi?Scope=Device&DeviceId=0": Fronius._device_storage_data,
+}
+WHEN = datetime.datetime(2021, 6, 21, 12, tzinfo=datetime.timezone.utc)
+
+
+def main(iterations):
+    print(
+        "{:>14} {:<42} {:>9} {:>12} {:>12}".format(
+            "size", "reply", "bytes", "new us", "in place us"
+        )
+    )
+    for inverters, meters, modules in SIZES:
+        site = SyntheticSite(inverters, meters, modules)
+        replies = site.replies(WHEN)
+        for url, fun in CONVERTERS.items():
+            reply = replies["solar_api/v1/" + url]
+            data = reply["Body"]["Data"]
+            reading = fun({}, data)
+            new = timeit.timeit(lambda: fun({}, data), number=iterations)
+            in_place = timeit.timeit(lambda: fun(reading, data), number=iterations)
+            print(
+                "{:>14} {:<42} {:>9} {:>12.1f} {:>12.1f}".format(
+                    "{}/{}/{}".format(inverters, meters, modules),
+                    url[:42],
+                    len(json.dumps(reply)),
+                    new / iterations * 1e6,
+                    in_place / iterations * 1e6,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+Import time benchmark of pyfronius
+
+Imports pyfronius in fresh interpreters with -X importtime and reports the
+median cumulative import time and the slowest modules. Exits with status 1
+if the HTTP stack is imported eagerly again or the median exceeds the
+given budget, so it can guard against regressions in CI. Also runs
+python -m pyfronius --help, which must not import aiohttp either.
+Usage: python scripts/bench_import.py [--runs N] [--budget MS] [--module M]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+# Modules only needed for network use
+DEFERRED = ("aiohttp", "asyncio", "json", "concurrent.futures")
+# Modules the command line interface must not load for --help
+CLI = "pyfronius.__main__"
+CLI_DEFERRED = ("aiohttp",)
+
+
+def import_times(module, argv=None):
+    """
+    Import a module in a fresh interpreter
+    :param argv: Arguments to call the main function of the module with,
+        None to only import it
+    :return: Dictionary of imported module to (self, cumulative) time in us
+    """
+    code = "import {}".format(module)
+    if argv is not None:
+        code = "from {} import main; main({!r})".format(module, argv)
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=str(ROOT),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    times = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        if not own.strip().isdigit():
+            # header line
+            continue
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, default=100, help="ms")
+    parser.add_argument("--module", default="pyfronius")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    cumulative = statistics.median(run[args.module][1] for run in runs) / 1000
+    print("{}: {:.1f} ms (median of {})".format(args.module, cumulative, args.runs))
+    last = runs[-1]
+    for name, (own, _) in sorted(last.items(), key=lambda i: -i[1][0])[: args.top]:
+        print("  {:>8.1f} ms  {}".format(own / 1000, name))
+
+    failed = False
+    eager = [name for name in DEFERRED if name in last]
+    if eager:
+        print("imported eagerly: {}".format(", ".join(eager)))
+        failed = True
+    if cumulative > args.budget:
+        print("over budget of {} ms".format(args.budget))
+        failed = True
+
+    cli = import_times(CLI, ["--help"])
+    print("{} --help: {:.1f} ms".format(CLI, cli[CLI][1] / 1000))
+    eager = [name for name in CLI_DEFERRED if name in cli]
+    if eager:
+        print("imported by --help: {}".format(", ".join(eager)))
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
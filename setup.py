@@ -22,6 +22,7 @@ setup(
     url="https://github.com/nielstron/pyfronius/",
     packages=find_packages(exclude=("pyfronius.tests", "pyfronius.tests.*")),
     install_requires=[ "aiohttp" ],
+    extras_require={"numpy": ["numpy"], "orjson": ["orjson"]},
     long_description=long_description,
     long_description_content_type="text/markdown",
     license="MIT",